@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
@@ -16,11 +16,26 @@ import Chatbot from '../common/Chatbot';
 import { formatMoney, getCategoryIcon, formatMonthlyData } from '../common/helpers';
 import './Dashboard.css';
 
+const RECENT_TRANSACTIONS = 5;
+// Wait before reopening a dropped event stream
+const STREAM_RETRY_MS = 3000;
+
+// Apply a pushed transaction event to the dashboard's recent list
+const applyTransactionEvent = (recent, action, transaction) => {
+  const others = recent.filter(t => t.id !== transaction.id);
+  if (action === 'deleted') return others;
+  return [transaction, ...others]
+    .sort((a, b) => b.date.localeCompare(a.date) || b.id - a.id)
+    .slice(0, RECENT_TRANSACTIONS);
+};
+
 const Dashboard = () => {
   const [activeMenu, setActiveMenu] = useState('dashboard');
   const [dashboardData, setDashboardData] = useState(null);
   const [user, setUser] = useState(null);
   const [notifications, setNotifications] = useState([]);
+  const [notificationsNext, setNotificationsNext] = useState(null);
+  const [unreadCount, setUnreadCount] = useState(0);
   const [expenseCategories, setExpenseCategories] = useState([]);
   const [expenseTransactions, setExpenseTransactions] = useState([]);
   const [budgets, setBudgets] = useState([]);
@@ -33,6 +48,10 @@ const Dashboard = () => {
   const [formError, setFormError] = useState('');
   const [editingTransaction, setEditingTransaction] = useState(null);
   const [isDataLoading, setIsDataLoading] = useState(false);
+  // True while an event stream that sees every worker's writes is connected:
+  // writes then update the page through pushed events instead of refetching
+  const streamOpen = useRef(false);
+  const monthlyRows = useRef([]);
   const navigate = useNavigate();
 
   const fetchDashboardData = useCallback(async () => {
@@ -44,41 +63,33 @@ const Dashboard = () => {
 
     setIsDataLoading(true);
     try {
-      const [dashboardRes, userRes, notificationsRes, budgetsRes, monthlyRes] = await Promise.all([
-        axios.get('https://budgetbuddy-backend-eq1x.onrender.com/api/dashboard/', {
-          headers: { Authorization: `Bearer ${token}` }
-        }),
-        axios.get('https://budgetbuddy-backend-eq1x.onrender.com/api/user/', {
-          headers: { Authorization: `Bearer ${token}` }
-        }),
-        axios.get('https://budgetbuddy-backend-eq1x.onrender.com/api/notifications/', {
-          headers: { Authorization: `Bearer ${token}` }
-        }).catch(() => ({ data: [] })),
-        axios.get('https://budgetbuddy-backend-eq1x.onrender.com/api/budgets/', {
-          headers: { Authorization: `Bearer ${token}` }
-        }).catch(() => ({ data: [] })),
-        axios.get('https://budgetbuddy-backend-eq1x.onrender.com/api/transactions/monthly/', {
-          headers: { Authorization: `Bearer ${token}` }
-        }).catch(() => ({ data: [] }))
-      ]);
+      // One request for everything on mount. The response carries an ETag,
+      // so the browser revalidates it and an unchanged dashboard is a 304.
+      const { data } = await axios.get('https://budgetbuddy-backend-eq1x.onrender.com/api/bootstrap/', {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      const dashboard = data.dashboard;
 
       const processedData = {
-        ...dashboardRes.data,
+        ...dashboard,
         savings_goal: {
-          ...dashboardRes.data.savings_goal,
-          current_amount: Number(dashboardRes.data.savings_goal.current_amount),
-          target_amount: Number(dashboardRes.data.savings_goal.target_amount)
+          ...dashboard.savings_goal,
+          current_amount: Number(dashboard.savings_goal.current_amount),
+          target_amount: Number(dashboard.savings_goal.target_amount)
         }
       };
       
       setDashboardData(processedData);
-      setUser(userRes.data);
-      setNotifications(notificationsRes.data);
-      setBudgets(budgetsRes.data);
-      setMonthlyTrends(formatMonthlyData(monthlyRes.data));
+      setUser(data.user);
+      setNotifications(data.notifications.results);
+      setNotificationsNext(data.notifications.next);
+      setUnreadCount(data.unread_count);
+      setBudgets(data.budgets);
+      monthlyRows.current = data.monthly;
+      setMonthlyTrends(formatMonthlyData(data.monthly));
 
-      if (dashboardRes.data.recent_transactions) {
-        const expenses = dashboardRes.data.recent_transactions.filter(t => t.type === 'expense');
+      if (dashboard.recent_transactions) {
+        const expenses = dashboard.recent_transactions.filter(t => t.type === 'expense');
         setExpenseTransactions(expenses);
         
         const categoryTotals = {};
@@ -144,7 +155,7 @@ const Dashboard = () => {
           { headers: { Authorization: `Bearer ${token}` } }
         );
       }
-      await refreshData();
+      if (!streamOpen.current) await refreshData();
       setShowTransactionForm(false);
       setEditingTransaction(null);
     } catch (error) {
@@ -168,11 +179,43 @@ const Dashboard = () => {
           n.id === id ? { ...n, is_read: true } : n
         )
       );
+      setUnreadCount(count => Math.max(0, count - 1));
     } catch (error) {
       console.error('Error marking notification as read:', error);
     }
   }, []);
 
+  const markAllNotificationsAsRead = useCallback(async () => {
+    const token = localStorage.getItem('access_token');
+    try {
+      const response = await axios.post(
+        'https://budgetbuddy-backend-eq1x.onrender.com/api/notifications/mark-read/',
+        { all: true },
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      setNotifications(prevNotifications => 
+        prevNotifications.map(n => ({ ...n, is_read: true }))
+      );
+      setUnreadCount(response.data.unread_count);
+    } catch (error) {
+      console.error('Error marking notifications as read:', error);
+    }
+  }, []);
+
+  const loadMoreNotifications = useCallback(async () => {
+    if (!notificationsNext) return;
+    const token = localStorage.getItem('access_token');
+    try {
+      const response = await axios.get(notificationsNext, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setNotifications(prevNotifications => [...prevNotifications, ...response.data.results]);
+      setNotificationsNext(response.data.next);
+    } catch (error) {
+      console.error('Error loading notifications:', error);
+    }
+  }, [notificationsNext]);
+
   const handleAddBudget = useCallback(async (budget) => {
     const token = localStorage.getItem('access_token');
     try {
@@ -181,7 +224,7 @@ const Dashboard = () => {
         budget,
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      await refreshData();
+      if (!streamOpen.current) await refreshData();
       setShowBudgetForm(false);
     } catch (error) {
       console.error('Error creating budget:', error);
@@ -196,7 +239,7 @@ const Dashboard = () => {
         `https://budgetbuddy-backend-eq1x.onrender.com/api/transactions/${transactionId}/`, 
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      await refreshData();
+      if (!streamOpen.current) await refreshData();
     } catch (error) {
       console.error('Error deleting transaction:', error);
       alert(`Failed to delete transaction. ${error.response?.data?.detail || 'Please try again.'}`);
@@ -219,6 +262,7 @@ const Dashboard = () => {
       ]);
 
       setDashboardData(dashboardRes.data);
+      monthlyRows.current = monthlyRes.data;
       setMonthlyTrends(formatMonthlyData(monthlyRes.data));
       setBudgets(budgetsRes.data);
     } catch (error) {
@@ -226,20 +270,123 @@ const Dashboard = () => {
     }
   }, []);
 
+  useEffect(() => {
+    if (!localStorage.getItem('access_token') || typeof EventSource === 'undefined') return undefined;
+
+    let source = null;
+    let retry = null;
+    let closed = false;
+    let connectedBefore = false;
+
+    const connect = async () => {
+      let ticket;
+      try {
+        // A short-lived, single-use ticket: the access token never goes in the URL
+        const { data } = await axios.post(
+          'https://budgetbuddy-backend-eq1x.onrender.com/api/async/events/ticket/',
+          {},
+          { headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` } }
+        );
+        ticket = data.ticket;
+      } catch (error) {
+        console.error('Error opening the event stream:', error);
+        retry = setTimeout(connect, STREAM_RETRY_MS);
+        return;
+      }
+      if (closed) return;
+
+      source = new EventSource(
+        `https://budgetbuddy-backend-eq1x.onrender.com/api/async/events/?ticket=${encodeURIComponent(ticket)}`
+      );
+      const on = (event, handler) => source.addEventListener(event, e => handler(JSON.parse(e.data)));
+
+      on('ready', ({ shared }) => {
+        // After a reconnect, catch up on anything written while we were away
+        if (connectedBefore) refreshData();
+        connectedBefore = true;
+        // A server whose events stay in one process may hand our writes to
+        // another worker: keep refetching after them
+        streamOpen.current = shared;
+      });
+      on('resync', () => refreshData());
+      on('transaction', ({ action, transaction }) => {
+        if (action === 'imported') {
+          refreshData();
+          return;
+        }
+        setDashboardData(prev => prev && {
+          ...prev,
+          recent_transactions: applyTransactionEvent(prev.recent_transactions || [], action, transaction)
+        });
+      });
+      on('totals', ({ income, expenses }) => {
+        setDashboardData(prev => prev && { ...prev, income, expenses });
+      });
+      on('monthly', months => {
+        const changed = new Map(months.map(m => [m.month, m]));
+        monthlyRows.current = monthlyRows.current.map(m => changed.get(m.month) || m);
+        setMonthlyTrends(formatMonthlyData(monthlyRows.current));
+      });
+      on('budgets', changed => {
+        setBudgets(prev => {
+          const byId = new Map(changed.map(b => [b.id, b]));
+          const added = changed.filter(b => !prev.some(p => p.id === b.id));
+          return [...prev.map(b => byId.get(b.id) || b), ...added];
+        });
+      });
+      on('budget_deleted', ({ id }) => {
+        setBudgets(prev => prev.filter(b => b.id !== id));
+      });
+      on('notification', notification => {
+        setNotifications(prev => [notification, ...prev]);
+        setUnreadCount(count => count + 1);
+      });
+      // The ticket is spent, so EventSource cannot reconnect by itself; until
+      // a new stream is open, writes refetch as before
+      source.onerror = () => {
+        streamOpen.current = false;
+        source.close();
+        retry = setTimeout(connect, STREAM_RETRY_MS);
+      };
+    };
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      streamOpen.current = false;
+      if (source) source.close();
+    };
+  }, [refreshData]);
+
   const generateReport = useCallback(async (type = 'monthly') => {
     try {
-      const response = await axios.get(`https://budgetbuddy-backend-eq1x.onrender.com/api/reports/?type=${type}`, {
-        headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
-        responseType: 'blob'
-      });
+      // The report is rendered in the background: poll until the PDF is ready (202 while pending)
+      let url = `https://budgetbuddy-backend-eq1x.onrender.com/api/reports/?type=${type}`;
+      let response;
+      for (let attempt = 0; attempt < 30; attempt++) {
+        response = await axios.get(url, {
+          headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
+          responseType: 'blob'
+        });
+        if (response.status !== 202) break;
+        const pending = JSON.parse(await response.data.text());
+        url = pending.poll_url;
+        const retryAfter = Number(response.headers['retry-after']) || 2;
+        await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+      }
+      if (response.status === 202) {
+        throw new Error('Report is still being generated');
+      }
       
-      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const blobUrl = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement('a');
-      link.href = url;
+      link.href = blobUrl;
       link.setAttribute('download', `budget_report_${new Date().toISOString().split('T')[0]}.pdf`);
       document.body.appendChild(link);
       link.click();
       link.remove();
+      window.URL.revokeObjectURL(blobUrl);
     } catch (error) {
       console.error('Error generating report:', error);
       alert('Failed to generate report');
@@ -261,7 +408,7 @@ const Dashboard = () => {
       <Sidebar 
         activeMenu={activeMenu} 
         setActiveMenu={setActiveMenu} 
-        notifications={notifications}
+        unreadCount={unreadCount}
         handleLogout={handleLogout}
       />
 
@@ -373,7 +520,11 @@ const Dashboard = () => {
         {activeMenu === 'notifications' && (
           <NotificationsList 
             notifications={notifications}
+            unreadCount={unreadCount}
+            hasMore={Boolean(notificationsNext)}
             markNotificationAsRead={markNotificationAsRead}
+            markAllNotificationsAsRead={markAllNotificationsAsRead}
+            loadMoreNotifications={loadMoreNotifications}
           />
         )}
       </div>
@@ -3,13 +3,26 @@ import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { faCheck,faBell } from '@fortawesome/free-solid-svg-icons';
 import './NotificationsList.css';
 
-const NotificationsList = ({ notifications, markNotificationAsRead }) => {
+const NotificationsList = ({
+  notifications,
+  unreadCount,
+  hasMore,
+  markNotificationAsRead,
+  markAllNotificationsAsRead,
+  loadMoreNotifications
+}) => {
   return (
     <div className="notifications-content">
       <h2>
         <FontAwesomeIcon icon={faBell} /> Notifications
       </h2>
       
+      {unreadCount > 0 && (
+        <button className="btn btn-primary" onClick={markAllNotificationsAsRead}>
+          <FontAwesomeIcon icon={faCheck} /> Mark all as read
+        </button>
+      )}
+      
       {notifications.length === 0 ? (
         <p>No notifications to display</p>
       ) : (
@@ -38,6 +51,12 @@ const NotificationsList = ({ notifications, markNotificationAsRead }) => {
           ))}
         </ul>
       )}
+      
+      {hasMore && (
+        <button className="btn btn-primary" onClick={loadMoreNotifications}>
+          Load more
+        </button>
+      )}
     </div>
   );
 };
@@ -6,7 +6,7 @@ import {
 } from '@fortawesome/free-solid-svg-icons';
 import './Sidebar.css';
 
-const Sidebar = ({ activeMenu, setActiveMenu, notifications, handleLogout }) => {
+const Sidebar = ({ activeMenu, setActiveMenu, unreadCount, handleLogout }) => {
   return (
     <div className="sidebar">
       <div className="sidebar-header">
@@ -28,9 +28,9 @@ const Sidebar = ({ activeMenu, setActiveMenu, notifications, handleLogout }) =>
           >
             <FontAwesomeIcon icon={item.icon} />
             <span>{item.label}</span>
-            {item.id === 'notifications' && notifications.filter(n => !n.is_read).length > 0 && (
+            {item.id === 'notifications' && unreadCount > 0 && (
               <span className="notification-badge">
-                {notifications.filter(n => !n.is_read).length}
+                {unreadCount}
               </span>
             )}
           </li>
@@ -0,0 +1,187 @@
+"""
+Async versions of the read-heavy endpoints, served under /api/async/.
+
+Under an ASGI server (see start.sh) a request waiting on the database or
+cache no longer holds a worker thread. The responses are the same as
+their DRF counterparts in views.py. DRF 3.14 views cannot be async, so
+these are plain Django views that authenticate the JWT themselves.
+"""
+import asyncio
+import json
+import logging
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .event_layers import get_event_layer
+from .models import Notification
+from .pagination import KeysetPagination
+from .serializers import NotificationSerializer
+from .services import chatbot
+from .services.dashboard import DASHBOARD_NOTIFICATIONS, dashboard_payload
+from .services.events import aredeem_stream_ticket, issue_stream_ticket, user_group
+from .services.notifications import aunread_count
+from .services.summary import aget_summary
+
+logger = logging.getLogger(__name__)
+
+_jwt = JWTAuthentication()
+
+
+def _json(data, status=200):
+    # DRF's encoder, so Decimal totals render exactly as in the sync views
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def _unauthorized(detail):
+    response = _json({'detail': detail}, status=401)
+    response['WWW-Authenticate'] = _jwt.authenticate_header(None)
+    return response
+
+
+def jwt_required(view=None, stream_ticket=False):
+    """
+    Set request.user from the Bearer token, or answer 401 like DRF does.
+    With stream_ticket=True a single-use ?ticket= from events_ticket is
+    accepted as well; access tokens are never read from the URL.
+    """
+    if view is None:
+        return lambda view: jwt_required(view, stream_ticket)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if stream_ticket and 'ticket' in request.GET:
+            request.user = await aredeem_stream_ticket(request.GET['ticket'])
+            if request.user is None:
+                return _unauthorized('Invalid or expired stream ticket.')
+            return await view(request, *args, **kwargs)
+        try:
+            # Validates the token and loads the user (one query)
+            authenticated = await sync_to_async(_jwt.authenticate)(request)
+        except APIException as exc:
+            return _unauthorized(exc.detail)
+        if authenticated is None:
+            return _unauthorized(NotAuthenticated.default_detail)
+        request.user = authenticated[0]
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def _unread_notifications(user):
+    return [
+        notification async for notification in
+        Notification.objects.filter(user=user, is_read=False).order_by('-created_at')[:DASHBOARD_NOTIFICATIONS]
+    ]
+
+
+@require_GET
+@jwt_required
+async def dashboard(request):
+    user = request.user
+    summary, notifications = await asyncio.gather(
+        aget_summary(user),
+        _unread_notifications(user),
+    )
+    return _json(dashboard_payload(summary, NotificationSerializer(notifications, many=True).data))
+
+
+@require_GET
+@jwt_required
+async def monthly_transactions(request):
+    return _json((await aget_summary(request.user))['monthly'])
+
+
+@require_GET
+@jwt_required
+async def notifications(request):
+    rows = Notification.objects.filter(user=request.user)
+    if request.GET.get('unread') in ('1', 'true'):
+        rows = rows.filter(is_read=False)
+    paginator = KeysetPagination(ordering_field='created_at')
+    # The paginator reads query_params and evaluates the page synchronously
+    page = await sync_to_async(paginator.paginate_queryset)(rows, Request(request))
+    return _json({
+        'next': paginator.get_next_link(),
+        'results': NotificationSerializer(page, many=True).data,
+    })
+
+
+@require_GET
+@jwt_required
+async def unread_count(request):
+    return _json({'unread_count': await aunread_count(request.user)})
+
+
+@csrf_exempt
+@require_POST
+@jwt_required
+async def chatbot_reply(request):
+    try:
+        message = json.loads(request.body or b'{}').get('message', '')
+    except (ValueError, AttributeError):
+        return _json({'detail': 'Expected a JSON object with a "message".'}, status=400)
+
+    try:
+        _, response = await chatbot.areply(request.user, message)
+        return _json({'response': response})
+    except Exception:
+        logger.exception("Chatbot reply failed")
+        return _json({'response': "Sorry, I'm having trouble accessing your data right now. Please try again later."})
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n"
+
+
+@csrf_exempt
+@require_POST
+@jwt_required
+async def events_ticket(request):
+    """A single-use ticket for opening the event stream (EventSource sends no headers)"""
+    ticket = await sync_to_async(issue_stream_ticket)(request.user)
+    return _json({'ticket': ticket, 'expires_in': settings.CACHE_TTLS['streamticket']})
+
+
+@require_GET
+@jwt_required(stream_ticket=True)
+async def events(request):
+    """
+    Server-sent events with the changes to the user's data (see
+    services/events.py), for as long as the client stays connected.
+    Opened with ?ticket= from events_ticket.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the stream would hold a worker for good
+        return _json({'detail': 'The event stream needs the ASGI server.'}, status=503)
+
+    group = user_group(request.user.id)
+    heartbeat = settings.EVENT_STREAM_HEARTBEAT
+
+    async def stream():
+        layer = get_event_layer()
+        async with layer.subscribe(group) as receive:
+            # Subscribed before the first byte, so a client that refetches
+            # on 'ready' cannot miss a write made in between. Unless the
+            # layer is shared, writes handled by other workers or Celery
+            # never arrive and the client must keep refetching after its own
+            yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n" + _sse('ready', {'shared': layer.shared})
+            while True:
+                try:
+                    message = await asyncio.wait_for(receive(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(message['event'], message['data'])
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,162 @@
+import os
+import tempfile
+from django.core.cache import caches
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.move import file_move_safe
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    """
+    Django's file cache, except that set_many() culls once for the whole
+    batch. The stock backend lists the cache directory before every key it
+    writes, which made caching an import's predictions quadratic.
+    """
+
+    def _write(self, key, value, timeout, version):
+        # FileBasedCache.set without the _cull()
+        fname = self._key_to_file(key, version)
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        renamed = False
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            file_move_safe(tmp_path, fname, allow_overwrite=True)
+            renamed = True
+        finally:
+            if not renamed:
+                os.remove(tmp_path)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        self._cull()
+        for key, value in data.items():
+            self._write(key, value, timeout, version)
+        return []
+
+
+class TwoTierCache(BaseCache):
+    """
+    An in-process LRU (LocMemCache) in front of a shared cache alias.
+
+    Only keys in LOCAL_NAMESPACES (the part before the first ':') are kept
+    in the local tier. Those must be immutable under their key, e.g. keyed
+    by model or data version, because another worker's write cannot evict
+    this process's copy; it only ages out after LOCAL_TIMEOUT. Every other
+    key (counters, pending markers, data versions) goes straight to the
+    shared tier, as do all writes.
+
+        CACHES['default'] = {
+            'BACKEND': 'api.cache_backends.TwoTierCache',
+            'LOCATION': 'default-local',
+            'OPTIONS': {
+                'SHARED_ALIAS': 'shared',
+                'LOCAL_NAMESPACES': ['catpred', 'summary'],
+                'LOCAL_TIMEOUT': 60,
+                'LOCAL_MAX_ENTRIES': 1000,
+            },
+        }
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__({**params, 'OPTIONS': {}})
+        self.shared_alias = options.get('SHARED_ALIAS', 'shared')
+        self.local_namespaces = frozenset(options.get('LOCAL_NAMESPACES', ()))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        # LocMemCache keeps its data per LOCATION at module level, so every
+        # thread's instance of this backend shares one local tier
+        self.local = LocMemCache(location or 'two-tier', {
+            'TIMEOUT': self.local_timeout,
+            'OPTIONS': {'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000)},
+        })
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return key.split(':', 1)[0] in self.local_namespaces
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _store_local(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        data = {key: value for key, value in data.items() if self.is_local(key)}
+        timeout = self._local_timeout(timeout)
+        if data and timeout > 0:
+            self.local.set_many(data, timeout=timeout, version=version)
+
+    def get(self, key, default=None, version=None):
+        if self.is_local(key):
+            value = self.local.get(key, self, version=version)
+            if value is not self:
+                return value
+        value = self.shared.get(key, self, version=version)
+        if value is self:
+            return default
+        self._store_local({key: value}, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        local_keys = [key for key in keys if self.is_local(key)]
+        found = self.local.get_many(local_keys, version=version) if local_keys else {}
+        missing = [key for key in keys if key not in found]
+        if missing:
+            fetched = self.shared.get_many(missing, version=version)
+            self._store_local(fetched, version=version)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout=timeout, version=version)
+        self._store_local({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout=timeout, version=version)
+        self._store_local({key: value for key, value in data.items() if key not in failed}, timeout, version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout=timeout, version=version)
+        if added:
+            self._store_local({key: value}, timeout, version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout=timeout, version=version)
+
+    def has_key(self, key, version=None):
+        return (self.is_local(key) and self.local.has_key(key, version=version)) or \
+            self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.local.delete_many(keys, version=version)
+        self.shared.delete_many(keys, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+def is_shared(cache):
+    """Whether what `cache` stores is seen by every worker process"""
+    if isinstance(cache, TwoTierCache):
+        return is_shared(cache.shared)
+    return not isinstance(cache, LocMemCache)
@@ -0,0 +1,137 @@
+"""
+Event layers carry server-sent events from the code that writes data to
+the /api/async/events/ streams (async_views.events).
+
+publish() is plain sync code, called from on_commit callbacks and Celery
+tasks; subscribe() is used by the streaming view on the event loop.
+EVENT_LAYER_URL picks the layer:
+
+    memory://              in-process groups of asyncio queues (default)
+    redis://host:6379/0    Redis pub/sub, for several workers or processes
+"""
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.utils.encoders import JSONEncoder
+
+# Sent instead of events a slow client's queue had no room for; the client
+# should refetch everything
+RESYNC = {'event': 'resync', 'data': {}}
+
+
+def _deliver(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC)
+
+
+class InMemoryEventLayer:
+    """
+    Subscribers of this process only: enough for a single ASGI worker and
+    for tests, but events published by other workers are never seen.
+    """
+    # Whether streams see writes made by every process
+    shared = False
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def has_subscribers(self, group):
+        return bool(self._groups.get(group))
+
+    def publish(self, group, message):
+        with self._lock:
+            subscribers = list(self._groups.get(group, ()))
+        for loop, queue in subscribers:
+            try:
+                # Publishers run on other threads than the streams' loop
+                loop.call_soon_threadsafe(_deliver, queue, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, group):
+        """Yields a coroutine function returning the group's next message"""
+        queue = asyncio.Queue(self.queue_size)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._groups.setdefault(group, set()).add(subscriber)
+        try:
+            yield queue.get
+        finally:
+            with self._lock:
+                members = self._groups[group]
+                members.discard(subscriber)
+                if not members:
+                    del self._groups[group]
+
+
+class RedisEventLayer:
+    """Redis pub/sub: a write in any web or Celery process reaches every stream"""
+    shared = True
+
+    def __init__(self, url, queue_size, prefix='events'):
+        import redis
+
+        self.url = url
+        self.queue_size = queue_size
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def _channel(self, group):
+        return f"{self.prefix}:{group}"
+
+    def has_subscribers(self, group):
+        # Asking Redis would cost as much as publishing
+        return True
+
+    def publish(self, group, message):
+        self._client.publish(self._channel(group), json.dumps(message, cls=JSONEncoder))
+
+    @asynccontextmanager
+    async def subscribe(self, group):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self._channel(group))
+        queue = asyncio.Queue(self.queue_size)
+
+        async def read():
+            # A reader task, so the stream's heartbeat timeouts never cancel
+            # a half-read reply on the pub/sub connection
+            async for message in pubsub.listen():
+                _deliver(queue, json.loads(message['data']))
+
+        reader = asyncio.create_task(read())
+        try:
+            yield queue.get
+        finally:
+            reader.cancel()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+def build_event_layer(url, queue_size):
+    scheme = urlsplit(url).scheme
+    if scheme == 'memory':
+        return InMemoryEventLayer(queue_size)
+    if scheme in ('redis', 'rediss'):
+        return RedisEventLayer(url, queue_size)
+    raise ImproperlyConfigured(f"Unsupported EVENT_LAYER_URL scheme '{scheme}'")
+
+
+@lru_cache(maxsize=None)
+def get_event_layer():
+    return build_event_layer(settings.EVENT_LAYER_URL, settings.EVENT_STREAM_QUEUE_SIZE)
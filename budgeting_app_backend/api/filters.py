@@ -0,0 +1,30 @@
+from .serializers import TransactionFilterSerializer
+
+
+def filter_transactions(queryset, query_params, serializer_class=TransactionFilterSerializer):
+    """
+    Apply the listing filters (type, category, date range, amount range and
+    description search) from the request query parameters.
+    Returns the filtered queryset and the validated parameters; invalid
+    parameters raise a ValidationError (400). Endpoints accepting extra
+    parameters pass a subclass of TransactionFilterSerializer.
+    """
+    params = serializer_class(data=query_params)
+    params.is_valid(raise_exception=True)
+    data = params.validated_data
+
+    if 'type' in data:
+        queryset = queryset.filter(type=data['type'])
+    if data.get('category'):
+        queryset = queryset.filter(category__in=data['category'])
+    if 'date_from' in data:
+        queryset = queryset.filter(date__gte=data['date_from'])
+    if 'date_to' in data:
+        queryset = queryset.filter(date__lte=data['date_to'])
+    if 'min_amount' in data:
+        queryset = queryset.filter(amount__gte=data['min_amount'])
+    if 'max_amount' in data:
+        queryset = queryset.filter(amount__lte=data['max_amount'])
+    if data.get('search'):
+        queryset = queryset.filter(description__icontains=data['search'])
+    return queryset, data
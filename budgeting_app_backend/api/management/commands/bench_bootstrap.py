@@ -0,0 +1,125 @@
+import statistics
+import time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from api.ml.synthetic import synthetic_transactions
+from api.models import Budget, Notification, SavingsGoal, Transaction
+from api.signals import transactions_bulk_created
+from api.views import (
+    BootstrapView,
+    BudgetView,
+    DashboardDataView,
+    MonthlyTransactionsView,
+    NotificationUnreadCountView,
+    NotificationView,
+    UserView,
+)
+
+# What Dashboard.js requested on mount before /bootstrap/
+SEPARATE_CALLS = [
+    ('/api/dashboard/', DashboardDataView),
+    ('/api/user/', UserView),
+    ('/api/notifications/', NotificationView),
+    ('/api/notifications/unread-count/', NotificationUnreadCountView),
+    ('/api/budgets/', BudgetView),
+    ('/api/transactions/monthly/', MonthlyTransactionsView),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(samples, q):
+    return statistics.quantiles(samples, n=100, method='inclusive')[q - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Server time and queries of the dashboard's initial load: the separate "
+        "endpoints against /bootstrap/, fresh and revalidated with If-None-Match "
+        "(changes are rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=20000)
+        parser.add_argument('--notifications', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=200, help="Loads per scenario")
+        parser.add_argument('--cold', action='store_true',
+                            help="Clear the cache before every load (no summary cache hits)")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.seed(options['transactions'], options['notifications'])
+                self.run(user, options['requests'], options['cold'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, size, notifications):
+        user = User.objects.create_user(username=f'bench-bootstrap-{time.time_ns()}')
+        sample = synthetic_transactions(size, seed=10)
+        created = Transaction.objects.bulk_create([
+            Transaction(user=user, type='expense', amount=row.amount, description=row.description,
+                        category=row.category, date=row.date)
+            for row in sample.itertuples()
+        ], batch_size=5000)
+        # bulk_create() sends no signals; announce the rows as the importer
+        # does, so the rollups and the ledger the views read are filled in
+        transactions_bulk_created.send(sender=Transaction, transactions=created)
+        SavingsGoal.objects.create(user=user, target_amount=1000)
+        Budget.objects.bulk_create([
+            Budget(user=user, category=category, limit=500, period=period)
+            for category, period in zip(sample['category'].unique()[:6], ['weekly', 'monthly', 'yearly'] * 2)
+        ])
+        Notification.objects.bulk_create([
+            Notification(user=user, title=f'Notice {i}', message='Benchmark', notification_type='info',
+                         is_read=i % 3 == 0)
+            for i in range(notifications)
+        ])
+        return user
+
+    def run(self, user, requests, cold):
+        factory = APIRequestFactory()
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        bootstrap = BootstrapView.as_view()
+        scenarios = {
+            'separate': [(path, view.as_view()) for path, view in SEPARATE_CALLS],
+            'bootstrap': [('/api/bootstrap/', bootstrap)],
+            'bootstrap 304': [('/api/bootstrap/', bootstrap)],
+        }
+
+        self.stdout.write(f"{'scenario':<14} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8} {'bytes':>8}")
+        for name, calls in scenarios.items():
+            cache.clear()
+            headers = dict(auth)
+            revalidate = name == 'bootstrap 304'
+            if revalidate:
+                # Clearing the cache also drops the data version the ETag is
+                # built from, so take it afterwards and never clear again
+                headers['HTTP_IF_NONE_MATCH'] = bootstrap(factory.get('/api/bootstrap/', **auth))['ETag']
+            timings = []
+            for _ in range(requests):
+                if cold and not revalidate:
+                    cache.clear()
+                size = 0
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    # Every call authenticates its own JWT, as the browser's would
+                    for path, view in calls:
+                        response = view(factory.get(path, **headers))
+                        if hasattr(response, 'render'):
+                            # DRF responses serialize on render; a 304 has no body
+                            response.render()
+                        size += len(response.content)
+                    timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"{name:<14} {percentile(timings, 50):>8.2f} {percentile(timings, 99):>8.2f} "
+                f"{len(queries):>8} {size:>8}"
+            )
@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand
+from api.ml.data_preprocessor import FEATURE_COLUMNS, add_features, build_features
+from api.ml.model_trainer import build_pipeline
+from api.ml.predictor import TransactionClassifier
+from api.ml.synthetic import synthetic_transactions
+
+
+class Command(BaseCommand):
+    help = "Compare per-request categorization throughput with TransactionClassifier.predict_many"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Descriptions to categorize")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--train-rows', type=int, default=2000,
+                            help="Size of the synthetic training set for the benchmark model")
+
+    def handle(self, *args, **options):
+        train = add_features(synthetic_transactions(options['train_rows'], seed=1))
+        model = build_pipeline().fit(train[FEATURE_COLUMNS], train['category'])
+        classifier = TransactionClassifier(model=model)
+
+        sample = synthetic_transactions(options['rows'], seed=2)
+        descriptions = sample['description'].tolist()
+        amounts = sample['amount'].tolist()
+        dates = sample['date'].tolist()
+
+        # The previous per-request path: predict and predict_proba on one row each
+        start = time.perf_counter()
+        for description, amount, date in zip(descriptions, amounts, dates):
+            features = build_features([description], [amount], [date])
+            model.predict(features)
+            model.predict_proba(features)
+        single = time.perf_counter() - start
+
+        batch_size = options['batch_size']
+        start = time.perf_counter()
+        for i in range(0, len(descriptions), batch_size):
+            classifier.predict_many(
+                descriptions[i:i + batch_size],
+                amounts[i:i + batch_size],
+                dates[i:i + batch_size],
+            )
+        batched = time.perf_counter() - start
+
+        rows = len(descriptions)
+        self.stdout.write(f"per-request: {rows / single:10.0f} rows/sec ({single:.2f}s)")
+        self.stdout.write(f"batch={batch_size:<5}: {rows / batched:10.0f} rows/sec ({batched:.2f}s)")
+        self.stdout.write(self.style.SUCCESS(f"speedup: {single / batched:.1f}x"))
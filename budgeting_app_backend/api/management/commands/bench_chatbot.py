@@ -0,0 +1,88 @@
+import statistics
+import time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from api.ml.synthetic import synthetic_transactions
+from api.models import Budget, SavingsGoal, Transaction
+from api.signals import transactions_bulk_created
+from api.views import ChatbotView
+
+MESSAGES = {
+    'greeting': 'hi there',
+    'balance': "what's my current balance?",
+    'expenses': 'where am I spending the most?',
+    'categories': 'show my expense categories',
+    'recent': 'show me my recent transactions',
+    'budget': 'how are my budgets doing?',
+    'help': 'help',
+    'unknown': 'tell me a joke',
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(samples, q):
+    return statistics.quantiles(samples, n=100, method='inclusive')[q - 1]
+
+
+class Command(BaseCommand):
+    help = "p50/p99 chatbot latency and queries per intent (changes are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=20000)
+        parser.add_argument('--requests', type=int, default=200, help="Requests per intent")
+        parser.add_argument('--cold', action='store_true',
+                            help="Clear the cache before every request (no summary cache hits)")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.seed(options['transactions'])
+                self.run(user, options['requests'], options['cold'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, size):
+        user = User.objects.create_user(username=f'bench-chatbot-{time.time_ns()}')
+        sample = synthetic_transactions(size, seed=8)
+        created = Transaction.objects.bulk_create([
+            Transaction(user=user, type='expense', amount=row.amount, description=row.description,
+                        category=row.category, date=row.date)
+            for row in sample.itertuples()
+        ], batch_size=5000)
+        # bulk_create() sends no signals; announce the rows as the importer
+        # does, so the rollups and the ledger the views read are filled in
+        transactions_bulk_created.send(sender=Transaction, transactions=created)
+        SavingsGoal.objects.create(user=user, target_amount=1000)
+        Budget.objects.bulk_create([
+            Budget(user=user, category=category, limit=500, period='monthly')
+            for category in sample['category'].unique()[:6]
+        ])
+        return user
+
+    def run(self, user, requests, cold):
+        factory = APIRequestFactory()
+        view = ChatbotView.as_view()
+        self.stdout.write(f"{'intent':<11} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8}")
+        for intent, message in MESSAGES.items():
+            cache.clear()
+            timings = []
+            for _ in range(requests):
+                if cold:
+                    cache.clear()
+                request = factory.post('/api/chatbot/', {'message': message}, format='json')
+                force_authenticate(request, user=user)
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    view(request)
+                    timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"{intent:<11} {percentile(timings, 50):>8.2f} {percentile(timings, 99):>8.2f} {len(queries):>8}"
+            )
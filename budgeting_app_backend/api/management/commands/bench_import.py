@@ -0,0 +1,97 @@
+import csv
+import os
+import tempfile
+import time
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.ml import registry
+from api.ml.data_preprocessor import FEATURE_COLUMNS, add_features
+from api.ml.model_trainer import build_pipeline
+from api.ml.synthetic import synthetic_transactions
+from api.serializers import TransactionSerializer
+from api.services.imports import import_file
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure bulk CSV import throughput against one serializer save per row (changes are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help="Rows in the generated CSV")
+        parser.add_argument('--uncategorized', type=float, default=0.2,
+                            help="Fraction of rows left for the classifier to categorize")
+        parser.add_argument('--per-row', type=int, default=1000,
+                            help="Rows to time through TransactionSerializer for comparison (0 to skip)")
+
+    def handle(self, *args, **options):
+        sample = synthetic_transactions(options['rows'], seed=4)
+        cutoff = int(len(sample) * options['uncategorized'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # A model trained on synthetic data, so the run does not depend on the deployed one
+            start = time.perf_counter()
+            train = add_features(synthetic_transactions(2000, seed=1))
+            model_path = registry.save_model(
+                build_pipeline().fit(train[FEATURE_COLUMNS], train['category']),
+                os.path.join(tmp, 'model.joblib')
+            )
+            self.stdout.write(f"model setup: {time.perf_counter() - start:.2f}s (not timed)")
+
+            csv_path = os.path.join(tmp, 'import.csv')
+            with open(csv_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['date', 'description', 'amount', 'type', 'category'])
+                for i, row in enumerate(sample.itertuples()):
+                    category = '' if i < cutoff else row.category
+                    writer.writerow([row.date.strftime('%Y-%m-%d'), row.description, f'{row.amount:.2f}', 'expense', category])
+
+            with mock.patch.object(registry, '_registry', registry.ModelRegistry(model_path)):
+                bulk, result = self.timed(lambda user: self.bulk_import(user, csv_path))
+                self.stdout.write(
+                    f"bulk import: {result.imported / bulk:10.0f} rows/sec "
+                    f"({result.imported} rows, {result.auto_categorized} categorized, {bulk:.2f}s)"
+                )
+
+                count = min(options['per_row'], len(sample))
+                if count:
+                    single, _ = self.timed(lambda user: self.per_row(user, sample.head(count)))
+                    self.stdout.write(f"per-row:     {count / single:10.0f} rows/sec ({count} rows, {single:.2f}s)")
+                    self.stdout.write(self.style.SUCCESS(
+                        f"speedup: {(result.imported / bulk) / (count / single):.1f}x"
+                    ))
+
+    def timed(self, func):
+        """Run func(user) in a transaction that is rolled back afterwards"""
+        outcome = {}
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(username=f'bench-import-{time.time_ns()}')
+                start = time.perf_counter()
+                outcome['result'] = func(user)
+                outcome['elapsed'] = time.perf_counter() - start
+                raise Rollback
+        except Rollback:
+            pass
+        return outcome['elapsed'], outcome['result']
+
+    def bulk_import(self, user, path):
+        with open(path, 'rb') as f:
+            return import_file(user, f, 'csv')
+
+    def per_row(self, user, rows):
+        for row in rows.itertuples():
+            serializer = TransactionSerializer(data={
+                'type': 'expense',
+                'amount': f'{row.amount:.2f}',
+                'description': row.description,
+                'category': row.category,
+                'date': row.date.strftime('%Y-%m-%d'),
+            })
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                serializer.save(user=user)
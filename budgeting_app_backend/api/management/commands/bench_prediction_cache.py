@@ -0,0 +1,42 @@
+import time
+from django.core.management.base import BaseCommand
+from api.ml.cache import PredictionCache
+from api.ml.data_preprocessor import FEATURE_COLUMNS, add_features
+from api.ml.model_trainer import build_pipeline
+from api.ml.predictor import TransactionClassifier
+from api.ml.synthetic import synthetic_transactions
+
+
+class Command(BaseCommand):
+    help = "Replay a skewed description distribution with and without the prediction cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help="Single-row categorize requests to replay")
+        parser.add_argument('--zipf', type=float, default=1.3, help="Skew of the merchant distribution")
+        parser.add_argument('--cache-alias', default='default')
+
+    def handle(self, *args, **options):
+        train = add_features(synthetic_transactions(2000, seed=1))
+        model = build_pipeline().fit(train[FEATURE_COLUMNS], train['category'])
+        classifier = TransactionClassifier(model=model)
+
+        sample = synthetic_transactions(options['requests'], seed=3, zipf=options['zipf'])
+        rows = list(zip(sample['description'], sample['amount'], sample['date']))
+
+        start = time.perf_counter()
+        for description, amount, date in rows:
+            classifier.predict_many([description], [amount], [date])
+        uncached = time.perf_counter() - start
+
+        cache = PredictionCache(alias=options['cache_alias'], prefix=f'bench:{time.time_ns()}')
+        start = time.perf_counter()
+        for description, amount, date in rows:
+            cache.predict_many(classifier, 'bench', [description], [amount], [date])
+        cached = time.perf_counter() - start
+
+        stats = cache.stats()
+        count = len(rows)
+        self.stdout.write(f"uncached: {count / uncached:10.0f} req/sec ({uncached:.2f}s)")
+        self.stdout.write(f"cached:   {count / cached:10.0f} req/sec ({cached:.2f}s)")
+        self.stdout.write(f"hit rate: {stats['hit_rate']:.1%} ({stats['hits']} hits / {stats['misses']} misses)")
+        self.stdout.write(self.style.SUCCESS(f"speedup: {uncached / cached:.1f}x"))
@@ -0,0 +1,53 @@
+import time
+import tracemalloc
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.ml.synthetic import synthetic_transactions
+from api.models import Transaction
+from api.services.report_pdf import render_pdf
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Render time and peak memory of PDF reports against transaction count (changes are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help="Comma separated transaction counts to benchmark")
+        parser.add_argument('--type', default='all', choices=['monthly', 'yearly', 'all'])
+        parser.add_argument('--appendix-limit', type=int, default=None,
+                            help="Override REPORT_APPENDIX_MAX_ROWS")
+
+    def handle(self, *args, **options):
+        period = {'monthly': '2024-06', 'yearly': '2024', 'all': 'all'}[options['type']]
+        self.stdout.write(f"{'rows':>8} {'render s':>9} {'peak MB':>8} {'PDF KB':>8}")
+        for size in [int(size) for size in options['sizes'].split(',')]:
+            try:
+                with transaction.atomic():
+                    user = User.objects.create_user(username=f'bench-report-{time.time_ns()}')
+                    sample = synthetic_transactions(size, seed=6)
+                    Transaction.objects.bulk_create([
+                        Transaction(user=user, type='income' if i % 10 == 0 else 'expense',
+                                    amount=row.amount, description=row.description,
+                                    category='salary' if i % 10 == 0 else row.category, date=row.date)
+                        for i, row in enumerate(sample.itertuples())
+                    ], batch_size=5000)
+                    del sample
+
+                    start = time.perf_counter()
+                    pdf = render_pdf(user, options['type'], period, options['appendix_limit'])
+                    elapsed = time.perf_counter() - start
+
+                    # Second render under tracemalloc, which would distort the timing
+                    tracemalloc.start()
+                    render_pdf(user, options['type'], period, options['appendix_limit'])
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    self.stdout.write(f"{size:>8} {elapsed:>9.2f} {peak / 1e6:>8.1f} {len(pdf) / 1024:>8.0f}")
+                    raise Rollback
+            except Rollback:
+                pass
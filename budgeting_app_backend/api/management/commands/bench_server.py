@@ -0,0 +1,183 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+from api.ml.synthetic import synthetic_transactions
+from api.models import Budget, Notification, Transaction
+from api.signals import transactions_bulk_created
+
+# name: (method, WSGI path, ASGI path, JSON body)
+ENDPOINTS = {
+    'dashboard': ('GET', 'dashboard/', 'async/dashboard/', None),
+    'monthly': ('GET', 'transactions/monthly/', 'async/transactions/monthly/', None),
+    'notifications': ('GET', 'notifications/', 'async/notifications/', None),
+    'chatbot': ('POST', 'chatbot/', 'async/chatbot/', {'message': 'how are my budgets doing?'}),
+}
+SERVERS = {
+    # The sync DRF views under gunicorn's default sync workers, as deployed
+    'wsgi': ['budgeting_app_backend.wsgi:application'],
+    # The async views under uvicorn workers
+    'asgi': ['budgeting_app_backend.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server did not start listening on port {port}")
+
+
+def percentile(samples, q):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[q - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests/sec and latency of the dashboard, monthly, notifications and chatbot "
+        "endpoints: the sync views under gunicorn (WSGI) against the async views under "
+        "uvicorn workers (ASGI). Needs gunicorn and uvicorn, and a database both servers "
+        "can reach; a throwaway user is created and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', default='wsgi,asgi', help="Comma separated: wsgi, asgi")
+        parser.add_argument('--base-url', default=None,
+                            help="Load an already running server instead, e.g. http://127.0.0.1:8000/api/ "
+                                 "(use with a single --servers value to pick the paths)")
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=32, help="Simultaneous clients")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds per endpoint")
+        parser.add_argument('--transactions', type=int, default=5000)
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+
+    def handle(self, *args, **options):
+        servers = options['servers'].split(',')
+        unknown = set(servers) - set(SERVERS)
+        if unknown:
+            raise CommandError(f"Unknown server: {', '.join(sorted(unknown))}")
+
+        user = self.seed(options['transactions'])
+        token = str(RefreshToken.for_user(user).access_token)
+        try:
+            self.stdout.write(f"{'server':<6} {'endpoint':<14} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            for server in servers:
+                if options['base_url']:
+                    self.load(server, options['base_url'], token, options)
+                    continue
+                process, base_url = self.start(server, options['workers'])
+                try:
+                    self.load(server, base_url, token, options)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+        finally:
+            user.delete()
+
+    def seed(self, size):
+        user = User.objects.create_user(username=f'bench-server-{time.time_ns()}')
+        sample = synthetic_transactions(size, seed=9)
+        created = Transaction.objects.bulk_create([
+            Transaction(user=user, type='expense', amount=row.amount, description=row.description,
+                        category=row.category, date=row.date)
+            for row in sample.itertuples()
+        ], batch_size=5000)
+        # bulk_create() sends no signals; announce the rows as the importer
+        # does, so the rollups and the ledger the views read are filled in
+        transactions_bulk_created.send(sender=Transaction, transactions=created)
+        Budget.objects.bulk_create([
+            Budget(user=user, category=category, limit=500, period=period)
+            for category, period in zip(sample['category'].unique()[:6], ['weekly', 'monthly', 'yearly'] * 2)
+        ])
+        Notification.objects.bulk_create([
+            Notification(user=user, title=f'Notice {i}', message='Benchmark', notification_type='info')
+            for i in range(50)
+        ])
+        return user
+
+    def start(self, server, workers):
+        port = free_port()
+        command = [
+            sys.executable, '-m', 'gunicorn', *SERVERS[server],
+            '--config', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(workers),
+            '--log-level', 'warning',
+        ]
+        env = {**os.environ, 'ALLOWED_HOSTS': '127.0.0.1'}
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        try:
+            wait_for_port(port)
+        except CommandError:
+            process.kill()
+            raise
+        return process, f'http://127.0.0.1:{port}/api/'
+
+    def load(self, server, base_url, token, options):
+        for name in options['endpoints'].split(','):
+            method, wsgi_path, asgi_path, body = ENDPOINTS[name]
+            url = base_url + (asgi_path if server == 'asgi' else wsgi_path)
+            headers = {
+                'Authorization': f'Bearer {token}',
+                'Content-Type': 'application/json',
+                # Counts as HTTPS behind SECURE_PROXY_SSL_HEADER, so no redirect
+                'X-Forwarded-Proto': 'https',
+            }
+            data = json.dumps(body).encode() if body is not None else None
+            count, latencies, errors = self.hammer(
+                url, method, data, headers, options['duration'], options['concurrency']
+            )
+            self.stdout.write(
+                f"{server:<6} {name:<14} {count / options['duration']:>8.1f} "
+                f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f} {errors:>7}"
+            )
+
+    def hammer(self, url, method, data, headers, duration, concurrency):
+        """Send requests from `concurrency` threads for `duration` seconds"""
+        deadline = time.monotonic() + duration
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+
+        def client():
+            samples, failed = [], 0
+            while time.monotonic() < deadline:
+                request = urllib.request.Request(url, data=data, headers=headers, method=method)
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=30) as response:
+                        response.read()
+                    samples.append((time.perf_counter() - start) * 1000)
+                except (urllib.error.URLError, OSError):
+                    failed += 1
+            with lock:
+                latencies.extend(samples)
+                errors[0] += failed
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(latencies), latencies, errors[0]
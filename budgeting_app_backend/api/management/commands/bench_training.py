@@ -0,0 +1,60 @@
+import multiprocessing
+import resource
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api.ml.model_trainer import FEATURE_MODES
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _fit_mode(mode, rows, results):
+    """Runs in a fresh process so each mode's peak RSS is measured in isolation"""
+    from api.ml.data_preprocessor import FEATURE_COLUMNS, add_features
+    from api.ml.model_trainer import build_pipeline
+    from api.ml.synthetic import synthetic_transactions
+
+    df = add_features(synthetic_transactions(rows, seed=0))
+    X, y = df[FEATURE_COLUMNS], df['category']
+    data_rss = _peak_rss_mb()
+
+    start = time.perf_counter()
+    pipeline = build_pipeline(mode).fit(X, y)
+    fit_time = time.perf_counter() - start
+
+    holdout = add_features(synthetic_transactions(10000, seed=1))
+    accuracy = (pipeline.predict(holdout[FEATURE_COLUMNS]) == holdout['category']).mean()
+    results.put((mode, fit_time, data_rss, _peak_rss_mb(), accuracy))
+
+
+class Command(BaseCommand):
+    help = "Report fit time and peak RSS of each training feature mode on synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--modes', default=','.join(FEATURE_MODES),
+                            help="Comma separated feature modes to compare")
+
+    def handle(self, *args, **options):
+        modes = [mode for mode in options['modes'].split(',') if mode]
+        unknown = set(modes) - set(FEATURE_MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+
+        ctx = multiprocessing.get_context('spawn')
+        self.stdout.write(f"{'mode':<8} {'fit (s)':>9} {'data RSS':>10} {'peak RSS':>10} {'fit RSS':>9} {'acc':>6}")
+        for mode in modes:
+            results = ctx.Queue()
+            process = ctx.Process(target=_fit_mode, args=(mode, options['rows'], results))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                self.stdout.write(self.style.ERROR(f"{mode:<8} failed (exit code {process.exitcode})"))
+                continue
+            mode, fit_time, data_rss, peak_rss, accuracy = results.get()
+            self.stdout.write(
+                f"{mode:<8} {fit_time:9.1f} {data_rss:8.0f}MB {peak_rss:8.0f}MB "
+                f"{peak_rss - data_rss:7.0f}MB {accuracy:6.3f}"
+            )
@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from api.services.ledger import check_ledgers
+
+
+class Command(BaseCommand):
+    help = "Compare the LedgerSummary running totals with the raw transactions, and optionally fix them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only check this username")
+        parser.add_argument('--repair', action='store_true', help="Overwrite mismatched ledgers with the recomputed totals")
+
+    def handle(self, *args, **options):
+        users = None
+        if options['user']:
+            try:
+                users = [User.objects.get(username=options['user'])]
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        mismatches = check_ledgers(users=users, repair=options['repair'])
+        for user_id, stored, expected in mismatches:
+            self.stdout.write(f"user {user_id}: stored {stored}, expected {expected}")
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("All ledgers match their transactions"))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(mismatches)} ledger(s)"))
+        else:
+            raise CommandError(f"{len(mismatches)} ledger(s) out of sync; run with --repair to fix them")
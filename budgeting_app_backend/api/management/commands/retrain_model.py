@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from api.ml.incremental import train_incremental
+from api.ml.model_trainer import train_model
+
+
+class Command(BaseCommand):
+    help = "Retrain the transaction classifier incrementally (default) or from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Refit the configured pipeline on every transaction")
+        parser.add_argument('--rebuild', action='store_true', help="Rebuild the incremental model from the whole table")
+        parser.add_argument('--refresh-snapshot', action='store_true', help="Re-extract the training snapshot (with --full)")
+
+    def handle(self, *args, **options):
+        if options['full']:
+            train_model(refresh_snapshot=options['refresh_snapshot'])
+            self.stdout.write(self.style.SUCCESS("Full refit complete"))
+            return
+
+        model, rows = train_incremental(rebuild=options['rebuild'])
+        if model is None:
+            self.stdout.write(self.style.WARNING("No training data available"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Incremental model updated with {rows} transactions"))
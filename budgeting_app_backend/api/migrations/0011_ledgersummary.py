@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_ledgers(apps, schema_editor):
+    Transaction = apps.get_model('api', 'Transaction')
+    LedgerSummary = apps.get_model('api', 'LedgerSummary')
+    rows = Transaction.objects.values('user_id').annotate(
+        income=Sum('amount', filter=Q(type='income'), default=0),
+        expenses=Sum('amount', filter=Q(type='expense'), default=0),
+        transaction_count=Count('id'),
+    ).order_by()
+    LedgerSummary.objects.bulk_create(
+        (LedgerSummary(balance=row['income'] - row['expenses'], **row) for row in rows.iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_transaction_listing_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transaction_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_ledgers, migrations.RunPython.noop),
+    ]
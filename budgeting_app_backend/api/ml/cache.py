@@ -0,0 +1,111 @@
+#api/ml/cache.py
+import hashlib
+import re
+from bisect import bisect_left
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from ..services.cache_metrics import HitCounter
+from .registry import get_registry
+
+# Upper bounds of the amount buckets; 100 is an edge so every bucket agrees
+# on the model's `has_amount` (> 100) feature
+AMOUNT_BUCKETS = [5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+_whitespace = re.compile(r'\s+')
+
+
+def normalize_description(description):
+    """Case and whitespace insensitive form, matching how TF-IDF tokenizes"""
+    return _whitespace.sub(' ', str(description)).strip().lower()
+
+
+def amount_bucket(amount):
+    return bisect_left(AMOUNT_BUCKETS, abs(float(amount or 0)))
+
+
+class PredictionCache:
+    """
+    Caches classifier outputs in Django's cache framework so repeated
+    descriptions ("Netflix", "Uber", "rent") skip the model entirely and
+    workers share results.
+
+    Entries are keyed by model version, normalized description, amount
+    bucket and weekday; a new model version simply stops matching old keys,
+    which then age out through the cache's TTL / LRU eviction. Hit and miss
+    counters live in the same cache so they aggregate across workers.
+    """
+
+    def __init__(self, alias='default', timeout=86400, prefix='catpred'):
+        self.alias = alias
+        self.timeout = timeout
+        self.prefix = prefix
+        self.counter = HitCounter(alias, prefix)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, version, description, amount, date):
+        digest = hashlib.sha1(normalize_description(description).encode()).hexdigest()
+        return f"{self.prefix}:{version}:{digest}:{amount_bucket(amount)}:{date.weekday()}"
+
+    def stats(self):
+        return self.counter.stats()
+
+    def reset_stats(self):
+        self.counter.reset()
+
+    def predict_many(self, classifier, version, descriptions, amounts=None, dates=None):
+        """
+        Same contract as TransactionClassifier.predict_many; only the rows
+        missing from the cache are sent to the model, in one batch.
+        """
+        count = len(descriptions)
+        amounts = list(amounts) if amounts is not None else [0] * count
+        dates = list(dates) if dates is not None else [timezone.localdate()] * count
+        keys = [self.key(version, *row) for row in zip(descriptions, amounts, dates)]
+
+        cached = self.cache.get_many(set(keys))
+        # First row of every uncached key; repeats within the batch reuse its prediction
+        first_rows = {}
+        for i, key in enumerate(keys):
+            if key not in cached:
+                first_rows.setdefault(key, i)
+        missing = list(first_rows.values())
+        self.counter.record(hits=count - len(missing), misses=len(missing))
+
+        if missing:
+            categories, probabilities = classifier.predict_many(
+                [descriptions[i] for i in missing],
+                [amounts[i] for i in missing],
+                [dates[i] for i in missing],
+            )
+            fresh = {}
+            for i, category, row in zip(missing, categories, probabilities):
+                fresh[keys[i]] = (category, row.astype(np.float32).tolist())
+            self.cache.set_many(fresh, timeout=self.timeout)
+            cached.update(fresh)
+
+        categories = np.array([cached[key][0] for key in keys], dtype=object)
+        probabilities = np.array([cached[key][1] for key in keys], dtype=float)
+        return categories, probabilities
+
+
+prediction_cache = PredictionCache(
+    alias=settings.ML_PREDICTION_CACHE_ALIAS,
+    timeout=settings.CACHE_TTLS['catpred'],
+)
+
+
+def categorize(descriptions, amounts=None, dates=None):
+    """
+    Categorize transactions with the current model through the shared cache.
+    Returns (classes, categories, probabilities).
+    """
+    classifier, version = get_registry().current()
+    categories, probabilities = prediction_cache.predict_many(
+        classifier, version, descriptions, amounts, dates
+    )
+    return classifier.classes, categories, probabilities
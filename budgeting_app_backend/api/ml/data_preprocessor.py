@@ -1,19 +1,115 @@
+import os
+import tempfile
+from itertools import islice
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 from sklearn.preprocessing import FunctionTransformer
 from api.models import Transaction
 
-def create_training_data():
-    transactions = Transaction.objects.all().values(
-        'description', 
-        'amount', 
-        'category',
-        'date'
-    )
-    df = pd.DataFrame(list(transactions))
-    
-    # Advanced feature engineering
-    df['has_amount'] = df['amount'].apply(lambda x: 1 if x > 100 else 0)
+FEATURE_COLUMNS = ['description', 'amount', 'has_amount', 'day_of_week', 'description_length']
+TRAINING_FIELDS = ('description', 'amount', 'category', 'date')
+DEFAULT_CHUNK_SIZE = 20000
+
+def add_features(df):
+    """Derive the model features from description, amount and date columns"""
+    df['amount'] = df['amount'].astype(float)
+    df['has_amount'] = (df['amount'] > 100).astype(int)
     df['day_of_week'] = pd.to_datetime(df['date']).dt.dayofweek
     df['description_length'] = df['description'].str.len()
-    
-    return df[['description', 'amount', 'has_amount', 'day_of_week', 'description_length', 'category']]
\ No newline at end of file
+    return df
+
+def build_features(descriptions, amounts=None, dates=None):
+    """Feature frame for a batch of transactions to be categorized"""
+    today = pd.Timestamp.now().normalize()
+    df = pd.DataFrame({
+        'description': list(descriptions),
+        'amount': list(amounts) if amounts is not None else 0.0,
+        'date': list(dates) if dates is not None else today,
+    })
+    df['description'] = df['description'].fillna('').astype(str)
+    df['amount'] = pd.to_numeric(df['amount'], errors='coerce').fillna(0.0)
+    return add_features(df)[FEATURE_COLUMNS]
+
+def _chunk_frame(rows):
+    """Typed feature columns for one chunk of (description, amount, category, date) rows"""
+    descriptions, amounts, categories, dates = zip(*rows)
+    description = pd.Series(descriptions, dtype=object)
+    amount = np.array(amounts, dtype=np.float32)
+    return pd.DataFrame({
+        'description': description,
+        'amount': amount,
+        'has_amount': (amount > 100).astype(np.int8),
+        'day_of_week': pd.DatetimeIndex(dates).dayofweek.to_numpy(dtype=np.int8),
+        'description_length': description.str.len().to_numpy(dtype=np.int16),
+        'category': pd.Categorical(categories),
+    })
+
+def iter_training_chunks(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream transactions from the database in chunks (a server-side cursor
+    where the backend supports one) and yield a typed DataFrame per chunk,
+    so Python row objects for the whole table never exist at once.
+    """
+    if queryset is None:
+        queryset = Transaction.objects.all()
+    rows = queryset.order_by().values_list(*TRAINING_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield _chunk_frame(chunk)
+
+def _empty_training_frame():
+    return pd.DataFrame({
+        'description': pd.Series(dtype=object),
+        'amount': pd.Series(dtype=np.float32),
+        'has_amount': pd.Series(dtype=np.int8),
+        'day_of_week': pd.Series(dtype=np.int8),
+        'description_length': pd.Series(dtype=np.int16),
+        'category': pd.Categorical([]),
+    })
+
+def write_snapshot(df, path):
+    """Write the training frame to Parquet, replacing any previous snapshot atomically"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.parquet.tmp')
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def create_training_data(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE, snapshot_path=None):
+    """
+    Training frame with float32 amount, int8 weekday/has_amount and a
+    categorical category column, built chunk by chunk. When `snapshot_path`
+    is given the result is also written there as Parquet for reuse by
+    load_training_data().
+    """
+    chunks = list(iter_training_chunks(queryset, chunk_size))
+    if not chunks:
+        df = _empty_training_frame()
+    else:
+        categories = union_categoricals([chunk['category'] for chunk in chunks])
+        for chunk in chunks:
+            chunk['category'] = pd.Categorical(chunk['category'], categories=categories.categories)
+        df = pd.concat(chunks, ignore_index=True)
+        del chunks
+
+    if snapshot_path:
+        write_snapshot(df, snapshot_path)
+    return df[FEATURE_COLUMNS + ['category']]
+
+def load_training_data(snapshot_path=None, refresh=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Training frame from the Parquet snapshot at `snapshot_path` if it exists,
+    otherwise (or with refresh=True) extracted from the database and written
+    to the snapshot.
+    """
+    if snapshot_path and not refresh and os.path.exists(snapshot_path):
+        return pd.read_parquet(snapshot_path)[FEATURE_COLUMNS + ['category']]
+    return create_training_data(chunk_size=chunk_size, snapshot_path=snapshot_path)
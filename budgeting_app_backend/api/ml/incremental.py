@@ -0,0 +1,104 @@
+#api/ml/incremental.py
+import logging
+import os
+from django.conf import settings
+from django.db.models import Max, Q
+from api.models import Transaction
+from .data_preprocessor import FEATURE_COLUMNS, iter_training_chunks
+from .model_trainer import build_incremental_pipeline
+from .registry import read_training_state, save_model, write_training_state
+
+logger = logging.getLogger(__name__)
+
+INCREMENTAL_MODE = 'incremental'
+
+
+def known_categories():
+    """Every category a transaction can have, plus any legacy values in the table"""
+    categories = {value for value, _ in Transaction.EXPENSE_CATEGORIES + Transaction.INCOME_CATEGORIES}
+    categories.update(Transaction.objects.order_by().values_list('category', flat=True).distinct())
+    return sorted(categories)
+
+
+def train_incremental(model_path=None, chunk_size=None, rebuild=False):
+    """
+    Update the served model with transactions added since the last run.
+
+    The sidecar state next to the model stores the highest Transaction id
+    already consumed; only rows above it are read and fed to partial_fit,
+    so a run costs O(new rows). Ids are handed out before commit, so a row
+    can become visible after a run consumed higher ids: each run also
+    re-checks the ML_INCREMENTAL_ID_MARGIN ids below the mark, and the
+    state lists the ids consumed within that margin so none is fed twice.
+    The first run (or a run after a full refit, or one that meets a
+    category the model has no output for) rebuilds the incremental model
+    from the whole table.
+
+    Returns (pipeline, rows_consumed); the pipeline is None when there is
+    no data at all. Edits to already-consumed transactions are not seen
+    until the next rebuild or full refit.
+    """
+    model_path = str(model_path or settings.ML_MODEL_PATH)
+    chunk_size = chunk_size or settings.ML_TRAINING_CHUNK_SIZE
+    margin = settings.ML_INCREMENTAL_ID_MARGIN
+    state = read_training_state(model_path)
+
+    pipeline = None
+    since, consumed = 0, set()
+    if not rebuild and state.get('mode') == INCREMENTAL_MODE and os.path.exists(model_path):
+        import joblib
+        # Plain load (no mmap) so partial_fit can update the weights in place
+        pipeline = joblib.load(model_path)
+        since = state.get('high_water_mark', 0)
+        consumed = set(state.get('recent_ids', ()))
+    resumed = pipeline is not None
+
+    # Fix the upper bound first so rows committed during the run are left for the next one
+    newest = max(Transaction.objects.aggregate(newest=Max('id'))['newest'] or 0, since)
+    ids = Transaction.objects.order_by().values_list('id', flat=True)
+    # Rows below the mark that were not visible to the last run
+    late = set(ids.filter(id__gt=since - margin, id__lte=since)) - consumed
+    # New rows inside the next run's margin are listed, so the state can
+    # record exactly these; the ones below it are read by range
+    bulk_top = max(since, newest - margin)
+    top = set(ids.filter(id__gt=bulk_top, id__lte=newest))
+    if not late and not top and bulk_top == since:
+        logger.info("No new transactions since id %s", since)
+        return pipeline, 0
+
+    if pipeline is None:
+        classes = known_categories()
+    else:
+        classes = list(pipeline.named_steps['classifier'].classes_)
+
+    rows = 0
+    queryset = Transaction.objects.filter(Q(id__gt=since, id__lte=bulk_top) | Q(id__in=late | top))
+    for chunk in iter_training_chunks(queryset, chunk_size):
+        unseen = set(chunk['category'].unique()) - set(classes)
+        if unseen:
+            logger.warning("New categories %s; rebuilding the incremental model", sorted(unseen))
+            return train_incremental(model_path, chunk_size, rebuild=True)
+
+        X = chunk[FEATURE_COLUMNS]
+        if pipeline is None:
+            pipeline = build_incremental_pipeline()
+            pipeline.named_steps['preprocessor'].fit(X)
+        pipeline.named_steps['classifier'].partial_fit(
+            pipeline.named_steps['preprocessor'].transform(X),
+            chunk['category'].astype(str).to_numpy(),
+            classes=classes
+        )
+        rows += len(chunk)
+
+    if pipeline is None:
+        return None, 0
+
+    save_model(pipeline, model_path)
+    write_training_state({
+        'mode': INCREMENTAL_MODE,
+        'high_water_mark': newest,
+        'recent_ids': sorted(pk for pk in consumed | late | top if pk > newest - margin),
+        'rows_seen': (state.get('rows_seen', 0) if resumed else 0) + rows,
+    }, model_path)
+    logger.info("Incremental training consumed %s rows (%s late, up to id %s)", rows, len(late), newest)
+    return pipeline, rows
@@ -2,8 +2,10 @@
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import HistGradientBoostingClassifier
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import FunctionTransformer
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
 import mlflow
 import joblib
 import os
@@ -15,7 +17,9 @@ from scipy.sparse import issparse
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'budgeting_app_backend.settings')
 django.setup()
 
-from .data_preprocessor import create_training_data
+from django.conf import settings
+from .data_preprocessor import load_training_data
+from .registry import save_model, write_training_state
 
 def to_dense(X):
     """Convert sparse matrix to dense if needed"""
@@ -27,56 +31,140 @@ def numeric_to_array(X):
     """Convert numeric DataFrame to numpy array"""
     return X.values
 
-def train_model():
-    df = create_training_data()
-    
-    if len(df) == 0:
-        raise ValueError("No training data available")
-    
-    # Separate features
-    text_features = ['description']
+FEATURE_MODES = ('dense', 'svd', 'sparse', 'hashing')
+
+def _hgb_pipeline(text_transformer):
+    """Numeric features first so day_of_week keeps a fixed column index"""
     numeric_features = ['amount', 'has_amount', 'day_of_week']
     
-    # Create transformers
-    text_transformer = Pipeline([
-        ('tfidf', TfidfVectorizer(
-            ngram_range=(1, 2),
-            max_features=500,
-            stop_words='english'
-        )),
-        ('to_dense', FunctionTransformer(to_dense))
-    ])
-    
     numeric_transformer = Pipeline([
         ('to_array', FunctionTransformer(numeric_to_array))
     ])
     
     # Combine features
     preprocessor = ColumnTransformer([
-        ('text', text_transformer, 'description'),
-        ('numeric', numeric_transformer, numeric_features)
+        ('numeric', numeric_transformer, numeric_features),
+        ('text', text_transformer, 'description')
     ])
     
     # Final pipeline
-    pipeline = Pipeline([
+    return Pipeline([
         ('preprocessor', preprocessor),
         ('classifier', HistGradientBoostingClassifier(
             max_iter=100,
-            categorical_features=[len(numeric_features)-1]  # Only day_of_week is categorical
+            categorical_features=[numeric_features.index('day_of_week')]  # Only day_of_week is categorical
         ))
     ])
+
+def _linear_pipeline(text_transformer):
+    """Sparse end-to-end: text and numeric blocks are stacked as a CSR matrix"""
+    preprocessor = ColumnTransformer([
+        ('text', text_transformer, 'description'),
+        ('amount', FunctionTransformer(np.log1p), ['amount']),
+        ('has_amount', 'passthrough', ['has_amount']),
+        ('day_of_week', OneHotEncoder(handle_unknown='ignore'), ['day_of_week'])
+    ], sparse_threshold=1.0)
+    
+    return Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', SGDClassifier(loss='log_loss', alpha=1e-5, max_iter=20, tol=1e-3, random_state=0))
+    ])
+
+def build_incremental_pipeline():
+    """
+    Pipeline for incremental retraining. Every feature step is stateless
+    (hashed text, fixed weekday categories) so the preprocessor fitted on
+    the first batch stays valid, and the classifier supports partial_fit.
+    """
+    preprocessor = ColumnTransformer([
+        ('text', HashingVectorizer(
+            ngram_range=(1, 2),
+            n_features=2 ** 18,
+            alternate_sign=False,
+            stop_words='english'
+        ), 'description'),
+        ('amount', FunctionTransformer(np.log1p), ['amount']),
+        ('has_amount', 'passthrough', ['has_amount']),
+        ('day_of_week', OneHotEncoder(categories=[list(range(7))], handle_unknown='ignore'), ['day_of_week'])
+    ], sparse_threshold=1.0)
+    
+    return Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', SGDClassifier(loss='log_loss', alpha=1e-5, random_state=0))
+    ])
+
+def build_pipeline(mode=None):
+    """
+    Untrained categorization pipeline. `mode` (default settings.ML_FEATURE_MODE)
+    selects how the description text is featurized:
+    
+    - dense:   TF-IDF densified for HistGradientBoosting (memory grows N x 500)
+    - svd:     TF-IDF reduced with TruncatedSVD to a compact dense block for HistGradientBoosting
+    - sparse:  TF-IDF kept sparse with a sparse-capable linear classifier
+    - hashing: stateless HashingVectorizer + TF-IDF weighting, sparse linear classifier
+    """
+    mode = mode or settings.ML_FEATURE_MODE
+    tfidf = TfidfVectorizer(
+        ngram_range=(1, 2),
+        max_features=500,
+        stop_words='english'
+    )
+    
+    if mode == 'dense':
+        return _hgb_pipeline(Pipeline([
+            ('tfidf', tfidf),
+            ('to_dense', FunctionTransformer(to_dense))
+        ]))
+    if mode == 'svd':
+        return _hgb_pipeline(Pipeline([
+            ('tfidf', tfidf),
+            ('svd', TruncatedSVD(n_components=settings.ML_SVD_COMPONENTS, random_state=0))
+        ]))
+    if mode == 'sparse':
+        return _linear_pipeline(tfidf)
+    if mode == 'hashing':
+        return _linear_pipeline(Pipeline([
+            ('hashing', HashingVectorizer(
+                ngram_range=(1, 2),
+                n_features=2 ** 18,
+                alternate_sign=False,
+                stop_words='english'
+            )),
+            ('tfidf', TfidfTransformer())
+        ]))
+    raise ValueError(f"Unknown feature mode '{mode}', expected one of {', '.join(FEATURE_MODES)}")
+
+def train_model(mode=None, snapshot_path=None, refresh_snapshot=False):
+    """
+    Fit and save a new model. With a snapshot path (argument or
+    ML_TRAINING_SNAPSHOT_PATH) the training data is read from that Parquet
+    snapshot, written on first use or when refresh_snapshot is set, instead
+    of re-querying the database.
+    """
+    df = load_training_data(
+        snapshot_path or settings.ML_TRAINING_SNAPSHOT_PATH,
+        refresh=refresh_snapshot,
+        chunk_size=settings.ML_TRAINING_CHUNK_SIZE
+    )
+    
+    if len(df) == 0:
+        raise ValueError("No training data available")
+    
+    mode = mode or settings.ML_FEATURE_MODE
+    pipeline = build_pipeline(mode)
     
     X = df.drop('category', axis=1)
     y = df['category']
     
-    with mlflow.start_run():
+    with mlflow.start_run(nested=mlflow.active_run() is not None):
+        mlflow.log_param("feature_mode", mode)
         pipeline.fit(X, y)
         
-        # Save model
-        model_dir = os.path.join(os.path.dirname(__file__), 'models')
-        os.makedirs(model_dir, exist_ok=True)
-        model_path = os.path.join(model_dir, 'transaction_classifier_v1.joblib')
-        joblib.dump(pipeline, model_path)
+        # Save model atomically; serving registries pick it up on their next check
+        model_path = save_model(pipeline)
+        # A full refit replaces any incremental model, so the next
+        # incremental run has to start over from the whole history
+        write_training_state({'mode': mode}, model_path)
         
         print(f"Model saved to: {model_path}")
         return pipeline
\ No newline at end of file
@@ -1,18 +1,25 @@
 #api/ml/predictor.py
 import joblib
 from django.conf import settings
+from .data_preprocessor import build_features
 
 class TransactionClassifier:
-    def __init__(self):
-        model_path = settings.BASE_DIR / "api/ml/models/transaction_classifier_v1.joblib"
-        self.model = joblib.load(model_path)
+    def __init__(self, model=None):
+        if model is None:
+            model = joblib.load(settings.ML_MODEL_PATH)
+        self.model = model
         self.classes = self.model.named_steps['classifier'].classes_
     
     def predict(self, description, amount, date):
-        features = {
-            'description': description,
-            'amount': float(amount),
-            'has_amount': 1 if float(amount) > 100 else 0,
-            'day_of_week': date.weekday()  # Monday=0, Sunday=6
-        }
-        return self.model.predict([features])[0], self.model.predict_proba([features])[0]
\ No newline at end of file
+        categories, probabilities = self.predict_many([description], [amount], [date])
+        return categories[0], probabilities[0]
+    
+    def predict_many(self, descriptions, amounts=None, dates=None):
+        """
+        Categorize a batch of transactions with a single predict_proba pass.
+        Labels are the argmax of the probabilities, so the pipeline is not
+        run a second time for predict().
+        """
+        features = build_features(descriptions, amounts, dates)
+        probabilities = self.model.predict_proba(features)
+        return self.classes[probabilities.argmax(axis=1)], probabilities
@@ -0,0 +1,164 @@
+#api/ml/registry.py
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ModelUnavailable(Exception):
+    """Raised when no trained model file exists to serve predictions"""
+
+
+class ModelRegistry:
+    """
+    Lazily loads the transaction classifier on first use and hot-swaps it
+    when the model file changes on disk.
+
+    The file is stat'ed at most once every `check_interval` seconds; a new
+    (mtime, size) triggers a reload outside the request path of other
+    threads, which keep using the old model until the new one is bound.
+    Loading with `mmap_mode='r'` memory-maps the model's numpy arrays so
+    forked workers share the same physical pages.
+    """
+
+    def __init__(self, path, mmap_mode=None, check_interval=30):
+        self.path = str(path)
+        self.mmap_mode = mmap_mode
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # (classifier, stat) replaced as a unit so the two never disagree
+        self._current = (None, None)
+        self._next_check = 0.0
+
+    @staticmethod
+    def _version(stat):
+        if stat is None:
+            return None
+        mtime_ns, size = stat
+        return f"{mtime_ns:x}-{size:x}"
+
+    @property
+    def version(self):
+        """Identifier of the loaded model file, None until loaded"""
+        return self._version(self._current[1])
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, stat):
+        import joblib
+        from .predictor import TransactionClassifier
+
+        model = joblib.load(self.path, mmap_mode=self.mmap_mode)
+        classifier = TransactionClassifier(model=model)
+        # Rebinding is atomic: readers see either the old or the new model
+        self._current = (classifier, stat)
+        logger.info("Loaded transaction classifier %s (version %s)", self.path, self.version)
+
+    def current(self):
+        """
+        Return (classifier, version) for the current model, loading or
+        reloading it if needed.
+        """
+        classifier, stat = self._current
+        if classifier is not None and time.monotonic() < self._next_check:
+            return classifier, self._version(stat)
+
+        with self._lock:
+            classifier, stat = self._current
+            if classifier is None or time.monotonic() >= self._next_check:
+                self._next_check = time.monotonic() + self.check_interval
+                new_stat = self._file_stat()
+                if new_stat is None:
+                    if classifier is None:
+                        raise ModelUnavailable(f"No trained model at {self.path}")
+                    logger.warning("Model file %s disappeared; keeping version %s", self.path, self.version)
+                elif new_stat != stat:
+                    self._load(new_stat)
+            classifier, stat = self._current
+            return classifier, self._version(stat)
+
+    def get(self):
+        """Return the current TransactionClassifier"""
+        return self.current()[0]
+
+    def preload(self):
+        """Load the model eagerly (e.g. in the gunicorn master before forking)"""
+        try:
+            self.get()
+        except ModelUnavailable as e:
+            logger.warning("Classifier not preloaded: %s", e)
+
+
+def save_model(model, path=None):
+    """
+    Persist a trained pipeline atomically: write to a temporary file in the
+    same directory and rename it over the live file, so registries never
+    observe a half-written model.
+    """
+    import joblib
+
+    path = str(path or settings.ML_MODEL_PATH)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.joblib.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            joblib.dump(model, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def training_state_path(model_path=None):
+    """Sidecar JSON next to the model recording how it was trained"""
+    return f"{model_path or settings.ML_MODEL_PATH}.state.json"
+
+def read_training_state(model_path=None):
+    try:
+        with open(training_state_path(model_path)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def write_training_state(state, model_path=None):
+    """Replace the sidecar atomically, like save_model does for the model itself"""
+    path = training_state_path(model_path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.json.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(
+                    settings.ML_MODEL_PATH,
+                    mmap_mode=settings.ML_MODEL_MMAP_MODE,
+                    check_interval=settings.ML_MODEL_RELOAD_INTERVAL,
+                )
+    return _registry
+
+def get_classifier():
+    return get_registry().get()
@@ -0,0 +1,48 @@
+#api/ml/synthetic.py
+import numpy as np
+import pandas as pd
+
+# (description, category, typical amount) for a skewed set of merchants
+MERCHANTS = [
+    ('netflix subscription', 'entertainment', 15),
+    ('uber ride', 'transportation', 22),
+    ('monthly rent', 'housing', 1200),
+    ('grocery store', 'food', 85),
+    ('starbucks coffee', 'food', 6),
+    ('electricity bill', 'utilities', 110),
+    ('water bill', 'utilities', 40),
+    ('pharmacy', 'health', 30),
+    ('gym membership', 'health', 50),
+    ('online course', 'education', 200),
+    ('textbooks', 'education', 120),
+    ('cinema tickets', 'entertainment', 25),
+    ('bus pass', 'transportation', 60),
+    ('restaurant dinner', 'food', 70),
+    ('spotify premium', 'entertainment', 10),
+    ('gas station', 'transportation', 45),
+]
+
+def synthetic_transactions(n, seed=0, zipf=1.3):
+    """
+    Random expense transactions whose descriptions follow a Zipf-like
+    distribution over MERCHANTS, for benchmarks and tests.
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(MERCHANTS) + 1) ** zipf
+    picks = rng.choice(len(MERCHANTS), size=n, p=weights / weights.sum())
+    descriptions = np.array([m[0] for m in MERCHANTS], dtype=object)
+    categories = np.array([m[1] for m in MERCHANTS], dtype=object)
+    typical = np.array([m[2] for m in MERCHANTS], dtype=float)
+
+    # Occasional store number suffix so not every description is identical
+    suffix = rng.integers(0, 50, size=n)
+    noisy = rng.random(n) < 0.3
+    text = descriptions[picks].copy()
+    text[noisy] = text[noisy] + ' #' + suffix[noisy].astype(str)
+
+    return pd.DataFrame({
+        'description': text,
+        'amount': np.round(typical[picks] * rng.lognormal(0, 0.25, size=n), 2),
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, size=n), unit='D'),
+        'category': categories[picks],
+    })
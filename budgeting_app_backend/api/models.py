@@ -34,9 +34,29 @@ class Transaction(models.Model):
     category = models.CharField(max_length=20)
     date = models.DateField(default=timezone.now)
 
+    # Fields whose previous values the rollup signals need on update/delete
+    TRACKED_FIELDS = ('user_id', 'type', 'amount', 'category', 'date')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'type', 'date'], name='txn_user_type_date_idx'),
+            models.Index(fields=['user', 'type', 'category', 'date'], name='txn_user_type_cat_date_idx'),
+            # Keyset pagination order of the transaction listing
+            models.Index(fields=['user', '-date', '-id'], name='txn_user_date_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.type} - {self.amount} - {self.description[:20]}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(name in instance.__dict__ for name in cls.TRACKED_FIELDS):
+            instance._loaded_values = {
+                name: getattr(instance, name) for name in cls.TRACKED_FIELDS
+            }
+        return instance
+    
     def get_category_choices(self):
         return self.INCOME_CATEGORIES if self.type == 'income' else self.EXPENSE_CATEGORIES
 
@@ -61,6 +81,30 @@ class Notification(models.Model):
     notification_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set by the notification rules ("bills:2024-W18", "budget:7:2024-05-01:80")
+    # so re-evaluating a rule can never notify a user twice
+    dedupe_key = models.CharField(max_length=100, null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'dedupe_key'], name='unique_notification_dedupe_key'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='notif_user_created_idx'),
+            # Partial index so `is_read=False` (compiled to `NOT is_read`)
+            # can be served in created_at order on SQLite as well as Postgres
+            models.Index(
+                fields=['user', 'created_at'],
+                condition=models.Q(is_read=False),
+                name='notif_user_unread_created_idx'
+            ),
+            # Lets the retention job find old read rows across all users
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(is_read=True),
+                name='notif_read_created_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
@@ -81,6 +125,49 @@ class Budget(models.Model):
         return f"{self.user.username}'s {self.period} {self.category} budget"
 
 
+class MonthlyRollup(models.Model):
+    """
+    Per-user monthly totals by transaction type and category.
+    Kept in sync incrementally by the Transaction signals and rebuilt
+    from scratch with the `rebuild_rollups` management command.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+    category = models.CharField(max_length=20)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'year', 'month', 'type', 'category'],
+                name='unique_monthly_rollup'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.year}-{self.month:02d} {self.type}/{self.category}: {self.total}"
+
+
+class LedgerSummary(models.Model):
+    """
+    Running all-time income, expense and balance totals of a user, so the
+    balance is a primary-key lookup instead of a sum over every transaction.
+    Kept in sync with F() updates by the Transaction signals and checked or
+    repaired with the `check_ledger` management command.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='ledger')
+    income = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} ledger: {self.income} in, {self.expenses} out"
+
+
 class Comment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     transaction = models.ForeignKey('Transaction', on_delete=models.CASCADE)
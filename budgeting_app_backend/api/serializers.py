@@ -2,10 +2,11 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import Transaction, Comment, SavingsGoal, Notification
-from django.db.models import Sum
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 from .models import Budget
+from .services.budgets import budget_statuses
+from .services.reports import default_period
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,7 +17,19 @@ class UserSerializer(serializers.ModelSerializer):
             'username': {'read_only': True}
         }
 
-class TransactionSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Lets a ModelSerializer be created with a `fields` argument that
+    restricts the output to a subset of its declared fields.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+class TransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     date = serializers.DateField(required=False, default=timezone.now)
     
     class Meta:
@@ -46,6 +59,68 @@ class TransactionSerializer(serializers.ModelSerializer):
         
         return data
 
+class TransactionFilterSerializer(serializers.Serializer):
+    """Validates the query parameters accepted by the transaction listing"""
+    type = serializers.ChoiceField(choices=Transaction.TYPE_CHOICES, required=False)
+    category = serializers.CharField(required=False, help_text="Comma separated list of categories")
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    min_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    search = serializers.CharField(required=False, max_length=255)
+    fields = serializers.CharField(required=False, help_text="Comma separated list of fields to return")
+    
+    def validate_category(self, value):
+        return [category for category in value.split(',') if category]
+    
+    def validate_fields(self, value):
+        fields = [field for field in value.split(',') if field]
+        unknown = set(fields) - set(TransactionSerializer.Meta.fields)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return fields
+    
+    def validate(self, data):
+        if 'date_from' in data and 'date_to' in data and data['date_from'] > data['date_to']:
+            raise serializers.ValidationError("date_from must not be after date_to")
+        if 'min_amount' in data and 'max_amount' in data and data['min_amount'] > data['max_amount']:
+            raise serializers.ValidationError("min_amount must not be greater than max_amount")
+        return data
+
+class TransactionExportSerializer(TransactionFilterSerializer):
+    """Listing filters plus the export options (`format` is reserved by DRF)"""
+    output = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+    compress = serializers.ChoiceField(choices=['gzip'], required=False)
+
+class ReportRequestSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=['monthly', 'yearly', 'all'], default='monthly')
+    period = serializers.CharField(required=False, help_text="YYYY-MM for monthly, YYYY for yearly reports")
+    
+    def validate(self, data):
+        report_type = data['type']
+        period = data.get('period')
+        if report_type == 'all' or not period:
+            data['period'] = default_period(report_type)
+            return data
+        period_format = '%Y-%m' if report_type == 'monthly' else '%Y'
+        try:
+            # Normalized so '2024-3' and '2024-03' share one cached report
+            data['period'] = datetime.strptime(period, period_format).strftime(period_format)
+        except ValueError:
+            expected = 'YYYY-MM' if report_type == 'monthly' else 'YYYY'
+            raise serializers.ValidationError({'period': f"Expected {expected} for a {report_type} report"})
+        return data
+
+class CategorizeItemSerializer(serializers.Serializer):
+    description = serializers.CharField(max_length=255)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, default=0)
+    date = serializers.DateField(required=False, default=timezone.localdate)
+
+class CategorizeBatchSerializer(serializers.Serializer):
+    MAX_BATCH_SIZE = 1000
+    
+    transactions = CategorizeItemSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_SIZE)
+
 class SavingsGoalSerializer(serializers.ModelSerializer):
     progress = serializers.SerializerMethodField()
     
@@ -68,6 +143,19 @@ class NotificationSerializer(serializers.ModelSerializer):
     def get_formatted_date(self, obj):
         return obj.created_at.strftime("%b %d, %Y %I:%M %p")
 
+class NotificationMarkReadSerializer(serializers.Serializer):
+    MAX_IDS = 1000
+    
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_IDS, required=False
+    )
+    all = serializers.BooleanField(default=False)
+    
+    def validate(self, data):
+        if data['all'] == ('ids' in data):
+            raise serializers.ValidationError("Send either a list of 'ids' or \"all\": true")
+        return data
+
 class BudgetSerializer(serializers.ModelSerializer):
     spent = serializers.SerializerMethodField()
     progress = serializers.SerializerMethodField()
@@ -79,27 +167,19 @@ class BudgetSerializer(serializers.ModelSerializer):
             'user': {'read_only': True}
         }
     
+    def get_status(self, obj):
+        # BudgetView passes the statuses of all the user's budgets, read in
+        # one grouped query per period; a single budget computes its own
+        statuses = self.context.setdefault('budget_status', {})
+        if obj.id not in statuses:
+            statuses.update(budget_statuses(obj.user_id, [obj]))
+        return statuses[obj.id]
+    
     def get_spent(self, obj):
-        # Calculate how much has been spent in this budget category
-        expenses = Transaction.objects.filter(
-            user=obj.user,
-            type='expense',
-            category=obj.category
-        )
-        if obj.period == 'weekly':
-            expenses = expenses.filter(date__week=timezone.now().isocalendar()[1])
-        elif obj.period == 'monthly':
-            expenses = expenses.filter(date__month=timezone.now().month)
-        elif obj.period == 'yearly':
-            expenses = expenses.filter(date__year=timezone.now().year)
-        
-        return expenses.aggregate(Sum('amount'))['amount__sum'] or 0
+        return self.get_status(obj)['spent']
     
     def get_progress(self, obj):
-        spent = self.get_spent(obj)
-        if obj.limit == 0:
-            return 0
-        return (spent / obj.limit) * 100
+        return self.get_status(obj)['progress']
     
     def create(self, validated_data):
         # Automatically set the user from the request
@@ -0,0 +1,77 @@
+"""
+Everything the dashboard loads on mount, in one response: what /dashboard/,
+/user/, /notifications/, /notifications/unread-count/, /budgets/ and
+/transactions/monthly/ return, built from one shared set of queries.
+"""
+import hashlib
+import json
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+from ..models import Budget, Notification
+from ..pagination import KeysetPagination
+from .budgets import budget_statuses
+from .dashboard import DASHBOARD_NOTIFICATIONS, dashboard_payload
+from .summary import get_summary
+from .versions import get_data_version
+
+
+def notification_marker(user):
+    """
+    One aggregate that changes whenever the user's notification list or
+    unread count does: a new row raises the max id, marking rows read
+    lowers `unread`, pruning lowers `total`.
+    """
+    return Notification.objects.filter(user=user).aggregate(
+        total=Count('id'),
+        unread=Count('id', filter=Q(is_read=False)),
+        latest=Max('id'),
+    )
+
+
+def bootstrap_etag(user, user_data, marker, today, query):
+    """
+    Validator for the bootstrap payload, computed without building it.
+    Transactions, budgets and the savings goal are covered by the user's
+    data version, the summary's day-based figures by `today`.
+    """
+    parts = [get_data_version(user.id), today.isoformat(), marker, user_data, sorted(query.items())]
+    raw = json.dumps(parts, cls=JSONEncoder, sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def build_bootstrap(request, user_data, marker, today):
+    from ..serializers import BudgetSerializer, NotificationSerializer
+
+    user = request.user
+    summary = get_summary(user, today)
+
+    paginator = KeysetPagination(ordering_field='created_at')
+    page = paginator.paginate_queryset(Notification.objects.filter(user=user), request)
+    feed = NotificationSerializer(page, many=True).data
+    # The feed continues at /notifications/, not here
+    feed_url = request.build_absolute_uri(reverse('notifications'))
+    if paginator.page_size_query_param in request.query_params:
+        feed_url = replace_query_param(feed_url, paginator.page_size_query_param, paginator.get_page_size(request))
+
+    # The dashboard's newest unread notifications are usually on the feed's
+    # first page already; only query for them when the page cannot tell
+    unread = [row for row in feed if not row['is_read']][:DASHBOARD_NOTIFICATIONS]
+    if len(unread) < min(DASHBOARD_NOTIFICATIONS, marker['unread']):
+        unread = NotificationSerializer(
+            Notification.objects.filter(user=user, is_read=False).order_by('-created_at')[:DASHBOARD_NOTIFICATIONS],
+            many=True
+        ).data
+
+    budgets = list(Budget.objects.filter(user=user))
+    context = {'request': request, 'budget_status': budget_statuses(user, budgets, today)}
+
+    return {
+        'dashboard': dashboard_payload(summary, unread),
+        'user': user_data,
+        'notifications': {'next': paginator.get_next_link(feed_url), 'results': feed},
+        'unread_count': marker['unread'],
+        'budgets': BudgetSerializer(budgets, many=True, context=context).data,
+        'monthly': summary['monthly'],
+    }
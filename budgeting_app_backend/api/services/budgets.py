@@ -0,0 +1,83 @@
+import asyncio
+from collections import defaultdict
+from django.db.models import Sum
+from django.utils import timezone
+from ..models import Budget, Transaction
+from .periods import period_bounds
+
+
+def _spent_queries(user, budgets, today):
+    """(period, grouped spend query) for each distinct budget period"""
+    today = today or timezone.localdate()
+    categories = defaultdict(set)
+    for budget in budgets:
+        categories[budget.period].add(budget.category)
+
+    for period, period_categories in categories.items():
+        start, end = period_bounds(period, today)
+        yield period, Transaction.objects.filter(
+            user=user,
+            type='expense',
+            category__in=period_categories,
+            date__gte=start,
+            date__lte=end
+        ).values_list('category').annotate(total=Sum('amount')).order_by()
+
+
+def spent_by_budget(user, budgets, today=None):
+    """
+    Spend for every budget of a user, keyed by (period, category).
+    Issues one grouped query per distinct budget period instead of one
+    aggregate per budget.
+    """
+    spent = {}
+    for period, rows in _spent_queries(user, budgets, today):
+        for category, total in rows:
+            spent[(period, category)] = total
+    return spent
+
+
+async def aspent_by_budget(user, budgets, today=None):
+    """spent_by_budget with the per-period queries awaited together"""
+    async def fetch(period, rows):
+        return {(period, category): total async for category, total in rows}
+
+    spent = {}
+    for rows in await asyncio.gather(*(fetch(*query) for query in _spent_queries(user, budgets, today))):
+        spent.update(rows)
+    return spent
+
+
+def budget_status(budget, spent):
+    """Spent, remaining and percentage used of one budget"""
+    spent = spent or 0
+    return {
+        'spent': spent,
+        'remaining': budget.limit - spent,
+        'progress': (spent / budget.limit) * 100 if budget.limit else 0,
+    }
+
+
+def _statuses(budgets, spent):
+    return {
+        budget.id: budget_status(budget, spent.get((budget.period, budget.category)))
+        for budget in budgets
+    }
+
+
+def budget_statuses(user, budgets=None, today=None):
+    """
+    Status of each of a user's budgets over its own period (week, month or
+    year containing `today`), keyed by budget id. Pass `budgets` when they
+    are already loaded; spend is read with one grouped query per period.
+    """
+    if budgets is None:
+        budgets = Budget.objects.filter(user=user)
+    budgets = list(budgets)
+    return _statuses(budgets, spent_by_budget(user, budgets, today))
+
+
+async def abudget_statuses(user, budgets=None, today=None):
+    if budgets is None:
+        budgets = [budget async for budget in Budget.objects.filter(user=user)]
+    return _statuses(budgets, await aspent_by_budget(user, budgets, today))
@@ -0,0 +1,46 @@
+from django.core.cache import caches
+
+
+class HitCounter:
+    """
+    Hit/miss counters stored in a Django cache, so they aggregate across
+    worker processes when the cache is shared. Keys live in the 'stats'
+    namespace, which a two-tier cache never holds locally.
+    """
+
+    def __init__(self, alias, prefix):
+        self.alias = alias
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, name):
+        return f"stats:{self.prefix}:{name}"
+
+    def _count(self, name, delta):
+        if not delta:
+            return
+        key = self._key(name)
+        try:
+            self.cache.incr(key, delta)
+        except ValueError:
+            # First use (or evicted); another worker may race us to it
+            if not self.cache.add(key, delta, timeout=None):
+                self.cache.incr(key, delta)
+
+    def record(self, hits=0, misses=0):
+        self._count('hits', hits)
+        self._count('misses', misses)
+
+    def stats(self):
+        keys = [self._key('hits'), self._key('misses')]
+        values = self.cache.get_many(keys)
+        hits = values.get(keys[0], 0)
+        misses = values.get(keys[1], 0)
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+    def reset(self):
+        self.cache.delete_many([self._key('hits'), self._key('misses')])
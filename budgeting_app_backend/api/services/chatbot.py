@@ -0,0 +1,172 @@
+import re
+from datetime import date
+from decimal import Decimal
+from ..models import Budget
+from .budgets import abudget_statuses, budget_statuses
+from .summary import aget_summary, get_summary
+
+# Keyword groups, matched on word boundaries; a trailing \w* also accepts
+# plurals and inflections ("savings", "spending", "budgets")
+KEYWORDS = {
+    'greeting': r'hi|hello|hey',
+    'balance': r'balance\w*|saving\w*',
+    'expenses': r'expense\w*|spend\w*',
+    'categories': r'categor(?:y|ies)',
+    'recent': r'recent\w*|last|latest',
+    'budget': r'budget\w*',
+    'help': r'help\w*',
+}
+# Checked in this order when a message matches several intents
+INTENTS = ['greeting', 'balance', 'expenses', 'recent', 'budget', 'help']
+
+# One alternation of named groups: a single scan of the message finds every
+# keyword group it mentions
+_keywords = re.compile(
+    r'\b(?:' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in KEYWORDS.items()) + r')\b'
+)
+
+
+def match_keywords(message):
+    """Names of the keyword groups found in `message`"""
+    return {match.lastgroup for match in _keywords.finditer(message.lower())}
+
+
+def resolve_intent(message):
+    """(intent, keyword groups) for a chat message; intent 'unknown' if none matched"""
+    found = match_keywords(message)
+    for intent in INTENTS:
+        if intent in found:
+            return intent, found
+    return 'unknown', found
+
+
+def _money(value):
+    return f"${Decimal(value):.2f}"
+
+
+def greeting_reply(data, found):
+    return "Hello! I'm your BudgetBuddy assistant. How can I help you today?"
+
+
+def balance_reply(summary, found):
+    income, expenses = summary['income'], summary['expenses']
+    response = "Your current financial summary:\n"
+    response += f"- Income: {_money(income)}\n"
+    response += f"- Expenses: {_money(expenses)}\n"
+    response += f"- Savings: {_money(income - expenses)}\n"
+    goal = summary['savings_goal']
+    if goal:
+        response += (f"\nSavings Goal Progress: {goal['progress']:.1f}% "
+                     f"({_money(goal['current_amount'])} of {_money(goal['target_amount'])})")
+    return response
+
+
+def expenses_reply(summary, found):
+    categories = summary['categories']
+    if 'categories' in found:
+        response = "Your top expense categories:\n"
+        for cat in categories[:3]:
+            response += f"- {cat['category'].title()}: {_money(cat['total'])}\n"
+        return response
+    response = f"Your total expenses are {_money(summary['expenses'])}. "
+    if categories:
+        top = categories[0]
+        response += f"Your highest spending is on {top['category']} ({_money(top['total'])})."
+    return response
+
+
+def recent_reply(summary, found):
+    recent = summary['recent_transactions'][:3]
+    if not recent:
+        return "You don't have any recent transactions."
+    response = "Your recent transactions:\n"
+    for t in recent:
+        response += (f"- {date.fromisoformat(t['date']):%b %d}: {t['description']} "
+                     f"({_money(t['amount'])}, {t['category']})\n")
+    return response
+
+
+def budget_reply(data, found):
+    budgets, statuses = data
+    if not budgets:
+        return "You haven't set up any budgets yet. You can create budgets in the Overview section."
+    response = "Your current budgets:\n"
+    for budget in budgets:
+        status = statuses[budget.id]
+        label = budget.category.title()
+        if budget.period != 'monthly':
+            label += f" ({budget.period})"
+        response += (f"- {label}: {_money(status['spent'])} of {_money(budget.limit)} "
+                     f"({_money(status['remaining'])} remaining)\n")
+    return response
+
+
+def help_reply(data, found):
+    return (
+        "I can help you with:\n"
+        "- Your current balance and savings\n"
+        "- Expense categories and spending patterns\n"
+        "- Recent transactions\n"
+        "- Budget progress\n"
+        "Try asking questions like:\n"
+        "'What's my current balance?'\n"
+        "'Where am I spending the most?'\n"
+        "'Show me my recent transactions'\n"
+        "'How are my budgets doing?'"
+    )
+
+
+def unknown_reply(data, found):
+    return (
+        "I'm not sure I understand. Try asking about:\n"
+        "- Your balance or savings\n"
+        "- Your expenses or spending\n"
+        "- Recent transactions\n"
+        "- Budget progress\n"
+        "Or type 'help' for more options."
+    )
+
+
+def _budgets(user):
+    budgets = list(Budget.objects.filter(user=user))
+    return budgets, budget_statuses(user, budgets)
+
+
+async def _abudgets(user):
+    budgets = [budget async for budget in Budget.objects.filter(user=user)]
+    return budgets, await abudget_statuses(user, budgets)
+
+
+def _nothing(user):
+    return None
+
+
+async def _anothing(user):
+    return None
+
+
+# intent: (handler, fetch data, fetch data from an async view). Each intent
+# fetches only what it needs; greetings and help touch neither the database
+# nor the cache.
+HANDLERS = {
+    'greeting': (greeting_reply, _nothing, _anothing),
+    'balance': (balance_reply, get_summary, aget_summary),
+    'expenses': (expenses_reply, get_summary, aget_summary),
+    'recent': (recent_reply, get_summary, aget_summary),
+    'budget': (budget_reply, _budgets, _abudgets),
+    'help': (help_reply, _nothing, _anothing),
+    'unknown': (unknown_reply, _nothing, _anothing),
+}
+
+
+def reply(user, message):
+    """The chatbot's answer to `message`, as (intent, response text)"""
+    intent, found = resolve_intent(message)
+    handler, fetch, _ = HANDLERS[intent]
+    return intent, handler(fetch(user), found)
+
+
+async def areply(user, message):
+    intent, found = resolve_intent(message)
+    handler, _, afetch = HANDLERS[intent]
+    return intent, handler(await afetch(user), found)
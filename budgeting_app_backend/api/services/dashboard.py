@@ -0,0 +1,75 @@
+import asyncio
+from datetime import timedelta
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from ..models import SavingsGoal, Transaction
+from .ledger import aget_ledger, get_ledger
+
+DEFAULT_SAVINGS_TARGET = 1000
+# Unread notifications shown on the dashboard
+DASHBOARD_NOTIFICATIONS = 5
+
+
+def _window_totals(user, today):
+    """
+    Month-to-date spend and bills due in the next seven days, aggregated
+    over the date window that covers both rather than the whole history.
+    """
+    month_start = today.replace(day=1)
+    bill_window = Q(
+        type='expense',
+        description__icontains='bill',
+        date__gte=today,
+        date__lte=today + timedelta(days=7)
+    )
+    window = Transaction.objects.filter(user=user, date__gte=month_start, date__lte=today + timedelta(days=7))
+    return window, {
+        'month_expenses': Sum('amount', filter=Q(type='expense', date__lte=today)),
+        'upcoming_bills': Count('id', filter=bill_window),
+    }
+
+
+def _totals(ledger, window):
+    return {
+        'income': ledger.income,
+        'expenses': ledger.expenses,
+        'month_expenses': window['month_expenses'] or 0,
+        'upcoming_bills': window['upcoming_bills'] or 0,
+    }
+
+
+def get_dashboard_totals(user, today=None):
+    """
+    The dashboard figures for a user: all-time income and expenses from the
+    running ledger (a primary-key lookup), plus month-to-date spend and the
+    number of bills due in the next seven days in one date-bounded aggregate.
+    """
+    today = today or timezone.localdate()
+    window, aggregates = _window_totals(user, today)
+    return _totals(get_ledger(user), window.aggregate(**aggregates))
+
+
+async def aget_dashboard_totals(user, today=None):
+    today = today or timezone.localdate()
+    window, aggregates = _window_totals(user, today)
+    return _totals(*await asyncio.gather(aget_ledger(user), window.aaggregate(**aggregates)))
+
+
+def dashboard_savings_goal(summary):
+    """The user's savings goal, or an unsaved default one when they have none"""
+    from ..serializers import SavingsGoalSerializer
+
+    if summary['savings_goal'] is not None:
+        return summary['savings_goal']
+    return SavingsGoalSerializer(SavingsGoal(target_amount=DEFAULT_SAVINGS_TARGET, current_amount=0)).data
+
+
+def dashboard_payload(summary, notifications):
+    """The /dashboard/ response: `notifications` are the serialized unread ones"""
+    return {
+        'income': summary['income'],
+        'expenses': summary['expenses'],
+        'savings_goal': dashboard_savings_goal(summary),
+        'recent_transactions': summary['recent_transactions'],
+        'notifications': notifications,
+    }
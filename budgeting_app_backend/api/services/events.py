@@ -0,0 +1,174 @@
+"""
+Incremental updates pushed to a user's event streams after a write, so
+an open dashboard can patch its state instead of refetching /dashboard/,
+/transactions/monthly/ and /budgets/.
+
+Each event is {'event': name, 'data': ...}:
+
+    transaction   {'action': 'created'|'updated'|'deleted'|'imported', ...}
+    totals        the running ledger (income, expenses, balance, count)
+    monthly       trend entries of the months the write touched
+    budgets       budgets of the touched expense categories, as /budgets/ lists them
+    budget_deleted {'id': ...}
+    notification  a new notification, as /notifications/ lists it
+    resync        the stream dropped events: refetch everything
+"""
+import secrets
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from ..event_layers import get_event_layer
+from ..models import Budget, Notification
+from . import rollups
+from .budgets import budget_statuses
+from .ledger import get_ledger
+
+
+def user_group(user_id):
+    return f"user.{user_id}"
+
+
+def _ticket_cache():
+    return caches[settings.EVENT_TICKET_CACHE_ALIAS]
+
+
+def _ticket_key(ticket):
+    return f"streamticket:{ticket}"
+
+
+def issue_stream_ticket(user):
+    """
+    A random ticket that opens one event stream for `user` within
+    CACHE_TTLS['streamticket'] seconds. EventSource cannot send headers,
+    and an access token in the URL would end up in access logs.
+    """
+    ticket = secrets.token_urlsafe(32)
+    _ticket_cache().set(_ticket_key(ticket), user.id, timeout=settings.CACHE_TTLS['streamticket'])
+    return ticket
+
+
+async def aredeem_stream_ticket(ticket):
+    """The ticket's active user, or None; a ticket is only accepted once"""
+    cache = _ticket_cache()
+    key = _ticket_key(ticket)
+    user_id = await cache.aget(key)
+    # Of two requests racing on one ticket, only the one that deletes it wins
+    if user_id is None or not await cache.adelete(key):
+        return None
+    return await User.objects.filter(pk=user_id, is_active=True).afirst()
+
+
+def publish_on_commit(user_id, build):
+    """
+    Once the surrounding transaction commits, publish the (event, data)
+    pairs `build()` returns to the user's streams. Nothing is built, so
+    no queries run, when the layer knows nobody is listening.
+    """
+    def send():
+        layer = get_event_layer()
+        group = user_group(user_id)
+        if not layer.has_subscribers(group):
+            return
+        for event, data in build():
+            layer.publish(group, {'event': event, 'data': data})
+
+    transaction.on_commit(send)
+
+
+def _budgets(user_id, categories):
+    from ..serializers import BudgetSerializer
+
+    budgets = list(Budget.objects.filter(user_id=user_id, category__in=categories))
+    statuses = budget_statuses(user_id, budgets)
+    return BudgetSerializer(budgets, many=True, context={'budget_status': statuses}).data
+
+
+def _deltas(user_id, changes):
+    """totals/monthly/budgets events for Transaction.TRACKED_FIELDS dicts"""
+    keys = [rollups.rollup_key(values) for values in changes]
+    ledger = get_ledger(User(pk=user_id))
+    yield 'totals', {
+        'income': ledger.income,
+        'expenses': ledger.expenses,
+        'balance': ledger.balance,
+        'transaction_count': ledger.transaction_count,
+    }
+    months = sorted({(key['year'], key['month']) for key in keys})
+    yield 'monthly', rollups.monthly_totals(user_id, months)
+    categories = {key['category'] for key in keys if key['type'] == 'expense'}
+    budgets = _budgets(user_id, categories) if categories else []
+    if budgets:
+        yield 'budgets', budgets
+
+
+def transaction_changed(instance, old=None, new=None):
+    """Push a single transaction's create/update/delete and what it moved"""
+    from ..serializers import TransactionSerializer
+
+    if new is None:
+        action = 'deleted'
+    else:
+        action = 'updated' if old is not None else 'created'
+    changes = [values for values in (old, new) if values is not None]
+    # Taken now: a delete clears the pk once it finishes
+    pk = instance.pk
+
+    def build():
+        row = {'id': pk} if new is None else TransactionSerializer(instance).data
+        yield 'transaction', {'action': action, 'transaction': row}
+        yield from _deltas(instance.user_id, changes)
+
+    publish_on_commit(instance.user_id, build)
+
+
+def transactions_imported(transactions):
+    """One 'imported' event per user for a bulk insert, not one per row"""
+    by_user = {}
+    for tx in transactions:
+        by_user.setdefault(tx.user_id, []).append(
+            {name: getattr(tx, name) for name in tx.TRACKED_FIELDS}
+        )
+    for user_id, changes in by_user.items():
+        def build(user_id=user_id, changes=changes):
+            yield 'transaction', {'action': 'imported', 'count': len(changes)}
+            yield from _deltas(user_id, changes)
+
+        publish_on_commit(user_id, build)
+
+
+def budget_changed(budget, deleted=False):
+    if deleted:
+        budget_id = budget.pk
+        publish_on_commit(budget.user_id, lambda: [('budget_deleted', {'id': budget_id})])
+    else:
+        publish_on_commit(budget.user_id, lambda: [('budgets', _budgets(budget.user_id, [budget.category]))])
+
+
+def notifications_created(notifications):
+    from ..serializers import NotificationSerializer
+
+    for notification in notifications:
+        data = NotificationSerializer(notification).data
+        publish_on_commit(notification.user_id, lambda data=data: [('notification', data)])
+
+
+def new_notifications_since(candidates, since):
+    """
+    Push the rows of a bulk_create(ignore_conflicts=True) batch that were
+    really inserted: the database does not say which, so they are read
+    back (one query) as the candidates' keys created at or after `since`.
+    """
+    layer = get_event_layer()
+    listening = {
+        row.user_id for row in candidates
+        if layer.has_subscribers(user_group(row.user_id))
+    }
+    if not listening:
+        return
+    inserted = Notification.objects.filter(
+        user_id__in=listening,
+        dedupe_key__in={row.dedupe_key for row in candidates if row.user_id in listening},
+        created_at__gte=since,
+    )
+    notifications_created(inserted)
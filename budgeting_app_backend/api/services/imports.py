@@ -0,0 +1,279 @@
+import csv
+import io
+import logging
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.db import transaction
+from ..models import Transaction
+from ..ml.cache import categorize
+from ..ml.registry import ModelUnavailable
+from ..signals import transactions_bulk_created
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000          # rows validated, categorized and signalled together
+INSERT_CHUNK_SIZE = 500    # rows per bulk_create INSERT
+MAX_REPORTED_ERRORS = 500
+
+MAX_AMOUNT = Decimal('99999999.99')
+CENT = Decimal('0.01')
+DESCRIPTION_MAX_LENGTH = Transaction._meta.get_field('description').max_length
+
+TYPES = {value for value, _ in Transaction.TYPE_CHOICES}
+CATEGORIES = {
+    'expense': {value for value, _ in Transaction.EXPENSE_CATEGORIES},
+    'income': {value for value, _ in Transaction.INCOME_CATEGORIES},
+}
+# Where a predicted category does not fit the row's type
+FALLBACK_CATEGORY = {'expense': 'other', 'income': 'other-income'}
+
+# CSV header aliases, matched case-insensitively
+COLUMN_ALIASES = {
+    'date': ('date', 'posted', 'transaction date', 'posting date'),
+    'description': ('description', 'memo', 'name', 'payee', 'details'),
+    'amount': ('amount', 'value'),
+    'type': ('type',),
+    'category': ('category',),
+}
+REQUIRED_COLUMNS = ('date', 'description', 'amount')
+
+
+class ImportFormatError(Exception):
+    """The uploaded file cannot be read as the requested format"""
+
+
+class RowError(Exception):
+    """A single row failed validation"""
+
+
+def _text_stream(fileobj):
+    """Decode an uploaded binary file lazily, dropping a UTF-8 BOM"""
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(fileobj, encoding='utf-8-sig', errors='replace', newline='')
+
+
+def iter_csv_rows(fileobj):
+    """
+    Yield (line_number, row) for every CSV record, row being a dict with
+    the canonical keys of COLUMN_ALIASES. The file is read line by line.
+    """
+    reader = csv.reader(_text_stream(fileobj))
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise ImportFormatError("The file is empty")
+
+    normalized = [name.strip().lower() for name in header]
+    positions = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                positions[column] = normalized.index(alias)
+                break
+    missing = [column for column in REQUIRED_COLUMNS if column not in positions]
+    if missing:
+        raise ImportFormatError(f"Missing column(s): {', '.join(missing)}")
+
+    columns = list(positions.items())
+    for record in reader:
+        if not any(record):
+            continue
+        width = len(record)
+        yield reader.line_num, {
+            column: record[index] if index < width else ''
+            for column, index in columns
+        }
+
+
+def _iter_ofx_tags(text, chunk_size=64 * 1024):
+    """Yield (tag, value) for every opening tag of an OFX (SGML or XML) stream"""
+    pending = ''
+    while True:
+        chunk = text.read(chunk_size)
+        if not chunk:
+            break
+        pieces = (pending + chunk).split('<')
+        # The last piece may continue in the next chunk
+        pending = pieces.pop()
+        for piece in pieces:
+            tag, _, value = piece.partition('>')
+            if tag:
+                yield tag.strip().upper(), value.strip()
+    tag, _, value = pending.partition('>')
+    if tag:
+        yield tag.strip().upper(), value.strip()
+
+
+def iter_ofx_rows(fileobj):
+    """
+    Yield (transaction_number, row) for every <STMTTRN> of an OFX/QFX
+    statement, streaming the file in fixed-size chunks.
+    """
+    number = 0
+    current = None
+    for tag, value in _iter_ofx_tags(_text_stream(fileobj)):
+        if tag == 'STMTTRN':
+            current = {}
+        elif tag == '/STMTTRN' and current is not None:
+            number += 1
+            yield number, {
+                'date': current.get('DTPOSTED', '')[:8],
+                'description': current.get('NAME') or current.get('MEMO', ''),
+                'amount': current.get('TRNAMT', ''),
+            }
+            current = None
+        elif current is not None and not tag.startswith('/'):
+            current[tag] = value
+    if number == 0:
+        raise ImportFormatError("No <STMTTRN> transactions found")
+
+
+def _parse_date(value):
+    value = value.strip()
+    try:
+        if len(value) == 8 and value.isdigit():
+            # OFX DTPOSTED
+            return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+        return date.fromisoformat(value)
+    except ValueError:
+        raise RowError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+def parse_row(row):
+    """
+    Validate one raw row and return the Transaction field values, with
+    'category' None when the row still needs categorizing.
+
+    This mirrors TransactionSerializer's checks without its per-row
+    overhead; amounts without an explicit type are signed (negative
+    means expense).
+    """
+    description = row['description'].strip()
+    if not description:
+        raise RowError("Description is required")
+
+    raw_amount = row['amount'].strip().replace(',', '')
+    try:
+        amount = Decimal(raw_amount)
+    except InvalidOperation:
+        raise RowError(f"Invalid amount '{row['amount']}'")
+    if not amount.is_finite():
+        raise RowError(f"Invalid amount '{row['amount']}'")
+
+    row_type = row.get('type', '').strip().lower()
+    if row_type:
+        if row_type not in TYPES:
+            raise RowError(f"Invalid type '{row_type}'")
+    else:
+        row_type = 'expense' if amount < 0 else 'income'
+    amount = abs(amount).quantize(CENT)
+    if amount > MAX_AMOUNT:
+        raise RowError(f"Amount {amount} is too large")
+
+    category = row.get('category', '').strip().lower() or None
+    if category is not None and category not in CATEGORIES[row_type]:
+        raise RowError(
+            f"Invalid category for {row_type} transaction. "
+            f"Valid categories are: {', '.join(sorted(CATEGORIES[row_type]))}"
+        )
+
+    return {
+        'type': row_type,
+        'amount': amount,
+        'description': description[:DESCRIPTION_MAX_LENGTH],
+        'category': category,
+        'date': _parse_date(row['date']),
+    }
+
+
+def _categorize_missing(parsed):
+    """Fill in missing categories with one batched classifier call"""
+    missing = [values for values in parsed if values['category'] is None]
+    if not missing:
+        return 0
+    try:
+        _, categories, _ = categorize(
+            [values['description'] for values in missing],
+            [float(values['amount']) for values in missing],
+            [values['date'] for values in missing],
+        )
+    except ModelUnavailable:
+        logger.warning("No classifier available; importing uncategorized rows as 'other'")
+        categories = [None] * len(missing)
+    for values, category in zip(missing, categories):
+        if category not in CATEGORIES[values['type']]:
+            category = FALLBACK_CATEGORY[values['type']]
+        values['category'] = category
+    return len(missing)
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.auto_categorized = 0
+        self.errors = []
+
+    def add_error(self, row, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'error': message})
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'auto_categorized': self.auto_categorized,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def import_transactions(user, rows, batch_size=BATCH_SIZE, chunk_size=INSERT_CHUNK_SIZE):
+    """
+    Validate, categorize and insert (row_number, row) pairs for `user`.
+
+    Rows are consumed `batch_size` at a time so only one batch is held in
+    memory. Valid rows are inserted with bulk_create in `chunk_size`
+    INSERTs inside a single DB transaction; invalid rows are skipped and
+    reported. Derived state is updated through transactions_bulk_created.
+    """
+    result = ImportResult()
+    rows = iter(rows)
+    with transaction.atomic():
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            parsed = []
+            for number, row in batch:
+                try:
+                    parsed.append(parse_row(row))
+                except RowError as e:
+                    result.add_error(number, str(e))
+            result.auto_categorized += _categorize_missing(parsed)
+
+            objs = [Transaction(user=user, **values) for values in parsed]
+            for start in range(0, len(objs), chunk_size):
+                Transaction.objects.bulk_create(objs[start:start + chunk_size])
+            # Once per batch, so receivers can fold the whole batch into few writes
+            transactions_bulk_created.send(sender=Transaction, transactions=objs)
+            result.imported += len(objs)
+    return result
+
+
+def import_file(user, fileobj, file_type):
+    """Import an uploaded 'csv' or 'ofx' file; see import_transactions"""
+    if file_type == 'csv':
+        rows = iter_csv_rows(fileobj)
+    elif file_type == 'ofx':
+        rows = iter_ofx_rows(fileobj)
+    else:
+        raise ImportFormatError(f"Unsupported file type '{file_type}'")
+    try:
+        return import_transactions(user, rows)
+    except csv.Error as e:
+        raise ImportFormatError(str(e))
@@ -0,0 +1,117 @@
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from ..models import LedgerSummary, Transaction
+
+_amount_field = Transaction._meta.get_field('amount')
+
+
+def apply_delta(user_id, income=0, expenses=0, count=0):
+    """
+    Add to a user's running totals with a single UPDATE ... SET x = x + ?,
+    so concurrent writers never lose each other's changes.
+    """
+    changes = {
+        'income': F('income') + income,
+        'expenses': F('expenses') + expenses,
+        'balance': F('balance') + (income - expenses),
+        'transaction_count': F('transaction_count') + count,
+    }
+    if LedgerSummary.objects.filter(pk=user_id).update(**changes) or count < 0:
+        # Nothing to create for a removal whose row is already gone
+        # (e.g. the user itself is being deleted)
+        return
+    try:
+        with transaction.atomic():
+            LedgerSummary.objects.create(
+                user_id=user_id, income=income, expenses=expenses,
+                balance=income - expenses, transaction_count=count
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        LedgerSummary.objects.filter(pk=user_id).update(**changes)
+
+
+def _add(deltas, values, sign):
+    delta = deltas.setdefault(values['user_id'], [0, 0, 0])
+    amount = sign * _amount_field.to_python(values['amount'])
+    delta[0 if values['type'] == 'income' else 1] += amount
+    delta[2] += sign
+
+
+def record_change(old=None, new=None):
+    """
+    Move a transaction's amount between ledgers/sides. `old` / `new` are
+    dicts of Transaction.TRACKED_FIELDS values, as for the rollups.
+    """
+    deltas = {}
+    if old is not None:
+        _add(deltas, old, -1)
+    if new is not None:
+        _add(deltas, new, 1)
+    for user_id, (income, expenses, count) in deltas.items():
+        if income or expenses or count:
+            apply_delta(user_id, income, expenses, count)
+
+
+def record_bulk_insert(transactions):
+    deltas = {}
+    for tx in transactions:
+        _add(deltas, {'user_id': tx.user_id, 'type': tx.type, 'amount': tx.amount}, 1)
+    for user_id, (income, expenses, count) in deltas.items():
+        apply_delta(user_id, income, expenses, count)
+
+
+def get_ledger(user):
+    """The user's running totals: one primary-key lookup"""
+    return LedgerSummary.objects.filter(pk=user.id).first() or LedgerSummary(user_id=user.id)
+
+
+async def aget_ledger(user):
+    return await LedgerSummary.objects.filter(pk=user.id).afirst() or LedgerSummary(user_id=user.id)
+
+
+def computed_totals(users=None):
+    """Totals recomputed from the raw transactions, keyed by user id"""
+    transactions = Transaction.objects.all()
+    if users is not None:
+        transactions = transactions.filter(user__in=users)
+    rows = transactions.values('user_id').annotate(
+        income=Sum('amount', filter=Q(type='income'), default=Decimal(0)),
+        expenses=Sum('amount', filter=Q(type='expense'), default=Decimal(0)),
+        transaction_count=Count('id'),
+    ).order_by()
+    return {
+        row.pop('user_id'): dict(row, balance=row['income'] - row['expenses'])
+        for row in rows.iterator()
+    }
+
+
+def check_ledgers(users=None, repair=False):
+    """
+    Compare the stored ledgers with the raw transactions. Returns a list of
+    (user_id, stored, expected) for every mismatch; with repair=True the
+    stored rows are corrected, inside one transaction that locks them.
+    """
+    with transaction.atomic():
+        ledgers = LedgerSummary.objects.select_for_update()
+        if users is not None:
+            ledgers = ledgers.filter(user__in=users)
+        stored = {
+            row.pop('user_id'): row
+            for row in ledgers.values('user_id', 'income', 'expenses', 'balance', 'transaction_count')
+        }
+        expected = computed_totals(users)
+        empty = {'income': 0, 'expenses': 0, 'balance': 0, 'transaction_count': 0}
+
+        mismatches = []
+        for user_id in stored.keys() | expected.keys():
+            want = expected.get(user_id, empty)
+            have = stored.get(user_id)
+            if have != want:
+                mismatches.append((user_id, have, want))
+
+        if repair:
+            for user_id, have, want in mismatches:
+                LedgerSummary.objects.update_or_create(user_id=user_id, defaults=want)
+    return mismatches
@@ -0,0 +1,144 @@
+"""
+Notification rules, evaluated for all users at once by a periodic Celery
+task (see tasks.evaluate_notification_rules_task).
+
+Every rule is one set-based query across all users that yields candidate
+Notification rows carrying a `dedupe_key`. The rows are inserted with
+bulk_create(ignore_conflicts=True), so the (user, dedupe_key) unique
+constraint, not an existence check, keeps a rule from notifying twice.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+from ..models import Budget, Notification, SavingsGoal, Transaction
+from . import events
+from .notifications import invalidate_unread_counts
+from .periods import period_bounds
+
+UPCOMING_BILL_TITLE = 'Upcoming Bill'
+BILL_WINDOW_DAYS = 7
+# Percent of a budget's limit spent within its period
+BUDGET_THRESHOLDS = (80, 100)
+# Percent of a savings goal reached
+SAVINGS_MILESTONES = (25, 50, 75, 100)
+INSERT_BATCH_SIZE = 1000
+
+
+def _reached(levels, amount, limit):
+    """Highest of `levels` (percentages) that amount/limit has reached"""
+    return max(level for level in levels if amount * 100 >= limit * level)
+
+
+def upcoming_bills(today):
+    """A reminder per user with bills due within the week, once per ISO week"""
+    rows = Transaction.objects.filter(
+        type='expense',
+        description__icontains='bill',
+        date__gte=today,
+        date__lte=today + timedelta(days=BILL_WINDOW_DAYS)
+    ).values('user_id').annotate(bills=Count('id')).order_by()
+    week = f"{today:%G-W%V}"
+    for row in rows.iterator():
+        yield Notification(
+            user_id=row['user_id'],
+            title=UPCOMING_BILL_TITLE,
+            message=f"You have {row['bills']} bill(s) due this week",
+            notification_type='reminder',
+            dedupe_key=f"bills:{week}",
+        )
+
+
+def budget_thresholds(today):
+    """
+    A warning per Budget row whose spend in the current period has crossed
+    one of BUDGET_THRESHOLDS; one query per period for all users' budgets.
+    """
+    lowest = Decimal(min(BUDGET_THRESHOLDS)) / 100
+    for period, _ in Budget.PERIOD_CHOICES:
+        start, end = period_bounds(period, today)
+        spent = Transaction.objects.filter(
+            user=OuterRef('user'),
+            category=OuterRef('category'),
+            type='expense',
+            date__gte=start,
+            date__lte=end
+        ).values('user').annotate(total=Sum('amount')).values('total')
+        budgets = Budget.objects.filter(period=period, limit__gt=0).annotate(
+            spent=Subquery(spent)
+        ).filter(spent__gte=F('limit') * lowest).values('id', 'user_id', 'category', 'limit', 'spent')
+
+        for budget in budgets.iterator():
+            level = _reached(BUDGET_THRESHOLDS, budget['spent'], budget['limit'])
+            over = level >= 100
+            yield Notification(
+                user_id=budget['user_id'],
+                title='Budget Exceeded' if over else 'Budget Alert',
+                message=(
+                    f"You've spent ${budget['spent']:.2f} of your {period} "
+                    f"{budget['category']} budget of ${budget['limit']:.2f}"
+                    + (" and gone over it" if over else f" ({level}% or more)")
+                ),
+                notification_type='warning',
+                dedupe_key=f"budget:{budget['id']}:{start:%Y-%m-%d}:{level}",
+            )
+
+
+def savings_milestones(today):
+    """A note per savings goal the first time it reaches each milestone"""
+    lowest = Decimal(min(SAVINGS_MILESTONES)) / 100
+    goals = SavingsGoal.objects.filter(
+        target_amount__gt=0,
+        current_amount__gte=F('target_amount') * lowest
+    ).values('id', 'user_id', 'target_amount', 'current_amount')
+    for goal in goals.iterator():
+        milestone = _reached(SAVINGS_MILESTONES, goal['current_amount'], goal['target_amount'])
+        yield Notification(
+            user_id=goal['user_id'],
+            title='Savings Goal Reached' if milestone >= 100 else 'Savings Milestone',
+            message=(
+                f"You've saved ${goal['current_amount']:.2f}, {milestone}% of your "
+                f"${goal['target_amount']:.2f} goal"
+            ),
+            notification_type='info',
+            dedupe_key=f"savings:{goal['id']}:{milestone}",
+        )
+
+
+RULES = [upcoming_bills, budget_thresholds, savings_milestones]
+
+
+def live_dedupe_keys(today):
+    """
+    Filter for the dedupe keys a rule could still produce on or after
+    `today`; pruning must keep those rows or the rule notifies again. Bill
+    keys carry the ISO week and budget keys the period start, so only the
+    current ones are live. Savings milestones are sent once per goal for
+    good.
+    """
+    starts = {period_bounds(period, today)[0] for period, _ in Budget.PERIOD_CHOICES}
+    live = Q(dedupe_key__startswith='savings:') | Q(dedupe_key=f"bills:{today:%G-W%V}")
+    for start in starts:
+        live |= Q(dedupe_key__startswith='budget:', dedupe_key__contains=f":{start:%Y-%m-%d}:")
+    return live
+
+
+def evaluate_rules(today=None, rules=None):
+    """
+    Run every rule and insert the notifications users do not have yet.
+    Returns the number of candidate rows; already-sent ones are skipped by
+    the database.
+    """
+    today = today or timezone.localdate()
+    candidates = 0
+    for rule in rules or RULES:
+        rows = rule(today)
+        while batch := list(islice(rows, INSERT_BATCH_SIZE)):
+            started = timezone.now()
+            Notification.objects.bulk_create(batch, ignore_conflicts=True)
+            # bulk_create skips post_save
+            invalidate_unread_counts(row.user_id for row in batch)
+            events.new_notifications_since(batch, started)
+            candidates += len(batch)
+    return candidates
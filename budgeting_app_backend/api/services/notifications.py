@@ -0,0 +1,86 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from ..models import Notification
+
+
+def _cache():
+    return caches[settings.NOTIFICATION_CACHE_ALIAS]
+
+
+def unread_count_key(user_id):
+    return f"unread:{user_id}"
+
+
+def _unread(user):
+    return Notification.objects.filter(user=user, is_read=False)
+
+
+def unread_count(user):
+    """
+    The user's unread count, cached so the frontend can poll it; the key
+    is dropped by every write that can change it.
+    """
+    key = unread_count_key(user.id)
+    count = _cache().get(key)
+    if count is None:
+        count = _unread(user).count()
+        _cache().set(key, count, timeout=settings.CACHE_TTLS['unread'])
+    return count
+
+
+async def aunread_count(user):
+    key = unread_count_key(user.id)
+    count = await _cache().aget(key)
+    if count is None:
+        count = await _unread(user).acount()
+        await _cache().aset(key, count, timeout=settings.CACHE_TTLS['unread'])
+    return count
+
+
+def invalidate_unread_counts(user_ids):
+    """Drop the cached counts once the surrounding transaction commits"""
+    keys = [unread_count_key(user_id) for user_id in set(user_ids)]
+    transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def mark_read(user, ids=None):
+    """
+    Mark the given notifications (or all of them) read with one UPDATE.
+    Returns how many were unread before.
+    """
+    notifications = _unread(user)
+    if ids is not None:
+        notifications = notifications.filter(pk__in=ids)
+    updated = notifications.update(is_read=True)
+    if updated:
+        invalidate_unread_counts([user.id])
+    return updated
+
+
+def prune_read_notifications(older_than_days=None, batch_size=None, now=None):
+    """
+    Delete read notifications older than the retention period, a batch of
+    primary keys at a time so no single statement holds locks for long.
+    Unread notifications are always kept, and so are rows whose dedupe_key
+    a rule could still produce: they are the rule engine's record of what
+    it already sent. Returns the number deleted.
+    """
+    from .notification_rules import live_dedupe_keys
+
+    days = settings.NOTIFICATION_RETENTION_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.NOTIFICATION_PRUNE_BATCH_SIZE
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=days)
+    expired = Notification.objects.filter(is_read=True, created_at__lt=cutoff).exclude(
+        live_dedupe_keys(timezone.localdate(now))
+    ).order_by('created_at')
+
+    deleted = 0
+    while ids := list(expired.values_list('pk', flat=True)[:batch_size]):
+        # Nothing references Notification and it has no delete signals,
+        # so this is a single DELETE ... WHERE id IN (...)
+        deleted += Notification.objects.filter(pk__in=ids).delete()[0]
+    return deleted
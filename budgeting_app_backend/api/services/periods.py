@@ -0,0 +1,19 @@
+from datetime import date, timedelta
+
+
+def period_bounds(period, today):
+    """
+    Inclusive (start, end) dates of the weekly (ISO week), monthly or yearly
+    period containing `today`. Used to build sargable `date` range filters
+    instead of `date__week` / `date__month` / `date__year` lookups.
+    """
+    if period == 'weekly':
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if period == 'monthly':
+        start = today.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month - timedelta(days=1)
+    if period == 'yearly':
+        return date(today.year, 1, 1), date(today.year, 12, 31)
+    raise ValueError(f"Unknown period: {period}")
@@ -0,0 +1,319 @@
+import csv
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from django.conf import settings
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.barcharts import HorizontalBarChart, VerticalBarChart
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from ..models import Transaction
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 50
+LINE_HEIGHT = 14
+SPOOL_MAX_MEMORY = 1024 * 1024   # appendix rows spill to disk past this size
+ITERATOR_CHUNK_SIZE = 2000
+
+INCOME_COLOR = colors.HexColor('#2e7d32')
+EXPENSE_COLOR = colors.HexColor('#c62828')
+
+
+def _period_range(report_type, period):
+    """Inclusive (start, end) dates of a report period, (None, None) for 'all'"""
+    if report_type == 'monthly':
+        year, month = map(int, period.split('-'))
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        return start, date.fromordinal(end.toordinal() - 1)
+    if report_type == 'yearly':
+        year = int(period)
+        return date(year, 1, 1), date(year, 12, 31)
+    return None, None
+
+
+class ReportData:
+    """
+    Everything a report needs, accumulated in one streamed pass over the
+    user's transactions. Aggregates are bounded by categories x trend
+    buckets; appendix rows go to a spooled temporary file, so memory does
+    not grow with the number of transactions.
+    """
+
+    def __init__(self, report_type, period, appendix_limit):
+        self.report_type = report_type
+        self.period = period
+        self.appendix_limit = appendix_limit
+        self.income = Decimal(0)
+        self.expenses = Decimal(0)
+        self.count = 0
+        # (type, category) -> [total, count, largest]
+        self.categories = defaultdict(lambda: [Decimal(0), 0, Decimal(0)])
+        # trend bucket -> [income, expenses]
+        self.trend = defaultdict(lambda: [Decimal(0), Decimal(0)])
+        self.appendix = SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY, mode='w+', newline='')
+        self.appendix_rows = 0
+        self._writer = csv.writer(self.appendix)
+
+    def bucket(self, day):
+        # Daily buckets inside a month, monthly buckets otherwise
+        return f"{day:%d}" if self.report_type == 'monthly' else f"{day:%Y-%m}"
+
+    def add(self, day, tx_type, category, amount, description):
+        self.count += 1
+        stats = self.categories[(tx_type, category)]
+        stats[0] += amount
+        stats[1] += 1
+        if amount > stats[2]:
+            stats[2] = amount
+        trend = self.trend[self.bucket(day)]
+        if tx_type == 'income':
+            self.income += amount
+            trend[0] += amount
+        else:
+            self.expenses += amount
+            trend[1] += amount
+        if self.appendix_rows < self.appendix_limit:
+            self._writer.writerow((day.isoformat(), tx_type, category, amount, description))
+            self.appendix_rows += 1
+
+    def category_rows(self, tx_type):
+        """[(category, total, count, largest)] of one type, largest total first"""
+        rows = [
+            (category, total, count, largest)
+            for (row_type, category), (total, count, largest) in self.categories.items()
+            if row_type == tx_type
+        ]
+        return sorted(rows, key=lambda row: row[1], reverse=True)
+
+    def iter_appendix(self):
+        self.appendix.seek(0)
+        return csv.reader(self.appendix)
+
+    def close(self):
+        self.appendix.close()
+
+
+def collect_report_data(user, report_type, period, appendix_limit=None):
+    """Single query, streamed with .iterator(): no per-section queries"""
+    if appendix_limit is None:
+        appendix_limit = settings.REPORT_APPENDIX_MAX_ROWS
+    data = ReportData(report_type, period, appendix_limit)
+    queryset = Transaction.objects.filter(user=user)
+    start, end = _period_range(report_type, period)
+    if start is not None:
+        queryset = queryset.filter(date__gte=start, date__lte=end)
+    rows = queryset.order_by('date', 'id').values_list(
+        'date', 'type', 'category', 'amount', 'description'
+    ).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    for row in rows:
+        data.add(*row)
+    return data
+
+
+class PageWriter:
+    """Canvas wrapper tracking the write position and breaking pages as needed"""
+
+    def __init__(self, buffer, title):
+        self.canvas = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+        self.canvas.setTitle(title)
+        self.title = title
+        self.page = 1
+        self.y = PAGE_HEIGHT - MARGIN
+        self.on_new_page = None
+
+    def footer(self):
+        self.canvas.setFont('Helvetica', 8)
+        self.canvas.setFillColor(colors.grey)
+        self.canvas.drawString(MARGIN, MARGIN / 2, self.title)
+        self.canvas.drawRightString(PAGE_WIDTH - MARGIN, MARGIN / 2, f"Page {self.page}")
+        self.canvas.setFillColor(colors.black)
+
+    def new_page(self):
+        self.footer()
+        self.canvas.showPage()
+        self.page += 1
+        self.y = PAGE_HEIGHT - MARGIN
+        if self.on_new_page:
+            self.on_new_page()
+
+    def ensure_space(self, height):
+        if self.y - height < MARGIN:
+            self.new_page()
+
+    def heading(self, text, size=14):
+        self.ensure_space(size + LINE_HEIGHT * 3)
+        self.y -= size + LINE_HEIGHT / 2
+        self.canvas.setFont('Helvetica-Bold', size)
+        self.canvas.drawString(MARGIN, self.y, text)
+        self.y -= LINE_HEIGHT / 2
+
+    def line(self, text, size=10, indent=0):
+        self.ensure_space(LINE_HEIGHT)
+        self.y -= LINE_HEIGHT
+        self.canvas.setFont('Helvetica', size)
+        self.canvas.drawString(MARGIN + indent, self.y, text)
+
+    def row(self, columns, values, bold=False):
+        """One table row; columns are (x offset, width, align) tuples"""
+        self.ensure_space(LINE_HEIGHT)
+        self.y -= LINE_HEIGHT
+        font = 'Helvetica-Bold' if bold else 'Helvetica'
+        self.canvas.setFont(font, 9)
+        for (x, width, align), value in zip(columns, values):
+            text = str(value)
+            if align == 'right':
+                self.canvas.drawRightString(MARGIN + x + width, self.y, text)
+            else:
+                self.canvas.drawString(MARGIN + x, self.y, self.clip(text, width, font))
+        if bold:
+            self.canvas.line(MARGIN, self.y - 3, PAGE_WIDTH - MARGIN, self.y - 3)
+
+    def clip(self, text, width, font='Helvetica', size=9):
+        """Shorten text to fit the column width"""
+        text_width = self.canvas.stringWidth(text, font, size)
+        if text_width <= width:
+            return text
+        text = text[:int(len(text) * width / text_width)]
+        while text and self.canvas.stringWidth(text + '...', font, size) > width:
+            text = text[:-1]
+        return text + '...'
+
+    def drawing(self, drawing):
+        self.ensure_space(drawing.height + LINE_HEIGHT)
+        self.y -= drawing.height
+        renderPDF.draw(drawing, self.canvas, MARGIN, self.y)
+        self.y -= LINE_HEIGHT
+
+    def save(self):
+        self.footer()
+        self.canvas.save()
+
+
+def _money(value):
+    return f"{'-' if value < 0 else ''}${abs(value):,.2f}"
+
+
+def _trend_chart(data):
+    buckets = sorted(data.trend)
+    drawing = Drawing(PAGE_WIDTH - 2 * MARGIN, 180)
+    chart = VerticalBarChart()
+    chart.x, chart.y = 40, 30
+    chart.width, chart.height = drawing.width - 60, 130
+    chart.data = [
+        [float(data.trend[bucket][0]) for bucket in buckets],
+        [float(data.trend[bucket][1]) for bucket in buckets],
+    ]
+    chart.bars[0].fillColor = INCOME_COLOR
+    chart.bars[1].fillColor = EXPENSE_COLOR
+    chart.valueAxis.valueMin = 0
+    # Keep at most ~12 axis labels readable
+    step = max(1, len(buckets) // 12)
+    chart.categoryAxis.categoryNames = [
+        bucket if i % step == 0 else '' for i, bucket in enumerate(buckets)
+    ]
+    chart.categoryAxis.labels.angle = 45
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    drawing.add(chart)
+    return drawing
+
+
+def _category_chart(rows):
+    rows = rows[:10]
+    drawing = Drawing(PAGE_WIDTH - 2 * MARGIN, 20 * len(rows) + 30)
+    chart = HorizontalBarChart()
+    chart.x, chart.y = 110, 10
+    chart.width, chart.height = drawing.width - 130, 20 * len(rows)
+    # Largest at the top
+    chart.data = [[float(row[1]) for row in reversed(rows)]]
+    chart.categoryAxis.categoryNames = [row[0] for row in reversed(rows)]
+    chart.bars[0].fillColor = EXPENSE_COLOR
+    chart.valueAxis.valueMin = 0
+    chart.categoryAxis.labels.fontSize = 8
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    drawing.add(chart)
+    return drawing
+
+
+CATEGORY_COLUMNS = [(0, 130, 'left'), (130, 45, 'right'), (175, 85, 'right'), (260, 80, 'right'), (340, 85, 'right'), (425, 70, 'right')]
+APPENDIX_COLUMNS = [(0, 65, 'left'), (65, 50, 'left'), (115, 90, 'left'), (205, 75, 'right'), (295, 200, 'left')]
+
+
+def _category_table(writer, rows, total):
+    writer.row(CATEGORY_COLUMNS, ['Category', 'Count', 'Total', 'Average', 'Largest', 'Share'], bold=True)
+    for category, amount, count, largest in rows:
+        share = f"{amount / total:.1%}" if total else '-'
+        writer.row(CATEGORY_COLUMNS, [category, count, _money(amount), _money(amount / count), _money(largest), share])
+
+
+def draw_report(data, username, generated=None):
+    """Lay out a ReportData as a multi-page PDF and return its bytes"""
+    generated = generated or datetime.now()
+    buffer = BytesIO()
+    title = f"BudgetBuddy Financial Report - {data.report_type.capitalize()} ({data.period})"
+    writer = PageWriter(buffer, title)
+
+    writer.heading(title, size=16)
+    writer.line(f"Generated for: {username}")
+    writer.line(f"Date: {generated:%Y-%m-%d}")
+
+    writer.heading("Financial Summary")
+    net = data.income - data.expenses
+    writer.line(f"Income: {_money(data.income)}", indent=20)
+    writer.line(f"Expenses: {_money(data.expenses)}", indent=20)
+    writer.line(f"Savings: {_money(net)}", indent=20)
+    if data.income:
+        writer.line(f"Savings rate: {net / data.income:.1%}", indent=20)
+    writer.line(f"Transactions: {data.count}", indent=20)
+
+    if data.trend:
+        writer.heading("Daily Trend" if data.report_type == 'monthly' else "Monthly Trend")
+        writer.drawing(_trend_chart(data))
+
+    expense_rows = data.category_rows('expense')
+    if expense_rows:
+        writer.heading("Expenses by Category")
+        writer.drawing(_category_chart(expense_rows))
+        _category_table(writer, expense_rows, data.expenses)
+
+    income_rows = data.category_rows('income')
+    if income_rows:
+        writer.heading("Income by Category")
+        _category_table(writer, income_rows, data.income)
+
+    if data.appendix_rows:
+        writer.new_page()
+        writer.heading("Appendix: Transactions")
+        if data.appendix_rows < data.count:
+            writer.line(
+                f"Showing the first {data.appendix_rows} of {data.count} transactions; "
+                f"use the CSV export for the full list.", size=8
+            )
+        header = ['Date', 'Type', 'Category', 'Amount', 'Description']
+        writer.row(APPENDIX_COLUMNS, header, bold=True)
+        # Repeat the table header on every appendix page
+        writer.on_new_page = lambda: writer.row(APPENDIX_COLUMNS, header, bold=True)
+        for day, tx_type, category, amount, description in data.iter_appendix():
+            writer.row(APPENDIX_COLUMNS, [day, tx_type, category, _money(Decimal(amount)), description])
+        writer.on_new_page = None
+
+    writer.save()
+    return buffer.getvalue()
+
+
+def render_pdf(user, report_type, period, appendix_limit=None):
+    data = collect_report_data(user, report_type, period, appendix_limit)
+    try:
+        return draw_report(data, user.username)
+    finally:
+        data.close()
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from .report_pdf import render_pdf
+from .versions import get_data_version
+
+REPORT_TYPES = ('monthly', 'yearly', 'all')
+
+
+def _cache():
+    return caches[settings.REPORT_CACHE_ALIAS]
+
+
+def default_period(report_type, today=None):
+    """Period label of the current report: 'YYYY-MM', 'YYYY' or 'all'"""
+    today = today or timezone.localdate()
+    if report_type == 'monthly':
+        return f"{today:%Y-%m}"
+    if report_type == 'yearly':
+        return f"{today:%Y}"
+    return 'all'
+
+
+def report_key(user_id, report_type, period, version):
+    """Content key: the same inputs always name the same PDF"""
+    return f"report:{user_id}:{report_type}:{period}:{version}"
+
+
+def _pending_key(key):
+    return f"{key}:pending"
+
+
+def render_report(user, report_type, period):
+    """Render the PDF report for one period and return its bytes"""
+    return render_pdf(user, report_type, period)
+
+
+def build_report(user, report_type, period, key):
+    """Render a report and store it under `key` (runs in the Celery worker)"""
+    cache = _cache()
+    try:
+        cache.set(key, render_report(user, report_type, period), timeout=settings.CACHE_TTLS['report'])
+    finally:
+        cache.delete(_pending_key(key))
+
+
+def get_report(user, report_type, period):
+    """
+    Return the cached PDF for the user's current data, or None after making
+    sure a render is queued. A download of unchanged data never re-renders.
+    """
+    from ..tasks import generate_report_task
+
+    cache = _cache()
+    key = report_key(user.id, report_type, period, get_data_version(user.id))
+    pdf = cache.get(key)
+    if pdf is not None:
+        return pdf
+
+    # Only the first request for a key enqueues; polls while it renders do not
+    if cache.add(_pending_key(key), True, timeout=settings.REPORT_RENDER_TIMEOUT):
+        generate_report_task.delay(user.id, report_type, period, key)
+        # Set already when tasks run eagerly (no broker configured)
+        pdf = cache.get(key)
+    return pdf
@@ -0,0 +1,223 @@
+from datetime import date
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum, Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+from ..models import Transaction, MonthlyRollup
+
+_date_field = Transaction._meta.get_field('date')
+_amount_field = Transaction._meta.get_field('amount')
+
+
+def rollup_key(values):
+    """Rollup row key for a dict of Transaction field values"""
+    day = _date_field.to_python(values['date'])
+    return {
+        'user_id': values['user_id'],
+        'year': day.year,
+        'month': day.month,
+        'type': values['type'],
+        'category': values['category'],
+    }
+
+
+def apply_delta(key, amount, count):
+    """Add amount/count to one rollup row, creating it on first use"""
+    updated = MonthlyRollup.objects.filter(**key).update(
+        total=F('total') + amount,
+        count=F('count') + count
+    )
+    if updated or count < 0:
+        # Nothing to create for a removal whose row is already gone
+        # (e.g. the user itself is being deleted)
+        return
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.create(total=amount, count=count, **key)
+    except IntegrityError:
+        # Another writer created the row first
+        MonthlyRollup.objects.filter(**key).update(
+            total=F('total') + amount,
+            count=F('count') + count
+        )
+
+
+def record_change(old=None, new=None):
+    """
+    Move a transaction's contribution from its old rollup row to its new one.
+    `old` / `new` are dicts of Transaction.TRACKED_FIELDS values; pass only
+    `new` for an insert and only `old` for a delete.
+    """
+    deltas = {}
+    if old is not None:
+        key = rollup_key(old)
+        amount = _amount_field.to_python(old['amount'])
+        deltas[tuple(key.items())] = [-amount, -1]
+    if new is not None:
+        key = tuple(rollup_key(new).items())
+        amount = _amount_field.to_python(new['amount'])
+        delta = deltas.setdefault(key, [0, 0])
+        delta[0] += amount
+        delta[1] += 1
+
+    for key, (amount, count) in deltas.items():
+        if amount or count:
+            apply_delta(dict(key), amount, count)
+
+
+def record_bulk_insert(transactions):
+    """
+    Fold a batch of newly inserted transactions into the rollups with a
+    fixed number of queries, however many months and categories it spans:
+    one finds the existing rows, one UPDATE adds to them and one INSERT
+    creates the rest.
+    """
+    deltas = {}
+    for tx in transactions:
+        key = tuple(rollup_key({name: getattr(tx, name) for name in Transaction.TRACKED_FIELDS}).values())
+        delta = deltas.setdefault(key, [0, 0])
+        delta[0] += _amount_field.to_python(tx.amount)
+        delta[1] += 1
+    if not deltas:
+        return
+
+    fields = ('user_id', 'year', 'month', 'type', 'category')
+    candidates = MonthlyRollup.objects.filter(
+        user_id__in={key[0] for key in deltas},
+        year__in={key[1] for key in deltas},
+        month__in={key[2] for key in deltas},
+    ).only('id', *fields)
+    existing = {}
+    for row in candidates:
+        key = tuple(getattr(row, name) for name in fields)
+        if key in deltas:
+            amount, count = deltas[key]
+            # Added in the database, so concurrent writers' deltas are kept
+            row.total = F('total') + amount
+            row.count = F('count') + count
+            existing[key] = row
+    if existing:
+        MonthlyRollup.objects.bulk_update(existing.values(), ['total', 'count'])
+
+    missing = [key for key in deltas if key not in existing]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.bulk_create([
+                MonthlyRollup(total=deltas[key][0], count=deltas[key][1], **dict(zip(fields, key)))
+                for key in missing
+            ])
+    except IntegrityError:
+        # Another writer created some of the rows first
+        for key in missing:
+            apply_delta(dict(zip(fields, key)), *deltas[key])
+
+
+def rebuild_rollups(user=None):
+    """Recompute rollups from the raw transactions (optionally for one user)"""
+    transactions = Transaction.objects.all()
+    rollups = MonthlyRollup.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+        rollups = rollups.filter(user=user)
+
+    rows = transactions.annotate(
+        year=ExtractYear('date'),
+        month=ExtractMonth('date'),
+    ).values('user_id', 'year', 'month', 'type', 'category').annotate(
+        total=Sum('amount'),
+        count=Count('id'),
+    ).order_by()
+
+    with transaction.atomic():
+        rollups.delete()
+        created = MonthlyRollup.objects.bulk_create(
+            (MonthlyRollup(**row) for row in rows.iterator()),
+            batch_size=1000
+        )
+    return len(created)
+
+
+def last_n_months(today, n):
+    """(year, month) pairs for the n months ending with today's, oldest first"""
+    months = []
+    year, month = today.year, today.month
+    for _ in range(n):
+        months.append((year, month))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+
+def _monthly_rows(user, months):
+    window = Q()
+    for year, month in months:
+        window |= Q(year=year, month=month)
+    return MonthlyRollup.objects.filter(window, user=user).values(
+        'year', 'month', 'type'
+    ).annotate(total=Sum('total')).order_by()
+
+
+def _fold_monthly(rows, months):
+    totals = {(year, month): {'income': 0, 'expenses': 0} for year, month in months}
+    for row in rows:
+        field = 'income' if row['type'] == 'income' else 'expenses'
+        totals[(row['year'], row['month'])][field] = row['total']
+    return [
+        {
+            'month': date(year, month, 1).strftime('%b %Y'),
+            'income': float(totals[(year, month)]['income']),
+            'expenses': float(totals[(year, month)]['expenses']),
+        }
+        for year, month in months
+    ]
+
+
+def monthly_totals(user, months):
+    """Income and expenses for each (year, month) pair, in one query"""
+    return _fold_monthly(_monthly_rows(user, months), months)
+
+
+async def amonthly_totals(user, months):
+    return _fold_monthly([row async for row in _monthly_rows(user, months)], months)
+
+
+def _category_rows(user, year=None, month=None):
+    rows = MonthlyRollup.objects.filter(user=user, count__gt=0)
+    if year is not None:
+        rows = rows.filter(year=year)
+    if month is not None:
+        rows = rows.filter(month=month)
+    return rows.values('type', 'category').annotate(
+        total=Sum('total'),
+        count=Sum('count'),
+    ).order_by()
+
+
+def _fold_categories(rows):
+    income = expenses = 0
+    categories = []
+    for row in rows:
+        if row['type'] == 'income':
+            income += row['total']
+        else:
+            expenses += row['total']
+            categories.append({
+                'category': row['category'],
+                'total': row['total'],
+                'count': row['count'],
+            })
+    categories.sort(key=lambda cat: cat['total'], reverse=True)
+    return {'income': income, 'expenses': expenses, 'categories': categories}
+
+
+def category_breakdown(user, year=None, month=None):
+    """
+    Income, expenses and per-category expense totals for a user, optionally
+    limited to a year or a single month, read from the rollups in one query.
+    Categories are ordered by total, largest first.
+    """
+    return _fold_categories(_category_rows(user, year, month))
+
+
+async def acategory_breakdown(user, year=None, month=None):
+    return _fold_categories([row async for row in _category_rows(user, year, month)])
@@ -0,0 +1,120 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from ..cache_backends import is_shared
+from ..models import Transaction, SavingsGoal
+from . import rollups
+from .cache_metrics import HitCounter
+from .dashboard import aget_dashboard_totals, get_dashboard_totals
+from .versions import get_data_version
+
+RECENT_TRANSACTIONS = 5
+TREND_MONTHS = 6
+
+summary_counter = HitCounter(settings.SUMMARY_CACHE_ALIAS, 'summary')
+
+
+def _cache():
+    return caches[settings.SUMMARY_CACHE_ALIAS]
+
+
+def summary_cache_enabled():
+    """
+    Summaries are only cached when the cache and the data versions are
+    shared: with a per-process cache another worker's write never bumps
+    this process's version, and its summary would be served for 24 hours.
+    """
+    return is_shared(_cache()) and is_shared(caches[settings.DATA_VERSION_CACHE_ALIAS])
+
+
+def summary_key(user_id, version, today):
+    # The day is part of the key because month-to-date and upcoming-bill
+    # figures and the six-month window move with it
+    return f"summary:{user_id}:{version}:{today.isoformat()}"
+
+
+def _assemble(totals, breakdown, monthly, recent, savings_goal):
+    from ..serializers import SavingsGoalSerializer, TransactionSerializer
+
+    return {
+        'income': totals['income'],
+        'expenses': totals['expenses'],
+        'month_expenses': totals['month_expenses'],
+        'upcoming_bills': totals['upcoming_bills'],
+        'categories': breakdown['categories'],
+        'monthly': monthly,
+        'recent_transactions': [dict(row) for row in TransactionSerializer(recent, many=True).data],
+        'savings_goal': dict(SavingsGoalSerializer(savings_goal).data) if savings_goal else None,
+    }
+
+
+def _recent(user):
+    return Transaction.objects.filter(user=user).order_by('-date', '-id')[:RECENT_TRANSACTIONS]
+
+
+def build_summary(user, today):
+    """Every per-user figure the dashboard, chatbot and trend views share"""
+    return _assemble(
+        get_dashboard_totals(user, today=today),
+        rollups.category_breakdown(user),
+        rollups.monthly_totals(user, rollups.last_n_months(today, TREND_MONTHS)),
+        list(_recent(user)),
+        SavingsGoal.objects.filter(user=user).first(),
+    )
+
+
+async def abuild_summary(user, today):
+    """build_summary with its five independent queries awaited together"""
+    async def recent():
+        return [tx async for tx in _recent(user)]
+
+    return _assemble(*await asyncio.gather(
+        aget_dashboard_totals(user, today=today),
+        rollups.acategory_breakdown(user),
+        rollups.amonthly_totals(user, rollups.last_n_months(today, TREND_MONTHS)),
+        recent(),
+        SavingsGoal.objects.filter(user=user).afirst(),
+    ))
+
+
+def get_summary(user, today=None):
+    """
+    The user's financial summary, read through a cache keyed by the user's
+    data version. Any write to their transactions, budgets or savings goal
+    bumps the version, so a summary is never served after the data changed.
+    """
+    today = today or timezone.localdate()
+    if not summary_cache_enabled():
+        return build_summary(user, today)
+    cache = _cache()
+    key = summary_key(user.id, get_data_version(user.id), today)
+    summary = cache.get(key)
+    if summary is not None:
+        summary_counter.record(hits=1)
+        return summary
+
+    summary_counter.record(misses=1)
+    summary = build_summary(user, today)
+    cache.set(key, summary, timeout=settings.CACHE_TTLS['summary'])
+    return summary
+
+
+async def aget_summary(user, today=None):
+    """get_summary for async views; the cache is read and written the same way"""
+    today = today or timezone.localdate()
+    if not summary_cache_enabled():
+        return await abuild_summary(user, today)
+    cache = _cache()
+    version = await sync_to_async(get_data_version)(user.id)
+    key = summary_key(user.id, version, today)
+    summary = await cache.aget(key)
+    if summary is not None:
+        await sync_to_async(summary_counter.record)(hits=1)
+        return summary
+
+    await sync_to_async(summary_counter.record)(misses=1)
+    summary = await abuild_summary(user, today)
+    await cache.aset(key, summary, timeout=settings.CACHE_TTLS['summary'])
+    return summary
@@ -0,0 +1,42 @@
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def _cache():
+    return caches[settings.DATA_VERSION_CACHE_ALIAS]
+
+
+def _key(user_id):
+    return f"dataversion:{user_id}"
+
+
+def get_data_version(user_id):
+    """
+    Opaque counter identifying the current state of a user's financial
+    data; cached content keyed by it can never be served after a write.
+    """
+    cache = _cache()
+    version = cache.get(_key(user_id))
+    if version is None:
+        # Missing or evicted: start from a fresh value that cannot collide
+        # with one an old cache entry was stored under
+        cache.add(_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(_key(user_id))
+    return version
+
+
+def bump_data_version(user_id):
+    # A fresh value rather than incr(): the file backend's incr is a read
+    # and a write, so two workers bumping at once could both store v + 1
+    # and a summary cached under v + 1 between them would outlive a write
+    _cache().set(_key(user_id), time.time_ns(), timeout=None)
+
+
+def bump_data_version_on_commit(user_id):
+    """
+    Bump once the surrounding transaction commits, so a render that reads
+    the new version also sees the new rows.
+    """
+    transaction.on_commit(lambda: bump_data_version(user_id))
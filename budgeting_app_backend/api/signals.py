@@ -0,0 +1,98 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+from .models import Transaction, Budget, SavingsGoal, Notification
+from .services import events, ledger, rollups
+from .services.notifications import invalidate_unread_counts
+from .services.versions import bump_data_version_on_commit
+
+
+def _tracked_values(instance):
+    return {name: getattr(instance, name) for name in Transaction.TRACKED_FIELDS}
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_transaction(sender, instance, raw, **kwargs):
+    """Load the stored values of an update that did not come from the DB"""
+    if raw or instance._state.adding or hasattr(instance, '_loaded_values'):
+        return
+    instance._loaded_values = Transaction.objects.filter(pk=instance.pk).values(
+        *Transaction.TRACKED_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender=Transaction)
+def update_totals_on_save(sender, instance, created, raw, **kwargs):
+    """
+    Keep the monthly rollups and the running ledger in step with the write,
+    and push what changed to the user's open event streams
+    """
+    if raw:
+        return
+    old = None if created else getattr(instance, '_loaded_values', None)
+    new = _tracked_values(instance)
+    rollups.record_change(old=old, new=new)
+    ledger.record_change(old=old, new=new)
+    events.transaction_changed(instance, old=old, new=new)
+    instance._loaded_values = new
+
+
+@receiver(post_delete, sender=Transaction)
+def update_totals_on_delete(sender, instance, **kwargs):
+    old = getattr(instance, '_loaded_values', None) or _tracked_values(instance)
+    rollups.record_change(old=old)
+    ledger.record_change(old=old)
+    events.transaction_changed(instance, old=old)
+
+
+# bulk_create() skips post_save, so bulk writers send this instead with the
+# list of inserted Transaction instances
+transactions_bulk_created = Signal()
+
+
+@receiver(transactions_bulk_created)
+def update_totals_on_bulk_create(sender, transactions, **kwargs):
+    rollups.record_bulk_insert(transactions)
+    ledger.record_bulk_insert(transactions)
+    events.transactions_imported(transactions)
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+@receiver(post_save, sender=SavingsGoal)
+@receiver(post_delete, sender=SavingsGoal)
+def bump_version_on_write(sender, instance, raw=False, **kwargs):
+    """Invalidate content cached against the user's data version"""
+    if raw:
+        return
+    bump_data_version_on_commit(instance.user_id)
+
+
+@receiver(transactions_bulk_created)
+def bump_version_on_bulk_create(sender, transactions, **kwargs):
+    for user_id in {tx.user_id for tx in transactions}:
+        bump_data_version_on_commit(user_id)
+
+
+@receiver(post_save, sender=Notification)
+def invalidate_unread_count_on_save(sender, instance, created, raw=False, **kwargs):
+    # Deliberately no post_delete receiver: it would stop the retention
+    # job's batched deletes from being a single DELETE each, and only read
+    # notifications are pruned
+    if raw:
+        return
+    invalidate_unread_counts([instance.user_id])
+    if created:
+        events.notifications_created([instance])
+
+
+@receiver(post_save, sender=Budget)
+def push_budget_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        events.budget_changed(instance)
+
+
+@receiver(post_delete, sender=Budget)
+def push_budget_on_delete(sender, instance, **kwargs):
+    events.budget_changed(instance, deleted=True)
@@ -1,16 +1,63 @@
 # api/tasks.py
 from celery import shared_task
+from django.conf import settings
 from django.core.mail import send_mail
-from .ml.model_trainer import train_model
-import mlflow
+
+RETRAIN_MODES = ('incremental', 'full')
 
 @shared_task
-def retrain_model_task():
-    """Celery task for periodic model retraining"""
+def retrain_model_task(mode=None):
+    """
+    Celery task for periodic model retraining. 'incremental' (the default,
+    settings.ML_RETRAIN_MODE) only consumes transactions added since the
+    last run; 'full' refits the configured pipeline on the whole table.
+    """
+    # Imported here: every process that queues a report imports this
+    # module, and should not load scikit-learn and MLflow for it
+    import mlflow
+    from .ml.incremental import train_incremental
+    from .ml.model_trainer import train_model
+
+    mode = mode or settings.ML_RETRAIN_MODE
     try:
+        if mode not in RETRAIN_MODES:
+            raise ValueError(f"Unknown retrain mode '{mode}'")
         with mlflow.start_run(run_name="Scheduled Retraining"):
-            model = train_model()
             mlflow.log_param("trigger", "scheduled")
-            return "Model retrained successfully"
+            mlflow.log_param("retrain_mode", mode)
+            if mode == 'full':
+                # Scheduled runs always re-extract so the snapshot tracks the DB
+                model = train_model(refresh_snapshot=True)
+                return "Model retrained successfully"
+            model, rows = train_incremental()
+            mlflow.log_metric("rows_consumed", rows)
+            return f"Model updated with {rows} new transactions"
     except Exception as e:
-        return f"Retraining failed: {str(e)}"
\ No newline at end of file
+        return f"Retraining failed: {str(e)}"
+
+@shared_task
+def generate_report_task(user_id, report_type, period, key):
+    """Render a PDF report into the report cache under its content key"""
+    from django.contrib.auth.models import User
+    from .services.reports import build_report
+    
+    user = User.objects.get(pk=user_id)
+    build_report(user, report_type, period, key)
+    return key
+
+@shared_task
+def evaluate_notification_rules_task():
+    """
+    Periodic task (CELERY_BEAT_SCHEDULE) creating bill, budget and savings
+    notifications for every user; repeats are dropped by the database.
+    """
+    from .services.notification_rules import evaluate_rules
+    
+    return f"Evaluated {evaluate_rules()} notification(s)"
+
+@shared_task
+def prune_notifications_task():
+    """Daily task deleting read notifications past NOTIFICATION_RETENTION_DAYS"""
+    from .services.notifications import prune_read_notifications
+    
+    return f"Deleted {prune_read_notifications()} read notification(s)"
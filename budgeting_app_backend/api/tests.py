@@ -1,7 +1,58 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
+from asgiref.sync import sync_to_async
+from unittest import skipUnless
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.core.cache import cache, caches
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction as db_transaction
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+from .models import Transaction, SavingsGoal, Notification, Budget, MonthlyRollup, LedgerSummary
+from django.core.files.uploadedfile import SimpleUploadedFile
+from .services.periods import period_bounds
+from .serializers import CategorizeBatchSerializer
+from .ml.data_preprocessor import FEATURE_COLUMNS, add_features, create_training_data, load_training_data
+from .ml.model_trainer import FEATURE_MODES, build_pipeline
+from .ml.predictor import TransactionClassifier
+from .ml.registry import ModelRegistry, ModelUnavailable, read_training_state, save_model, write_training_state
+from .ml.incremental import train_incremental
+from .ml.synthetic import synthetic_transactions
+from .ml import cache as ml_cache
+from .services import reports
+from .services.report_pdf import collect_report_data, render_pdf
+from .services.budgets import budget_statuses
+from .services.ledger import check_ledgers, get_ledger
+from .services.notification_rules import evaluate_rules
+from .services.notifications import prune_read_notifications
+from .event_layers import RESYNC, InMemoryEventLayer
+from .services.chatbot import resolve_intent
+from .services.summary import get_summary, summary_counter, summary_key
+from .services.versions import bump_data_version, get_data_version
+from .signals import transactions_bulk_created
+from .tasks import evaluate_notification_rules_task, prune_notifications_task
+from budgeting_app_backend.cache_config import parse_cache_url
+from scipy.sparse import issparse
+import csv
+import gzip
 import json
 
 class APITests(TestCase):
@@ -13,4 +64,1619 @@ class APITests(TestCase):
         data = {'description': 'Grocery shopping'}
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn('category', response.json())
\ No newline at end of file
+        self.assertIn('category', response.json())
+
+class DashboardQueryCountTests(TestCase):
+    # summary on a cache miss (ledger, month/bill window aggregate, category
+    # and monthly rollups, recent transactions, savings goal), notification list
+    DASHBOARD_MAX_QUERIES = 7
+    # cached summary: only the notification list remains
+    DASHBOARD_CACHED_QUERIES = 1
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='dash', password='secret123')
+        SavingsGoal.objects.create(user=self.user, target_amount=1000)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def add_transactions(self, count):
+        today = timezone.localdate()
+        created = Transaction.objects.bulk_create([
+            Transaction(user=self.user, type='expense', amount=Decimal('300.00'),
+                        description=f'Electricity bill {i}', category='utilities', date=today)
+            for i in range(count)
+        ] + [
+            Transaction(user=self.user, type='income', amount=Decimal('1000.00'),
+                        description='Salary', category='salary', date=today)
+        ])
+        # bulk_create() sends no signals; bulk writers announce their rows
+        transactions_bulk_created.send(sender=Transaction, transactions=created)
+        # (its version bump waits for an on_commit that TestCase never runs)
+        bump_data_version(self.user.id)
+
+    def get_dashboard(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(ctx.captured_queries), self.DASHBOARD_MAX_QUERIES)
+        return response, len(ctx.captured_queries)
+
+    def test_totals_and_notifications(self):
+        self.add_transactions(10)
+        response, _ = self.get_dashboard()
+        self.assertEqual(Decimal(response.data['income']), Decimal('1000.00'))
+        self.assertEqual(Decimal(response.data['expenses']), Decimal('3000.00'))
+        # Read-only: notifications come from the rule engine task
+        self.assertEqual(response.data['notifications'], [])
+        self.assertFalse(Notification.objects.filter(user=self.user).exists())
+
+        evaluate_rules()
+        response, _ = self.get_dashboard()
+        titles = {n['title'] for n in response.data['notifications']}
+        self.assertEqual(titles, {'Upcoming Bill'})
+
+    def test_query_count_independent_of_history_size(self):
+        self.add_transactions(5)
+        self.get_dashboard()
+        _, small = self.get_dashboard()
+        self.add_transactions(200)
+        self.get_dashboard()
+        _, large = self.get_dashboard()
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, self.DASHBOARD_CACHED_QUERIES)
+
+
+class MonthlyRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='rollup', password='secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.localdate()
+
+    def rollup_rows(self):
+        return {
+            (r.year, r.month, r.type, r.category): (r.total, r.count)
+            for r in MonthlyRollup.objects.filter(user=self.user, count__gt=0)
+        }
+
+    def test_rollups_follow_transaction_writes(self):
+        response = self.client.post(reverse('transactions'), {
+            'type': 'expense', 'amount': '40.00', 'description': 'Groceries',
+            'category': 'food', 'date': self.today.isoformat()
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        key = (self.today.year, self.today.month, 'expense', 'food')
+        self.assertEqual(self.rollup_rows(), {key: (Decimal('40.00'), 1)})
+
+        pk = response.data['id']
+        self.client.put(reverse('transaction-detail', args=[pk]), {
+            'type': 'expense', 'amount': '25.00', 'description': 'Bus pass',
+            'category': 'transportation', 'date': self.today.isoformat()
+        }, format='json')
+        moved = (self.today.year, self.today.month, 'expense', 'transportation')
+        self.assertEqual(self.rollup_rows(), {moved: (Decimal('25.00'), 1)})
+
+        self.client.delete(reverse('transaction-detail', args=[pk]))
+        self.assertEqual(self.rollup_rows(), {})
+
+    def test_rebuild_matches_incremental(self):
+        for amount, category in [(10, 'food'), (15, 'food'), (99, 'housing')]:
+            Transaction.objects.create(user=self.user, type='expense', amount=amount,
+                                       description='x', category=category, date=self.today)
+        incremental = self.rollup_rows()
+        MonthlyRollup.objects.all().delete()
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.rollup_rows(), incremental)
+
+    def test_monthly_view_reads_rollups(self):
+        Transaction.objects.create(user=self.user, type='income', amount=500,
+                                   description='Salary', category='salary', date=self.today)
+        response = self.client.get(reverse('monthly-transactions'))
+        # Served from the summary cache until the user's data changes
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('monthly-transactions')).data, response.data)
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(response.data[-1]['income'], 500.0)
+        self.assertEqual(response.data[-1]['month'], self.today.strftime('%b %Y'))
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN output is SQLite specific")
+class IndexUsageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='explain', password='secret123')
+        self.today = timezone.localdate()
+
+    def test_type_date_range_uses_composite_index(self):
+        start, end = period_bounds('monthly', self.today)
+        plan = Transaction.objects.filter(
+            user=self.user, type='expense', date__gte=start, date__lte=end
+        ).explain()
+        self.assertIn('txn_user_type_date_idx', plan)
+
+    def test_category_date_range_uses_composite_index(self):
+        start, end = period_bounds('weekly', self.today)
+        plan = Transaction.objects.filter(
+            user=self.user, type='expense', category='food', date__gte=start, date__lte=end
+        ).explain()
+        self.assertIn('txn_user_type_cat_date_idx', plan)
+
+    def test_unread_notifications_use_partial_index(self):
+        plan = Notification.objects.filter(
+            user=self.user, is_read=False
+        ).order_by('-created_at').explain()
+        self.assertIn('notif_user_unread_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_notification_feed_uses_composite_index(self):
+        plan = Notification.objects.filter(user=self.user).order_by('-created_at').explain()
+        self.assertIn('notif_user_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_notification_retention_uses_partial_index(self):
+        plan = Notification.objects.filter(
+            is_read=True, created_at__lt=timezone.now()
+        ).order_by('created_at').values('pk').explain()
+        self.assertIn('notif_read_created_idx', plan)
+
+    def test_period_bounds(self):
+        day = date(2024, 2, 14)  # Wednesday
+        self.assertEqual(period_bounds('weekly', day), (date(2024, 2, 12), date(2024, 2, 18)))
+        self.assertEqual(period_bounds('monthly', day), (date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertEqual(period_bounds('yearly', day), (date(2024, 1, 1), date(2024, 12, 31)))
+
+
+class BudgetQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='budgets', password='secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.localdate()
+        for category in ['food', 'housing', 'health']:
+            Transaction.objects.create(user=self.user, type='expense', amount=50,
+                                       description='x', category=category, date=self.today)
+
+    def get_budgets(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('budgets'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_constant_as_budgets_grow(self):
+        Budget.objects.create(user=self.user, category='food', limit=100, period='weekly')
+        Budget.objects.create(user=self.user, category='food', limit=400, period='monthly')
+        Budget.objects.create(user=self.user, category='food', limit=4000, period='yearly')
+        _, few = self.get_budgets()
+
+        for category in ['housing', 'health', 'education', 'utilities']:
+            for period in ['weekly', 'monthly', 'yearly']:
+                Budget.objects.create(user=self.user, category=category, limit=100, period=period)
+        response, many = self.get_budgets()
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.data), 15)
+
+    def test_spent_and_progress(self):
+        Budget.objects.create(user=self.user, category='food', limit=200, period='monthly')
+        Budget.objects.create(user=self.user, category='education', limit=100, period='yearly')
+        response, _ = self.get_budgets()
+        by_category = {b['category']: b for b in response.data}
+        self.assertEqual(by_category['food']['spent'], Decimal('50.00'))
+        self.assertEqual(by_category['food']['progress'], Decimal('25'))
+        self.assertEqual(by_category['education']['spent'], 0)
+
+    def test_status_service_reads_one_grouped_query_per_period(self):
+        old = self.today - timedelta(days=400)
+        Transaction.objects.create(user=self.user, type='expense', amount=500,
+                                   description='x', category='food', date=old)
+        weekly = Budget.objects.create(user=self.user, category='food', limit=100, period='weekly')
+        yearly = Budget.objects.create(user=self.user, category='food', limit=1000, period='yearly')
+        housing = Budget.objects.create(user=self.user, category='housing', limit=40, period='yearly')
+        Budget.objects.create(user=self.user, category='health', limit=100, period='monthly')
+        with self.assertNumQueries(4):
+            statuses = budget_statuses(self.user)
+        self.assertEqual(statuses[weekly.id]['spent'], Decimal('50'))
+        self.assertEqual(statuses[yearly.id]['remaining'], Decimal('950'))
+        self.assertEqual(statuses[housing.id]['remaining'], Decimal('-10'))
+
+    def test_created_budget_reports_its_status(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('budgets'), {'category': 'food', 'limit': '200.00', 'period': 'weekly'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['spent'], Decimal('50.00'))
+        self.assertEqual(response.data['progress'], Decimal('25'))
+        self.assertEqual(sum('"api_transaction"' in q['sql'] for q in ctx.captured_queries), 1)
+
+
+class TransactionListingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='lister', password='secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        start = date(2024, 1, 1)
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, type='expense' if i % 2 else 'income',
+                        amount=Decimal(i + 1), description=f'Coffee {i}' if i % 3 == 0 else f'Item {i}',
+                        category='food' if i % 2 else 'salary',
+                        date=start + timedelta(days=i // 3))
+            for i in range(30)
+        ])
+
+    def fetch_all(self, params):
+        results, url, pages = [], reverse('transactions'), 0
+        while url:
+            response = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results.extend(response.data['results'])
+            url = response.data['next']
+            pages += 1
+        return results, pages
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        results, pages = self.fetch_all({'page_size': 7})
+        self.assertEqual(pages, 5)
+        ids = [row['id'] for row in results]
+        self.assertEqual(len(ids), 30)
+        self.assertEqual(len(set(ids)), 30)
+        keys = [(row['date'], row['id']) for row in results]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_filters(self):
+        results, _ = self.fetch_all({
+            'type': 'expense', 'min_amount': '5', 'max_amount': '20',
+            'date_from': '2024-01-02', 'search': 'coffee',
+        })
+        self.assertEqual(sorted(Decimal(r['amount']) for r in results), [Decimal(10), Decimal(16)])
+
+    def test_sparse_fieldset(self):
+        response = self.client.get(reverse('transactions'), {'fields': 'id,amount'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'amount'})
+
+    def test_invalid_parameters(self):
+        response = self.client.get(reverse('transactions'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('transactions'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_query_count_is_constant(self):
+        first = self.client.get(reverse('transactions'), {'page_size': 5})
+        with self.assertNumQueries(1):
+            self.client.get(first.data['next'])
+
+
+def build_test_classifier(rows=300):
+    """Small classifier trained on synthetic data, independent of the shipped model"""
+    train = add_features(synthetic_transactions(rows, seed=1))
+    model = build_pipeline().set_params(classifier__max_iter=10)
+    model.fit(train[FEATURE_COLUMNS], train['category'])
+    return TransactionClassifier(model=model)
+
+
+def serve_test_classifier(test, classifier, version='test-v1'):
+    """Route the categorize endpoints to `classifier` with an empty prediction cache"""
+    registry = mock.Mock()
+    registry.current.return_value = (classifier, version)
+    patcher = mock.patch.object(ml_cache, 'get_registry', return_value=registry)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    cache.clear()
+    return registry
+
+
+class BatchCategorizeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.classifier = build_test_classifier()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ml', password='secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        serve_test_classifier(self, self.classifier)
+
+    def test_predict_many_matches_single_predictions(self):
+        descriptions = ['uber ride', 'monthly rent', 'netflix subscription']
+        amounts = [20, 1200, 15]
+        dates = [date(2024, 3, d) for d in (1, 2, 3)]
+        categories, probabilities = self.classifier.predict_many(descriptions, amounts, dates)
+        self.assertEqual(probabilities.shape, (3, len(self.classifier.classes)))
+        for i, args in enumerate(zip(descriptions, amounts, dates)):
+            category, row = self.classifier.predict(*args)
+            self.assertEqual(category, categories[i])
+            self.assertTrue((row == probabilities[i]).all())
+
+    def test_batch_endpoint(self):
+        response = self.client.post(reverse('predict_category_batch'), {'transactions': [
+            {'description': 'grocery store', 'amount': '80.00', 'date': '2024-03-01'},
+            {'description': 'uber ride'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIn(response.data['results'][0]['category'], self.classifier.classes)
+
+    def test_batch_endpoint_validation(self):
+        response = self.client.post(reverse('predict_category_batch'), {'transactions': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('predict_category_batch'), {'transactions': [
+            {'description': 'x'}
+        ] * (CategorizeBatchSerializer.MAX_BATCH_SIZE + 1)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+
+class ModelRegistryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = build_test_classifier().model
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'model.joblib')
+
+    def test_loads_lazily_on_first_use(self):
+        save_model(self.model, self.path)
+        registry = ModelRegistry(self.path, mmap_mode='r')
+        self.assertIsNone(registry.version)
+        classifier = registry.get()
+        self.assertIsNotNone(registry.version)
+        self.assertIs(registry.get(), classifier)
+
+    def test_swaps_in_new_model_file(self):
+        save_model(self.model, self.path)
+        registry = ModelRegistry(self.path, check_interval=0)
+        first, version = registry.get(), registry.version
+        # Make sure the rewrite is visible as a new mtime
+        os.utime(self.path, ns=(0, 0))
+        self.assertIsNot(registry.get(), first)
+        self.assertNotEqual(registry.version, version)
+
+    def test_missing_model_file(self):
+        registry = ModelRegistry(self.path)
+        with self.assertRaises(ModelUnavailable):
+            registry.get()
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='nomodel', password='secret123'))
+        with mock.patch.object(ml_cache, 'get_registry', return_value=registry):
+            response = client.post(reverse('predict_category'), {'description': 'rent'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_keeps_serving_when_file_disappears(self):
+        save_model(self.model, self.path)
+        registry = ModelRegistry(self.path, check_interval=0)
+        classifier = registry.get()
+        os.remove(self.path)
+        self.assertIs(registry.get(), classifier)
+
+
+
+class PredictionCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.classifier = build_test_classifier()
+
+    def setUp(self):
+        self.registry = serve_test_classifier(self, self.classifier)
+        self.day = date(2024, 3, 4)
+
+    def categorize(self, descriptions, amounts):
+        with mock.patch.object(self.classifier, 'predict_many', wraps=self.classifier.predict_many) as spy:
+            _, categories, _ = ml_cache.categorize(descriptions, amounts, [self.day] * len(descriptions))
+        rows = sum(len(call.args[0]) for call in spy.call_args_list)
+        return list(categories), rows
+
+    def test_repeated_descriptions_skip_the_model(self):
+        first, rows = self.categorize(['Netflix', 'Uber  ride', 'rent'], [15, 20, 1200])
+        self.assertEqual(rows, 3)
+        second, rows = self.categorize(['netflix', 'uber ride', 'Rent', 'pharmacy'], [14, 18, 1300, 30])
+        self.assertEqual(rows, 1)
+        self.assertEqual(second[:3], first)
+        self.assertEqual(ml_cache.prediction_cache.stats()['hits'], 3)
+        self.assertEqual(ml_cache.prediction_cache.stats()['misses'], 4)
+
+    def test_amount_bucket_and_weekday_are_part_of_the_key(self):
+        self.categorize(['rent'], [90])
+        _, rows = self.categorize(['rent'], [150])
+        self.assertEqual(rows, 1)
+        ml_cache.categorize(['rent'], [90], [self.day + timedelta(days=1)])
+        self.assertEqual(ml_cache.prediction_cache.stats()['misses'], 3)
+
+    def test_new_model_version_invalidates(self):
+        self.categorize(['netflix'], [15])
+        self.registry.current.return_value = (self.classifier, 'test-v2')
+        _, rows = self.categorize(['netflix'], [15])
+        self.assertEqual(rows, 1)
+
+    def test_stats_endpoint_is_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='plain', password='secret123'))
+        self.assertEqual(client.get(reverse('prediction_cache_stats')).status_code, status.HTTP_403_FORBIDDEN)
+        client.force_authenticate(User.objects.create_user(username='staff', password='secret123', is_staff=True))
+        response = client.get(reverse('prediction_cache_stats'))
+        self.assertEqual(set(response.data), {'hits', 'misses', 'hit_rate'})
+
+
+class TrainingFeatureModeTests(TestCase):
+    def test_every_mode_trains_and_predicts(self):
+        train = add_features(synthetic_transactions(300, seed=1))
+        for mode in FEATURE_MODES:
+            with self.subTest(mode=mode):
+                model = build_pipeline(mode)
+                if 'max_iter' in model.named_steps['classifier'].get_params():
+                    model.set_params(classifier__max_iter=10)
+                model.fit(train[FEATURE_COLUMNS], train['category'])
+                classifier = TransactionClassifier(model=model)
+                categories, probabilities = classifier.predict_many(['monthly rent', 'uber ride'], [1200, 20])
+                self.assertEqual(probabilities.shape, (2, len(classifier.classes)))
+
+    def test_sparse_modes_never_densify(self):
+        train = add_features(synthetic_transactions(300, seed=1))
+        for mode in ('sparse', 'hashing'):
+            with self.subTest(mode=mode):
+                preprocessor = build_pipeline(mode).named_steps['preprocessor']
+                self.assertTrue(issparse(preprocessor.fit_transform(train[FEATURE_COLUMNS])))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            build_pipeline('quantum')
+
+class TrainingDataExtractionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trainer', password='testpass123')
+        rows = synthetic_transactions(250, seed=3)
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, type='expense', amount=row.amount, description=row.description,
+                        category=row.category, date=row.date)
+            for row in rows.itertuples()
+        ])
+        self.expected = add_features(rows)
+
+    def test_chunks_build_typed_columns(self):
+        df = create_training_data(chunk_size=40)
+        self.assertEqual(len(df), 250)
+        self.assertEqual(list(df.columns), FEATURE_COLUMNS + ['category'])
+        self.assertEqual(df['amount'].dtype, 'float32')
+        self.assertEqual(df['day_of_week'].dtype, 'int8')
+        self.assertEqual(df['category'].dtype, 'category')
+        self.assertEqual(sorted(df['category'].cat.categories), sorted(self.expected['category'].unique()))
+        self.assertEqual(df['has_amount'].sum(), self.expected['has_amount'].sum())
+        self.assertEqual(
+            sorted(df['day_of_week'].tolist()),
+            sorted(self.expected['day_of_week'].tolist())
+        )
+
+    def test_snapshot_is_reused_until_refreshed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'training.parquet')
+            first = load_training_data(path, chunk_size=100)
+            self.assertTrue(os.path.exists(path))
+
+            Transaction.objects.all().delete()
+            with self.assertNumQueries(0):
+                cached = load_training_data(path)
+            self.assertEqual(len(cached), len(first))
+            self.assertEqual(cached['category'].dtype, 'category')
+
+            self.assertEqual(len(load_training_data(path, refresh=True)), 0)
+
+    def test_empty_table(self):
+        Transaction.objects.all().delete()
+        df = create_training_data()
+        self.assertEqual(len(df), 0)
+        self.assertEqual(list(df.columns), FEATURE_COLUMNS + ['category'])
+
+class IncrementalRetrainingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='incremental', password='testpass123')
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.model_path = os.path.join(tmp.name, 'model.joblib')
+
+    def add_transactions(self, n, seed):
+        rows = synthetic_transactions(n, seed=seed)
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, type='expense', amount=row.amount, description=row.description,
+                        category=row.category, date=row.date)
+            for row in rows.itertuples()
+        ])
+
+    def test_only_new_rows_are_consumed(self):
+        self.add_transactions(200, seed=1)
+        model, rows = train_incremental(self.model_path, chunk_size=64)
+        self.assertEqual(rows, 200)
+        state = read_training_state(self.model_path)
+        self.assertEqual(state['mode'], 'incremental')
+        self.assertEqual(state['high_water_mark'], Transaction.objects.latest('id').id)
+
+        self.assertEqual(train_incremental(self.model_path)[1], 0)
+
+        self.add_transactions(30, seed=2)
+        model, rows = train_incremental(self.model_path, chunk_size=64)
+        self.assertEqual(rows, 30)
+        self.assertEqual(read_training_state(self.model_path)['rows_seen'], 230)
+
+        categories, probabilities = TransactionClassifier(model=model).predict_many(['monthly rent'], [1200])
+        self.assertEqual(probabilities.shape[0], 1)
+
+    def test_rows_committed_late_below_the_mark_are_consumed_once(self):
+        with self.settings(ML_INCREMENTAL_ID_MARGIN=50):
+            self.add_transactions(200, seed=1)
+            # An insert that took its id but has not committed yet
+            pending = Transaction.objects.order_by('-id')[10]
+            pending_id = pending.id
+            pending.delete()
+            model, rows = train_incremental(self.model_path, chunk_size=64)
+            self.assertEqual(rows, 199)
+
+            # ... commits below the high water mark
+            pending.id = pending_id
+            pending.save(force_insert=True)
+            self.add_transactions(5, seed=2)
+            model, rows = train_incremental(self.model_path, chunk_size=64)
+            self.assertEqual(rows, 6)
+            self.assertEqual(train_incremental(self.model_path)[1], 0)
+            state = read_training_state(self.model_path)
+            self.assertEqual(state['rows_seen'], 205)
+            self.assertEqual(len(state['recent_ids']), 50)
+
+    def test_full_refit_forces_rebuild(self):
+        self.add_transactions(100, seed=1)
+        save_model(build_test_classifier(rows=100).model, self.model_path)
+        write_training_state({'mode': 'dense'}, self.model_path)
+
+        model, rows = train_incremental(self.model_path)
+        self.assertEqual(rows, 100)
+        self.assertEqual(type(model.named_steps['classifier']).__name__, 'SGDClassifier')
+        self.assertEqual(read_training_state(self.model_path)['mode'], 'incremental')
+
+    def test_new_category_rebuilds_from_scratch(self):
+        self.add_transactions(100, seed=1)
+        train_incremental(self.model_path)
+        Transaction.objects.create(user=self.user, type='expense', amount=10, description='mystery box',
+                                   category='legacy', date=date.today())
+
+        model, rows = train_incremental(self.model_path)
+        self.assertEqual(rows, 101)
+        self.assertIn('legacy', model.named_steps['classifier'].classes_)
+
+class TransactionImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.classifier = build_test_classifier()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        serve_test_classifier(self, self.classifier)
+
+    def upload(self, name, content, **extra):
+        return self.client.post(reverse('transaction-import'), {
+            'file': SimpleUploadedFile(name, content.encode()), **extra
+        }, format='multipart')
+
+    def test_csv_import_reports_row_errors(self):
+        content = (
+            "Date,Description,Amount,Type,Category\n"
+            "2024-03-01,grocery store,85.20,expense,food\n"
+            "2024-03-02,monthly rent,1200,expense,\n"
+            "2024-03-03,salary march,3000,income,salary\n"
+            "03/04/2024,bad date,10,expense,food\n"
+            "2024-03-05,bad category,10,expense,salary\n"
+            "2024-03-06,,10,expense,food\n"
+        )
+        response = self.upload('bank.csv', content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imported'], 3)
+        self.assertEqual(response.data['failed'], 3)
+        self.assertEqual(response.data['auto_categorized'], 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [5, 6, 7])
+
+        rent = Transaction.objects.get(user=self.user, description='monthly rent')
+        self.assertIn(rent.category, {value for value, _ in Transaction.EXPENSE_CATEGORIES})
+        # Derived rollups are kept in step through transactions_bulk_created
+        rollup_total = MonthlyRollup.objects.filter(user=self.user, type='expense').aggregate(total=Sum('total'))['total']
+        self.assertEqual(rollup_total, Decimal('1285.20'))
+
+    def test_signed_amounts_without_type(self):
+        content = "date,description,amount\n2024-03-01,coffee,-4.50\n2024-03-02,refund,20\n"
+        response = self.upload('bank.csv', content)
+        self.assertEqual(response.data['imported'], 2)
+        types = dict(Transaction.objects.filter(user=self.user).values_list('description', 'type'))
+        self.assertEqual(types, {'coffee': 'expense', 'refund': 'income'})
+
+    def test_ofx_import(self):
+        content = (
+            "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240301120000<TRNAMT>-42.10<NAME>Uber ride</STMTTRN>\n"
+            "<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20240302\n<TRNAMT>2500.00\n<NAME>Payroll\n</STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        )
+        response = self.upload('statement.qfx', content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imported'], 2)
+        payroll = Transaction.objects.get(user=self.user, description='Payroll')
+        self.assertEqual((payroll.type, payroll.amount, payroll.date), ('income', Decimal('2500.00'), date(2024, 3, 2)))
+
+    def test_missing_columns(self):
+        response = self.upload('bank.csv', "when,what\n2024-03-01,coffee\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_queries_do_not_scale_with_rows(self):
+        rows = synthetic_transactions(1200, seed=5)
+        content = "date,description,amount,type,category\n" + "".join(
+            f"2024-03-{i % 28 + 1:02d},{row.description},{row.amount:.2f},expense,{row.category if i % 2 else ''}\n"
+            for i, row in enumerate(rows.itertuples())
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.upload('bank.csv', content)
+        self.assertEqual(response.data['imported'], 1200)
+        # Chunked INSERTs plus a few rollup writes per (month, category), not per row
+        self.assertLess(len(queries), 60)
+
+class TransactionExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='testpass123')
+        other = User.objects.create_user(username='someone-else', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, type='expense', amount=Decimal('12.50'), description='coffee, "large"',
+                        category='food', date=date(2024, 3, 1)),
+            Transaction(user=self.user, type='income', amount=Decimal('3000.00'), description='salary',
+                        category='salary', date=date(2024, 3, 2)),
+            Transaction(user=self.user, type='expense', amount=Decimal('60.00'), description='bus pass',
+                        category='transportation', date=date(2024, 2, 1)),
+            Transaction(user=other, type='expense', amount=Decimal('1.00'), description='not mine',
+                        category='food', date=date(2024, 3, 1)),
+        ])
+
+    def download(self, **params):
+        response = self.client.get(reverse('transaction-export'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_export_applies_listing_filters(self):
+        response, body = self.download(type='expense')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(StringIO(body.decode())))
+        self.assertEqual(rows[0], ['id', 'date', 'type', 'category', 'amount', 'description'])
+        self.assertEqual([row[5] for row in rows[1:]], ['coffee, "large"', 'bus pass'])
+        self.assertEqual(rows[1][1:5], ['2024-03-01', 'expense', 'food', '12.50'])
+
+    def test_ndjson_export_with_fields(self):
+        response, body = self.download(output='ndjson', fields='date,amount', date_from='2024-03-01')
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(lines, [
+            {'date': '2024-03-02', 'amount': '3000.00'},
+            {'date': '2024-03-01', 'amount': '12.50'},
+        ])
+
+    def test_gzip_export(self):
+        response, body = self.download(compress='gzip')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.csv.gz', response['Content-Disposition'])
+        self.assertEqual(len(gzip.decompress(body).decode().splitlines()), 4)
+
+    def test_first_chunk_is_sent_before_the_query(self):
+        response = self.client.get(reverse('transaction-export'), HTTP_ACCEPT='text/csv')
+        chunks = iter(response.streaming_content)
+        with CaptureQueriesContext(connection) as queries:
+            header = next(chunks)
+        self.assertTrue(header.startswith(b'id,date'))
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(len(b''.join(chunks).splitlines()), 3)
+
+    def test_invalid_options(self):
+        response = self.client.get(reverse('transaction-export'), {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reporter', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Transaction.objects.create(user=self.user, type='expense', amount=50, description='groceries',
+                                   category='food', date=date(2024, 3, 5))
+        self.url = reverse('reports')
+        self.params = {'type': 'monthly', 'period': '2024-03'}
+
+    def test_unchanged_data_is_served_from_cache(self):
+        with mock.patch.object(reports, 'render_report', wraps=reports.render_report) as render:
+            response = self.client.get(self.url, self.params, HTTP_ACCEPT='application/pdf')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertTrue(response.content.startswith(b'%PDF'))
+
+            with self.assertNumQueries(0):
+                again = self.client.get(self.url, {'type': 'monthly', 'period': '2024-3'})
+            self.assertEqual(again.content, response.content)
+            self.assertEqual(render.call_count, 1)
+
+    def test_write_invalidates_cached_report(self):
+        with mock.patch.object(reports, 'render_report', wraps=reports.render_report) as render:
+            self.client.get(self.url, self.params)
+            with self.captureOnCommitCallbacks(execute=True):
+                Transaction.objects.create(user=self.user, type='expense', amount=20, description='cinema',
+                                           category='entertainment', date=date(2024, 3, 6))
+            self.client.get(self.url, self.params)
+            self.assertEqual(render.call_count, 2)
+
+    def test_pending_report_returns_poll_url(self):
+        with mock.patch('api.tasks.generate_report_task.delay') as delay:
+            response = self.client.get(self.url, self.params)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertIn('period=2024-03', response.data['poll_url'])
+            # Polling while the render is queued does not enqueue it again
+            self.assertEqual(self.client.get(response.data['poll_url']).status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(delay.call_count, 1)
+
+        user_id, report_type, period, key = delay.call_args.args
+        reports.build_report(self.user, report_type, period, key)
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_period(self):
+        response = self.client.get(self.url, {'type': 'yearly', 'period': 'last year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_queueing_does_not_load_the_classifier(self):
+        # A fresh interpreter: this one imported scikit-learn long ago
+        worker = subprocess.run(
+            [sys.executable, '-c',
+             "import django, sys; django.setup()\n"
+             "import api.tasks\n"
+             "print(sorted(name for name in ('mlflow', 'sklearn') if name in sys.modules))\n"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120, check=True,
+        )
+        self.assertEqual(worker.stdout.split('\n')[-2], '[]')
+
+class ReportEngineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='engine', password='testpass123')
+        rows = synthetic_transactions(400, seed=7)
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, type='expense', amount=row.amount, description=row.description,
+                        category=row.category, date=row.date)
+            for row in rows.itertuples()
+        ] + [
+            Transaction(user=self.user, type='income', amount=Decimal('2500.00'), description='salary',
+                        category='salary', date=date(2024, month, 25))
+            for month in range(1, 13)
+        ])
+
+    def test_single_streamed_pass(self):
+        with self.assertNumQueries(1):
+            data = collect_report_data(self.user, 'yearly', '2024', appendix_limit=50)
+        self.addCleanup(data.close)
+
+        expected = Transaction.objects.filter(user=self.user, date__year=2024).values('type').annotate(total=Sum('amount'))
+        totals = {row['type']: row['total'] for row in expected}
+        self.assertEqual(data.income, totals['income'])
+        self.assertEqual(data.expenses, totals['expense'])
+        self.assertEqual(data.count, Transaction.objects.filter(user=self.user, date__year=2024).count())
+        self.assertEqual(sum(stats[1] for stats in data.categories.values()), data.count)
+        self.assertEqual(sorted(data.trend), [f"2024-{month:02d}" for month in range(1, 13)])
+        self.assertEqual(len(list(data.iter_appendix())), 50)
+
+    def test_monthly_period_and_daily_trend(self):
+        data = collect_report_data(self.user, 'monthly', '2024-02')
+        self.addCleanup(data.close)
+        self.assertEqual(data.count, Transaction.objects.filter(user=self.user, date__year=2024, date__month=2).count())
+        self.assertTrue(all(len(bucket) == 2 for bucket in data.trend))
+
+    def test_appendix_paginates(self):
+        pdf = render_pdf(self.user, 'all', 'all')
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        # Summary page(s) plus an appendix of ~50 rows per page
+        self.assertGreater(pdf.count(b'/Type /Page\n'), 8)
+
+    def test_empty_report(self):
+        pdf = render_pdf(self.user, 'monthly', '2031-01')
+        self.assertEqual(pdf.count(b'/Type /Page\n'), 1)
+
+class SummaryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        summary_counter.reset()
+        self.user = User.objects.create_user(username='summary', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.localdate()
+
+    def write(self, method, name, data=None, args=None):
+        # Run the request's on_commit hooks, as a real commit would
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(reverse(name, args=args), data, format='json')
+
+    def dashboard(self):
+        return self.client.get(reverse('dashboard')).data
+
+    def test_transaction_writes_are_never_served_stale(self):
+        self.assertEqual(Decimal(self.dashboard()['expenses']), 0)
+        created = self.write('post', 'transactions', {
+            'type': 'expense', 'amount': '40.00', 'description': 'Groceries',
+            'category': 'food', 'date': self.today.isoformat()
+        })
+        dashboard = self.dashboard()
+        self.assertEqual(Decimal(dashboard['expenses']), Decimal('40.00'))
+        self.assertEqual([t['description'] for t in dashboard['recent_transactions']], ['Groceries'])
+
+        self.write('put', 'transaction-detail', {
+            'type': 'expense', 'amount': '25.00', 'description': 'Bus pass',
+            'category': 'transportation', 'date': self.today.isoformat()
+        }, args=[created.data['id']])
+        self.assertEqual(Decimal(self.dashboard()['expenses']), Decimal('25.00'))
+        self.assertEqual(self.client.get(reverse('monthly-transactions')).data[-1]['expenses'], 25.0)
+
+        self.write('delete', 'transaction-detail', args=[created.data['id']])
+        self.assertEqual(Decimal(self.dashboard()['expenses']), 0)
+        self.assertEqual(self.client.get(reverse('monthly-transactions')).data[-1]['expenses'], 0)
+
+    def test_savings_goal_and_budget_writes_invalidate(self):
+        # Until the user has a goal the dashboard shows an unsaved default
+        self.assertIsNone(self.dashboard()['savings_goal']['id'])
+        self.assertFalse(SavingsGoal.objects.filter(user=self.user).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            goal = SavingsGoal.objects.create(user=self.user, target_amount=1000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            goal.current_amount = 250
+            goal.save()
+        self.assertEqual(Decimal(self.dashboard()['savings_goal']['current_amount']), Decimal('250'))
+        response = self.client.post(reverse('chatbot'), {'message': 'what is my balance'}, format='json')
+        self.assertIn('$250.00 of $1000.00', response.data['response'])
+
+        before = get_summary(self.user)
+        self.write('post', 'budgets', {'category': 'food', 'limit': '300.00', 'period': 'monthly'})
+        self.assertIsNot(get_summary(self.user), before)
+
+    def test_bulk_import_invalidates(self):
+        self.dashboard()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transaction-import'), {
+                'file': SimpleUploadedFile('bank.csv', b"date,description,amount,type,category\n"
+                                                       b"2024-03-01,rent,900,expense,housing\n")
+            }, format='multipart')
+        self.assertEqual(Decimal(self.dashboard()['expenses']), Decimal('900'))
+
+    def test_hits_are_counted(self):
+        self.dashboard()
+        self.client.get(reverse('monthly-transactions'))
+        self.client.post(reverse('chatbot'), {'message': 'show my expenses'}, format='json')
+        stats = summary_counter.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+        staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.force_authenticate(user=staff)
+        response = self.client.get(reverse('summary_cache_stats'))
+        self.assertEqual(response.data['hit_rate'], 2 / 3)
+
+    def test_not_cached_on_a_per_process_cache(self):
+        # Another worker's write could not reach this process's version
+        with self.settings(CACHES={**settings.CACHES, 'shared': parse_cache_url('locmem://per-process')}):
+            self.dashboard()
+            self.dashboard()
+            self.assertEqual(summary_counter.stats()['hits'], 0)
+            self.assertIsNone(caches['default'].get(summary_key(self.user.id, get_data_version(self.user.id), self.today)))
+
+
+class ChatbotIntentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='chatter', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def ask(self, message):
+        return self.client.post(reverse('chatbot'), {'message': message}, format='json').data['response']
+
+    def test_intents_match_whole_words_in_priority_order(self):
+        self.assertEqual(resolve_intent('Hey!')[0], 'greeting')
+        self.assertEqual(resolve_intent('hi, what is my balance')[0], 'greeting')
+        self.assertEqual(resolve_intent('How are my savings?')[0], 'balance')
+        # "this" and "which" no longer read as a greeting
+        self.assertEqual(resolve_intent('which spending this month')[0], 'expenses')
+        intent, found = resolve_intent('Expense categories please')
+        self.assertEqual(intent, 'expenses')
+        self.assertIn('categories', found)
+        self.assertEqual(resolve_intent('show the latest ones')[0], 'recent')
+        self.assertEqual(resolve_intent('budgets?')[0], 'budget')
+        self.assertEqual(resolve_intent('what can you do')[0], 'unknown')
+
+    def test_greeting_and_help_fetch_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertIn('BudgetBuddy assistant', self.ask('hello'))
+            self.assertIn('I can help you with', self.ask('help'))
+            self.assertIn("I'm not sure I understand", self.ask('tell me a joke'))
+
+    def test_budget_intent_reads_spend_in_one_query(self):
+        today = timezone.localdate()
+        for category in ['food', 'transport', 'shopping']:
+            Budget.objects.create(user=self.user, category=category, limit=Decimal('200'), period='monthly')
+            Transaction.objects.create(user=self.user, amount=Decimal('50'), type='expense',
+                                       category=category, date=today)
+        with self.assertNumQueries(2):
+            response = self.ask('how are my budgets doing')
+        self.assertIn('- Food: $50.00 of $200.00 ($150.00 remaining)', response)
+        self.assertEqual(response.count('remaining'), 3)
+
+    def test_budget_intent_uses_each_budgets_period(self):
+        today = timezone.localdate()
+        Transaction.objects.create(user=self.user, amount=Decimal('30'), type='expense', category='food', date=today)
+        Transaction.objects.create(user=self.user, amount=Decimal('70'), type='expense', category='food',
+                                   date=today - timedelta(days=400))
+        Budget.objects.create(user=self.user, category='food', limit=Decimal('100'), period='weekly')
+        Budget.objects.create(user=self.user, category='food', limit=Decimal('1000'), period='yearly')
+        with self.assertNumQueries(3):
+            response = self.ask('budget status')
+        self.assertIn('- Food (weekly): $30.00 of $100.00 ($70.00 remaining)', response)
+        self.assertIn('- Food (yearly): $30.00 of $1000.00 ($970.00 remaining)', response)
+
+    def test_data_intents_read_the_summary(self):
+        Transaction.objects.create(user=self.user, amount=Decimal('80'), type='expense', category='food',
+                                   description='Groceries', date=timezone.localdate())
+        self.assertIn('Your total expenses are $80.00', self.ask('what did I spend'))
+        with self.assertNumQueries(0):
+            self.assertIn('- Food: $80.00', self.ask('spending by category'))
+            self.assertIn('Groceries ($80.00, food)', self.ask('recent transactions'))
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='asyncuser', password='testpass123')
+        today = timezone.localdate()
+        Transaction.objects.create(user=self.user, amount=Decimal('3000'), type='income', category='salary', date=today)
+        Transaction.objects.create(user=self.user, amount=Decimal('120.50'), type='expense', category='food',
+                                   description='Groceries', date=today)
+        Budget.objects.create(user=self.user, category='food', limit=Decimal('200'), period='monthly')
+        Notification.objects.create(user=self.user, title='Hello', message='Welcome', notification_type='info')
+        self.auth = {'headers': {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}}
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def sync_json(self, name, message=None):
+        if message is None:
+            return self.client.get(reverse(name)).json()
+        return self.client.post(reverse(name), {'message': message}, format='json').json()
+
+    async def test_responses_match_the_sync_views(self):
+        for sync_name, async_name in [('dashboard', 'async-dashboard'),
+                                      ('monthly-transactions', 'async-monthly-transactions'),
+                                      ('notifications', 'async-notifications'),
+                                      ('notifications-unread-count', 'async-notifications-unread-count')]:
+            response = await self.async_client.get(reverse(async_name), **self.auth)
+            self.assertEqual(response.status_code, 200)
+            expected = await sync_to_async(self.sync_json)(sync_name)
+            self.assertEqual(response.json(), expected)
+
+    async def test_chatbot(self):
+        for message in ['hi', 'what is my balance', 'spending by category', 'recent', 'budgets']:
+            response = await self.async_client.post(reverse('async-chatbot'), {'message': message},
+                                                    content_type='application/json', **self.auth)
+            expected = await sync_to_async(self.sync_json)('chatbot', message)
+            self.assertEqual(response.json(), expected)
+        self.assertIn('Food: $120.50 of $200.00', expected['response'])
+
+    async def test_requires_a_valid_token(self):
+        response = await self.async_client.get(reverse('async-dashboard'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+        response = await self.async_client.get(reverse('async-dashboard'), headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.post(reverse('async-dashboard'), **self.auth)
+        self.assertEqual(response.status_code, 405)
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='streamer', password='testpass123')
+        self.today = timezone.localdate()
+        Transaction.objects.create(user=self.user, amount=Decimal('1000'), type='income', category='salary',
+                                   date=self.today)
+        self.budget = Budget.objects.create(user=self.user, category='food', limit=Decimal('200'), period='monthly')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.auth = {'headers': {'Authorization': f'Bearer {self.token}'}}
+
+    async def ticket(self):
+        response = await self.async_client.post(reverse('async-events-ticket'), **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['ticket']
+
+    async def open_stream(self):
+        ticket = await self.ticket()
+        # Read the view's own generator: closing the wrappers Django and the
+        # test client put around streaming_content leaves it running
+        with mock.patch('api.async_views.StreamingHttpResponse', wraps=StreamingHttpResponse) as streaming:
+            response = await self.async_client.get(reverse('async-events'), {'ticket': ticket})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = streaming.call_args.args[0]
+        ready = await self.next_chunk(chunks)
+        self.assertIn('event: ready', ready)
+        # The in-memory layer misses other processes' writes: clients keep refetching
+        self.assertIn('data: {"shared": false}', ready)
+        return response, chunks
+
+    async def next_chunk(self, chunks):
+        return await asyncio.wait_for(anext(chunks), timeout=5)
+
+    async def next_events(self, chunks, count):
+        found = []
+        for _ in range(count):
+            chunk = await self.next_chunk(chunks)
+            event, data = chunk.strip().split('\n')
+            found.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return found
+
+    def write(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            return action()
+
+    async def test_transaction_write_pushes_deltas(self):
+        response, chunks = await self.open_stream()
+        try:
+            tx = await sync_to_async(self.write)(lambda: Transaction.objects.create(
+                user=self.user, amount=Decimal('150'), type='expense', category='food',
+                description='Groceries', date=self.today
+            ))
+            found = dict(await self.next_events(chunks, 4))
+            self.assertEqual(found['transaction']['action'], 'created')
+            self.assertEqual(found['transaction']['transaction']['id'], tx.id)
+            self.assertEqual(found['totals'], {'income': 1000.0, 'expenses': 150.0, 'balance': 850.0,
+                                               'transaction_count': 2})
+            self.assertEqual(found['monthly'], [{'month': self.today.strftime('%b %Y'),
+                                                 'income': 1000.0, 'expenses': 150.0}])
+            self.assertEqual(found['budgets'][0]['id'], self.budget.id)
+            self.assertEqual(found['budgets'][0]['progress'], 75.0)
+
+            tx_id = tx.id
+            await sync_to_async(self.write)(tx.delete)
+            found = dict(await self.next_events(chunks, 4))
+            self.assertEqual(found['transaction'], {'action': 'deleted', 'transaction': {'id': tx_id}})
+            self.assertEqual(found['totals']['expenses'], 0.0)
+        finally:
+            await chunks.aclose()
+
+    async def test_new_notifications_are_pushed(self):
+        response, chunks = await self.open_stream()
+        try:
+            await sync_to_async(self.write)(lambda: Notification.objects.create(
+                user=self.user, title='Hello', message='Welcome', notification_type='info'
+            ))
+            [(event, data)] = await self.next_events(chunks, 1)
+            self.assertEqual((event, data['title']), ('notification', 'Hello'))
+
+            await sync_to_async(self.write)(lambda: SavingsGoal.objects.create(
+                user=self.user, target_amount=Decimal('100'), current_amount=Decimal('60')
+            ))
+            await sync_to_async(self.write)(evaluate_rules)
+            [(event, data)] = await self.next_events(chunks, 1)
+            self.assertEqual((event, data['title']), ('notification', 'Savings Milestone'))
+        finally:
+            await chunks.aclose()
+
+    def test_nothing_is_built_without_listeners(self):
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            self.budget.limit = Decimal('300')
+            self.budget.save()
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    async def test_requires_a_valid_ticket(self):
+        response = await self.async_client.get(reverse('async-events'), {'ticket': 'nope'})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.post(reverse('async-events-ticket'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_access_token_is_not_accepted_in_the_url(self):
+        response = await self.async_client.get(reverse('async-events'), {'token': self.token})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_tickets_are_single_use(self):
+        ticket = await self.ticket()
+        # Redeemed by the first request, even though WSGI then refuses to stream
+        response = await sync_to_async(self.client.get)(reverse('async-events'), {'ticket': ticket})
+        self.assertEqual(response.status_code, 503)
+        response = await self.async_client.get(reverse('async-events'), {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+    def test_slow_clients_get_a_resync(self):
+        layer = InMemoryEventLayer(queue_size=2)
+
+        async def overflow():
+            async with layer.subscribe('group') as receive:
+                for i in range(3):
+                    layer.publish('group', {'event': 'n', 'data': i})
+                await asyncio.sleep(0)
+                self.assertEqual(await receive(), RESYNC)
+                self.assertFalse(layer.has_subscribers('other'))
+            self.assertFalse(layer.has_subscribers('group'))
+
+        asyncio.run(overflow())
+
+
+class BootstrapTests(TestCase):
+    # auth, notification aggregate, summary on a cache miss (6), feed page,
+    # budgets and one spend query per budget period (2 here)
+    BOOTSTRAP_MAX_QUERIES = 12
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='booter', password='testpass123')
+        today = timezone.localdate()
+        Transaction.objects.create(user=self.user, amount=Decimal('2500'), type='income', category='salary', date=today)
+        Transaction.objects.create(user=self.user, amount=Decimal('80'), type='expense', category='food',
+                                   description='Groceries', date=today)
+        Budget.objects.create(user=self.user, category='food', limit=Decimal('200'), period='monthly')
+        Budget.objects.create(user=self.user, category='transport', limit=Decimal('50'), period='weekly')
+        for i in range(8):
+            Notification.objects.create(user=self.user, title=f'Notice {i}', message='Hi', notification_type='info')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def get(self, name, **params):
+        return self.client.get(reverse(name), params).json()
+
+    def test_matches_the_separate_endpoints(self):
+        # The newest notifications are read, so the dashboard's unread ones
+        # are not on a two-row first page
+        Notification.objects.filter(title__in=['Notice 6', 'Notice 7']).update(is_read=True)
+        for params in [{}, {'page_size': 2}]:
+            data = self.get('bootstrap', **params)
+            self.assertEqual(data['dashboard'], self.get('dashboard'))
+            self.assertEqual(data['user'], self.get('user'))
+            self.assertEqual(data['notifications'], self.get('notifications', **params))
+            self.assertEqual(data['unread_count'], self.get('notifications-unread-count')['unread_count'])
+            self.assertEqual(data['budgets'], self.get('budgets'))
+            self.assertEqual(data['monthly'], self.get('monthly-transactions'))
+        self.assertEqual(len(data['dashboard']['notifications']), 5)
+
+    def test_fewer_queries_than_separate_calls(self):
+        separate = 0
+        for name in ['dashboard', 'user', 'notifications', 'notifications-unread-count', 'budgets',
+                     'monthly-transactions']:
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse(name))
+            separate += len(ctx.captured_queries)
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('bootstrap'))
+        self.assertLessEqual(len(ctx.captured_queries), self.BOOTSTRAP_MAX_QUERIES)
+        self.assertLess(len(ctx.captured_queries), separate)
+
+    def test_etag_returns_304_until_something_changes(self):
+        def revalidate(etag):
+            return self.client.get(reverse('bootstrap'), HTTP_IF_NONE_MATCH=etag)
+
+        etag = self.client.get(reverse('bootstrap'))['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = revalidate(etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        # Authentication and the notification aggregate
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        changes = [
+            lambda: Transaction.objects.create(user=self.user, amount=Decimal('5'), type='expense',
+                                               category='food', date=timezone.localdate()),
+            lambda: Notification.objects.filter(user=self.user).update(is_read=True),
+            lambda: Notification.objects.create(user=self.user, title='New', message='Hi', notification_type='info'),
+            lambda: User.objects.filter(pk=self.user.pk).update(first_name='Bea'),
+        ]
+        for change in changes:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            response = revalidate(etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+
+class LedgerSummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ledger', password='secret123')
+
+    def create(self, amount, type='expense', **kwargs):
+        return Transaction.objects.create(user=self.user, amount=Decimal(amount), type=type,
+                                          category='salary' if type == 'income' else 'food',
+                                          date=date(2024, 5, 1), **kwargs)
+
+    def ledger(self):
+        with self.assertNumQueries(1):
+            return get_ledger(self.user)
+
+    def test_running_totals_follow_every_write(self):
+        self.create('1000', 'income')
+        groceries = self.create('80')
+        rent = self.create('500')
+        ledger = self.ledger()
+        self.assertEqual((ledger.income, ledger.expenses, ledger.balance), (1000, 580, 420))
+
+        groceries.amount = Decimal('95.50')
+        groceries.save()
+        rent.type, rent.category = 'income', 'gifts'
+        rent.save()
+        self.create('20').delete()
+        ledger = self.ledger()
+        self.assertEqual((ledger.income, ledger.expenses, ledger.balance), (1500, Decimal('95.50'), Decimal('1404.50')))
+        self.assertEqual(ledger.transaction_count, 3)
+        self.assertEqual(check_ledgers(), [])
+
+    def test_user_without_transactions_reads_zero(self):
+        ledger = self.ledger()
+        self.assertEqual((ledger.income, ledger.expenses, ledger.balance), (0, 0, 0))
+
+    def test_check_ledger_command_reports_and_repairs_drift(self):
+        self.create('300', 'income')
+        self.create('100')
+        Transaction.objects.filter(user=self.user, type='expense').update(amount=Decimal('150'))
+        with self.assertRaises(CommandError):
+            call_command('check_ledger', stdout=StringIO())
+        out = StringIO()
+        call_command('check_ledger', '--repair', stdout=out)
+        self.assertIn('Repaired 1 ledger', out.getvalue())
+        ledger = self.ledger()
+        self.assertEqual((ledger.expenses, ledger.balance), (150, 150))
+        call_command('check_ledger', '--user', 'ledger', stdout=StringIO())
+
+
+class LedgerConcurrencyTests(TransactionTestCase):
+    WRITERS = 8
+    WRITES = 15
+
+    def test_parallel_writes_lose_no_updates(self):
+        user = User.objects.create_user(username='parallel', password='secret123')
+        barrier = threading.Barrier(self.WRITERS)
+        errors = []
+
+        def write(worker):
+            try:
+                barrier.wait()
+                for i in range(self.WRITES):
+                    for attempt in range(50):
+                        try:
+                            with db_transaction.atomic():
+                                tx = Transaction.objects.create(
+                                    user=user, amount=Decimal('10.00'), category='food', date=date(2024, 5, 1),
+                                    type='income' if (worker + i) % 3 == 0 else 'expense',
+                                )
+                                if i % 5 == 4:
+                                    tx.delete()
+                            break
+                        except OperationalError:
+                            # SQLite allows one writer at a time and the shared
+                            # in-memory test database does not wait for the lock:
+                            # back off (jittered, so writers spread out) and retry
+                            time.sleep(random.uniform(0.005, 0.02) * min(attempt + 1, 10))
+                    else:
+                        raise AssertionError('database stayed locked')
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(self.WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(check_ledgers(), [])
+        ledger = LedgerSummary.objects.get(pk=user.pk)
+        self.assertEqual(ledger.transaction_count, Transaction.objects.filter(user=user).count())
+        self.assertEqual(ledger.transaction_count, self.WRITERS * (self.WRITES - self.WRITES // 5))
+
+
+class NotificationRuleTests(TestCase):
+    def setUp(self):
+        self.today = date(2024, 5, 15)
+
+    def make_user(self, name, spent=Decimal('0')):
+        user = User.objects.create_user(username=name, password='secret123')
+        Budget.objects.create(user=user, category='food', limit=Decimal('100'), period='monthly')
+        if spent:
+            Transaction.objects.create(user=user, type='expense', amount=spent, category='food',
+                                       description='Groceries', date=self.today)
+        return user
+
+    def titles(self, user):
+        return sorted(Notification.objects.filter(user=user).values_list('title', flat=True))
+
+    def test_budget_thresholds_fire_once_per_level_and_period(self):
+        user = self.make_user('budgeter', spent=Decimal('85'))
+        evaluate_rules(self.today)
+        evaluate_rules(self.today)
+        self.assertEqual(self.titles(user), ['Budget Alert'])
+
+        Transaction.objects.create(user=user, type='expense', amount=Decimal('20'), category='food',
+                                   description='Dinner', date=self.today)
+        evaluate_rules(self.today)
+        self.assertEqual(self.titles(user), ['Budget Alert', 'Budget Exceeded'])
+        exceeded = Notification.objects.get(user=user, title='Budget Exceeded')
+        self.assertIn('$105.00 of your monthly food budget of $100.00', exceeded.message)
+
+        # Spend outside the budget's period does not count
+        evaluate_rules(date(2024, 6, 3))
+        self.assertEqual(Notification.objects.filter(user=user).count(), 2)
+
+    def test_upcoming_bills_and_savings_milestones(self):
+        user = self.make_user('saver')
+        Transaction.objects.create(user=user, type='expense', amount=Decimal('60'), category='utilities',
+                                   description='Water bill', date=self.today + timedelta(days=3))
+        goal = SavingsGoal.objects.create(user=user, target_amount=Decimal('1000'), current_amount=Decimal('520'))
+        evaluate_rules(self.today)
+        evaluate_rules(self.today + timedelta(days=1))
+        self.assertEqual(self.titles(user), ['Savings Milestone', 'Upcoming Bill'])
+        self.assertIn('50% of your $1000.00 goal', Notification.objects.get(title='Savings Milestone').message)
+
+        goal.current_amount = Decimal('1000')
+        goal.save()
+        evaluate_rules(self.today)
+        self.assertEqual(self.titles(user), ['Savings Goal Reached', 'Savings Milestone', 'Upcoming Bill'])
+
+    def test_query_count_does_not_grow_with_users(self):
+        def queries():
+            Notification.objects.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                evaluate_rules(self.today)
+            return len(ctx.captured_queries)
+
+        self.make_user('first', spent=Decimal('90'))
+        few = queries()
+        for i in range(20):
+            self.make_user(f'user{i}', spent=Decimal('95'))
+        self.assertEqual(queries(), few)
+        self.assertEqual(Notification.objects.count(), 21)
+
+    def test_unique_constraint_rejects_duplicate_keys(self):
+        user = self.make_user('dupes')
+        Notification.objects.create(user=user, title='A', message='a', notification_type='info', dedupe_key='k')
+        Notification.objects.create(user=user, title='B', message='b', notification_type='info')
+        Notification.objects.create(user=user, title='C', message='c', notification_type='info')
+        with self.assertRaises(IntegrityError), db_transaction.atomic():
+            Notification.objects.create(user=user, title='A', message='a', notification_type='info', dedupe_key='k')
+
+    def test_periodic_task(self):
+        user = self.make_user('tasked')
+        SavingsGoal.objects.create(user=user, target_amount=Decimal('100'), current_amount=Decimal('30'))
+        self.assertEqual(evaluate_notification_rules_task.delay().get(), 'Evaluated 1 notification(s)')
+        self.assertIn('evaluate-notification-rules', settings.CELERY_BEAT_SCHEDULE)
+
+    def test_pruning_does_not_resend_what_rules_sent(self):
+        user = User.objects.create_user(username='pruned', password='secret123')
+        SavingsGoal.objects.create(user=user, target_amount=Decimal('100'), current_amount=Decimal('60'))
+        evaluate_rules(self.today)
+        old = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS + 1)
+        Notification.objects.filter(user=user).update(is_read=True, created_at=old)
+
+        self.assertEqual(prune_read_notifications(), 0)
+        evaluate_rules(self.today)
+        self.assertEqual(self.titles(user), ['Savings Milestone'])
+        # A re-sent milestone would be unread again
+        self.assertFalse(Notification.objects.filter(user=user, is_read=False).exists())
+
+    def test_pruning_drops_keys_whose_period_is_over(self):
+        user = self.make_user('expired')
+        budget = Budget.objects.get(user=user)
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        keys = {
+            'past_bills': f"bills:{today - timedelta(days=7):%G-W%V}",
+            'bills': f"bills:{today:%G-W%V}",
+            'past_budget': f"budget:{budget.id}:{today.year - 1}-01-01:80",
+            'budget': f"budget:{budget.id}:{month_start:%Y-%m-%d}:80",
+            'savings': "savings:1:50",
+        }
+        Notification.objects.bulk_create([
+            Notification(user=user, title=name, message='Sent', notification_type='info', is_read=True,
+                         dedupe_key=key)
+            for name, key in keys.items()
+        ])
+        old = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS + 1)
+        Notification.objects.filter(user=user).update(created_at=old)
+
+        self.assertEqual(prune_read_notifications(), 2)
+        self.assertEqual(self.titles(user), ['bills', 'budget', 'savings'])
+
+
+class NotificationEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='secret123')
+        self.other = User.objects.create_user(username='other', password='secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.notifications = Notification.objects.bulk_create([
+            Notification(user=self.user, title=f'Notice {i}', message='Hello', notification_type='info')
+            for i in range(7)
+        ])
+        self.foreign = Notification.objects.create(user=self.other, title='Theirs', message='Hi',
+                                                   notification_type='info')
+
+    def unread(self):
+        return self.client.get(reverse('notifications-unread-count')).data['unread_count']
+
+    def test_feed_is_paginated_newest_first(self):
+        seen, url = [], reverse('notifications') + '?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, [n.id for n in reversed(self.notifications)])
+
+        self.notifications[0].is_read = True
+        self.notifications[0].save()
+        response = self.client.get(reverse('notifications'), {'unread': 'true'})
+        self.assertEqual(len(response.data['results']), 6)
+
+    def test_mark_read_in_bulk_with_one_update(self):
+        ids = [self.notifications[0].id, self.notifications[1].id, self.foreign.id]
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('notifications-mark-read'), {'ids': ids}, format='json')
+        self.assertEqual(response.data, {'marked_read': 2, 'unread_count': 5})
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Notification.objects.get(pk=self.foreign.pk).is_read)
+
+        response = self.client.post(reverse('notifications-mark-read'), {'all': True}, format='json')
+        self.assertEqual(response.data, {'marked_read': 5, 'unread_count': 0})
+        self.assertEqual(self.client.post(reverse('notifications-mark-read'), {}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_mark_one_read(self):
+        url = reverse('notification-detail', args=[self.notifications[0].id])
+        self.assertEqual(self.client.patch(url, {'is_read': True}, format='json').status_code, status.HTTP_200_OK)
+        self.assertTrue(Notification.objects.get(pk=self.notifications[0].pk).is_read)
+        foreign = reverse('notification-detail', args=[self.foreign.id])
+        self.assertEqual(self.client.patch(foreign, {}, format='json').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unread_count_is_cached_and_invalidated(self):
+        self.assertEqual(self.unread(), 7)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.unread(), 7)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.user, title='New', message='Hi', notification_type='info')
+        self.assertEqual(self.unread(), 8)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('notification-detail', args=[self.notifications[0].id]))
+        self.assertEqual(self.unread(), 7)
+
+        Budget.objects.create(user=self.user, category='food', limit=Decimal('10'), period='monthly')
+        Transaction.objects.create(user=self.user, type='expense', amount=Decimal('20'), category='food',
+                                   description='Lunch', date=timezone.localdate())
+        with self.captureOnCommitCallbacks(execute=True):
+            evaluate_rules()
+        self.assertEqual(self.unread(), 8)
+
+    def test_prune_deletes_old_read_notifications_in_batches(self):
+        old = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS + 1)
+        Notification.objects.filter(pk__in=[n.pk for n in self.notifications[:5]]).update(created_at=old)
+        Notification.objects.filter(pk__in=[n.pk for n in self.notifications[1:]]).update(is_read=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(prune_read_notifications(batch_size=2), 4)
+        deletes = [q for q in ctx.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 2)
+        # Old but unread, and recent read ones, are kept
+        remaining = set(Notification.objects.filter(user=self.user).values_list('pk', flat=True))
+        self.assertEqual(remaining, {n.pk for n in self.notifications[:1] + self.notifications[5:]})
+        self.assertEqual(prune_notifications_task.delay().get(), 'Deleted 0 read notification(s)')
+
+
+class CacheBackendTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = directory.name
+        caches_setting = {
+            'shared': parse_cache_url(f'file://{directory.name}'),
+            'default': {
+                'BACKEND': 'api.cache_backends.TwoTierCache',
+                'LOCATION': 'two-tier-tests',
+                'OPTIONS': {'SHARED_ALIAS': 'shared', 'LOCAL_NAMESPACES': ['summary'], 'LOCAL_TIMEOUT': 30},
+            },
+        }
+        override = self.settings(CACHES=caches_setting)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.cache, self.shared = caches['default'], caches['shared']
+        self.addCleanup(self.cache.clear)
+
+    def test_parse_cache_url(self):
+        self.assertEqual(parse_cache_url('redis://cache:6379/1?key_prefix=bb&timeout=600&max_entries=50'), {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://cache:6379/1',
+            'KEY_PREFIX': 'bb',
+            'TIMEOUT': 600,
+            'OPTIONS': {'MAX_ENTRIES': 50},
+        })
+        self.assertEqual(parse_cache_url('file:///var/tmp/bb')['LOCATION'], '/var/tmp/bb')
+        self.assertEqual(parse_cache_url('locmem://')['LOCATION'], 'default')
+        self.assertIsNone(parse_cache_url('locmem://?timeout=none')['TIMEOUT'])
+        with self.assertRaises(ValueError):
+            parse_cache_url('memcached://cache:11211')
+
+    def test_local_tier_serves_versioned_namespaces(self):
+        self.cache.set('summary:1:5:2024-03-04', {'income': 1})
+        self.assertEqual(self.shared.get('summary:1:5:2024-03-04'), {'income': 1})
+        # Gone from the shared tier (another worker evicted it): still served locally
+        self.shared.delete('summary:1:5:2024-03-04')
+        self.assertEqual(self.cache.get('summary:1:5:2024-03-04'), {'income': 1})
+        self.assertEqual(self.cache.get_many(['summary:1:5:2024-03-04', 'summary:2:1:2024-03-04']),
+                         {'summary:1:5:2024-03-04': {'income': 1}})
+
+    def test_other_namespaces_always_read_the_shared_tier(self):
+        self.cache.add('dataversion:1', 10, timeout=None)
+        self.assertEqual(self.cache.get('dataversion:1'), 10)
+        # A write by another worker is seen at once
+        self.shared.incr('dataversion:1')
+        self.assertEqual(self.cache.get('dataversion:1'), 11)
+        self.assertEqual(self.cache.incr('dataversion:1'), 12)
+        self.shared.delete('dataversion:1')
+        self.assertIsNone(self.cache.get('dataversion:1'))
+
+    def test_shared_hits_fill_the_local_tier(self):
+        self.shared.set('summary:1:1:2024-03-04', 'cached elsewhere')
+        self.assertEqual(self.cache.get('summary:1:1:2024-03-04'), 'cached elsewhere')
+        self.shared.clear()
+        self.assertEqual(self.cache.get('summary:1:1:2024-03-04'), 'cached elsewhere')
+        self.cache.delete('summary:1:1:2024-03-04')
+        self.assertIsNone(self.cache.get('summary:1:1:2024-03-04'))
+
+    def test_layers_run_on_a_file_backed_cache(self):
+        user = User.objects.create_user(username='filecache', password='secret123')
+        Transaction.objects.create(user=user, amount=Decimal('10'), type='expense', category='food', date=date(2024, 3, 4))
+        first = get_summary(user, today=date(2024, 3, 10))
+        self.assertEqual(get_summary(user, today=date(2024, 3, 10)), first)
+        # Counters are kept in the shared tier only
+        self.assertEqual(self.shared.get('stats:summary:hits'), 1)
+        self.assertEqual(summary_counter.stats()['hits'], 1)
+
+    def test_set_many_culls_once_per_batch(self):
+        data = {f'catpred:{n}': n for n in range(50)}
+        with mock.patch.object(self.shared, '_cull', wraps=self.shared._cull) as cull:
+            self.assertEqual(self.shared.set_many(data), [])
+        cull.assert_called_once()
+        self.assertEqual(self.shared.get_many(list(data)), data)
+        self.assertEqual(len(os.listdir(self.location)), 50)
+
+    def test_data_versions_are_shared_between_processes(self):
+        user = User.objects.create_user(username='twoworkers', password='secret123')
+        today = date(2024, 3, 10)
+        Transaction.objects.create(user=user, amount=Decimal('10'), type='expense', category='food', date=date(2024, 3, 4))
+        get_summary(user, today=today)
+        version = get_data_version(user.id)
+
+        # Another worker writes a transaction, then bumps the version through
+        # the same cache directory
+        Transaction.objects.create(user=user, amount=Decimal('20'), type='expense', category='food', date=date(2024, 3, 5))
+        worker = subprocess.run(
+            [sys.executable, '-c',
+             "import django; django.setup()\n"
+             "from api.services.versions import bump_data_version, get_data_version\n"
+             f"print(get_data_version({user.id}))\n"
+             f"bump_data_version({user.id})\n"],
+            cwd=settings.BASE_DIR, env={**os.environ, 'CACHE_URL': f'file://{self.location}'},
+            capture_output=True, text=True, timeout=120, check=True,
+        )
+        self.assertEqual(worker.stdout.split()[-1], str(version))
+
+        self.assertNotEqual(get_data_version(user.id), version)
+        self.assertEqual(Decimal(get_summary(user, today=today)['expenses']), Decimal('30'))
+        self.assertEqual(summary_counter.stats(), {'hits': 0, 'misses': 2, 'hit_rate': 0.0})
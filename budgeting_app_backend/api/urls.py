@@ -1,10 +1,16 @@
 from django.urls import path
+from . import async_views
 from .views import (
     DashboardDataView,
+    BootstrapView,
     UserView,
     TransactionView,
+    TransactionImportView,
+    TransactionExportView,
     MonthlyTransactionsView,
     NotificationView,
+    NotificationMarkReadView,
+    NotificationUnreadCountView,
     BudgetView,
     ReportView,
     ChatbotView,
@@ -13,6 +19,9 @@ from .views import (
     ForgotPasswordView,
     CommentView,
     predict_category,
+    predict_category_batch,
+    prediction_cache_stats,
+    summary_cache_stats,
     TransactionCategoriesView,
 )
 
@@ -24,7 +33,12 @@ urlpatterns = [
     path('forgot-password/', ForgotPasswordView.as_view(), name='forgot-password'),
     path('comments/', CommentView.as_view(), name='comments'),
     path('dashboard/', DashboardDataView.as_view(), name='dashboard'),
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('notifications/', NotificationView.as_view(), name='notifications'),
+    path('notifications/mark-read/', NotificationMarkReadView.as_view(), name='notifications-mark-read'),
+    path('notifications/unread-count/', NotificationUnreadCountView.as_view(), name='notifications-unread-count'),
+    path('transactions/export/', TransactionExportView.as_view(), name='transaction-export'),
+    path('transactions/import/', TransactionImportView.as_view(), name='transaction-import'),
     path('transactions/monthly/', MonthlyTransactionsView.as_view(), name='monthly-transactions'),
     path('transactions/<int:pk>/', TransactionView.as_view(), name='transaction-detail'),
     path('transaction-categories/', TransactionCategoriesView.as_view(), name='transaction-categories'),
@@ -33,5 +47,15 @@ urlpatterns = [
     path('reports/', ReportView.as_view(), name='reports'),
     path('chatbot/', ChatbotView.as_view(), name='chatbot'),
     path('categorize/', predict_category, name='predict_category'),
+    path('categorize/batch/', predict_category_batch, name='predict_category_batch'),
+    path('categorize/cache-stats/', prediction_cache_stats, name='prediction_cache_stats'),
+    path('summary/cache-stats/', summary_cache_stats, name='summary_cache_stats'),
     path('budget/<int:pk>/', BudgetView.as_view(), name='budget-detail'),
+    path('async/dashboard/', async_views.dashboard, name='async-dashboard'),
+    path('async/transactions/monthly/', async_views.monthly_transactions, name='async-monthly-transactions'),
+    path('async/notifications/', async_views.notifications, name='async-notifications'),
+    path('async/notifications/unread-count/', async_views.unread_count, name='async-notifications-unread-count'),
+    path('async/chatbot/', async_views.chatbot_reply, name='async-chatbot'),
+    path('async/events/ticket/', async_views.events_ticket, name='async-events-ticket'),
+    path('async/events/', async_views.events, name='async-events'),
 ]
\ No newline at end of file
@@ -2,38 +2,76 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.decorators import api_view
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth.models import User
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction as db_transaction
 from django.db.models import Sum, Count
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from datetime import timedelta, datetime
+import logging
 from .models import Transaction, SavingsGoal, Notification, Budget, Comment
 from .serializers import (
     UserSerializer, 
     TransactionSerializer,
     SavingsGoalSerializer,
     NotificationSerializer,
+    NotificationMarkReadSerializer,
     BudgetSerializer,
     UserRegistrationSerializer,
     CustomTokenObtainPairSerializer,
-    CommentSerializer
+    CommentSerializer,
+    CategorizeBatchSerializer,
+    TransactionExportSerializer,
+    ReportRequestSerializer
 )
 from rest_framework_simplejwt.views import TokenObtainPairView
 import json
-from reportlab.pdfgen import canvas
-from io import BytesIO
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from urllib.parse import urlencode
 from django.views.decorators.csrf import csrf_exempt
 import joblib
 import os
-from .ml.predictor import TransactionClassifier
+from .ml.cache import categorize, prediction_cache
+from .ml.registry import ModelUnavailable
+from .filters import filter_transactions
+from .pagination import KeysetPagination
+from .services import chatbot, reports
+from .services.exports import export_transactions
+from .services.imports import ImportFormatError, import_file
+from .services.bootstrap import bootstrap_etag, build_bootstrap, notification_marker
+from .services.budgets import budget_statuses
+from .services.dashboard import DASHBOARD_NOTIFICATIONS, dashboard_payload
+from .services.notifications import invalidate_unread_counts, mark_read, unread_count
+from .services.summary import get_summary, summary_counter
 from datetime import datetime
 from rest_framework.permissions import AllowAny
 
-classifier = TransactionClassifier()
+logger = logging.getLogger(__name__)
+
+class FileDownloadMixin:
+    """For views returning files: clients asking for text/csv, application/pdf etc.
+    get the file, and renderers are only used to format errors"""
+    
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
+
+def _prediction_payload(classes, category, probabilities):
+    return {
+        'category': category,
+        'confidence': float(max(probabilities)),
+        'alternatives': [
+            {'category': cls, 'score': float(score)} 
+            for cls, score in zip(classes, probabilities)
+            if score > 0.1 and cls != category
+        ]
+    }
 
 @api_view(['POST'])
 def predict_category(request):
@@ -47,102 +85,88 @@ def predict_category(request):
             
         date = datetime.strptime(date_str, '%Y-%m-%d') if date_str else datetime.now()
         
-        category, probabilities = classifier.predict(description, amount, date)
+        classes, categories, probabilities = categorize([description], [amount], [date])
         
-        return Response({
-            'category': category,
-            'confidence': float(max(probabilities)),
-            'alternatives': [
-                {'category': cls, 'score': float(score)} 
-                for cls, score in zip(classifier.classes, probabilities)
-                if score > 0.1 and cls != category
-            ]
-        })
+        return Response(_prediction_payload(classes, categories[0], probabilities[0]))
         
+    except ModelUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
+@api_view(['POST'])
+def predict_category_batch(request):
+    """Categorize up to MAX_BATCH_SIZE transactions with one model pass"""
+    serializer = CategorizeBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    items = serializer.validated_data['transactions']
+    try:
+        classes, categories, probabilities = categorize(
+            [item['description'] for item in items],
+            [item['amount'] for item in items],
+            [item['date'] for item in items],
+        )
+    except ModelUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+    
+    return Response({
+        'results': [
+            _prediction_payload(classes, category, row)
+            for category, row in zip(categories, probabilities)
+        ]
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def prediction_cache_stats(request):
+    """Hit/miss counters of the shared categorization cache"""
+    return Response(prediction_cache.stats())
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def summary_cache_stats(request):
+    """Hit/miss counters of the per-user summary cache"""
+    return Response(summary_counter.stats())
+
 class DashboardDataView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        # Transactions data
-        transactions = Transaction.objects.filter(user=request.user)
-        income = transactions.filter(type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-        expenses = transactions.filter(type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        # Savings goal
-        savings_goal, created = SavingsGoal.objects.get_or_create(
-            user=request.user,
-            defaults={
-                'target_amount': 1000,
-                'current_amount': 0
-            }
-        )
-        
-        # Recent transactions
-        recent_transactions = Transaction.objects.filter(
-            user=request.user
-        ).order_by('-date')[:5]
-        
-        # Check for upcoming bills
-        upcoming_bills = Transaction.objects.filter(
-            user=request.user,
-            type='expense',
-            description__icontains='bill',
-            date__gte=timezone.now(),
-            date__lte=timezone.now() + timedelta(days=7)
-        )
-        
-        # Create notification for upcoming bills if needed
-        if upcoming_bills.exists() and not Notification.objects.filter(
-            user=request.user,
-            title__icontains='Upcoming Bill',
-            is_read=False
-        ).exists():
-            Notification.objects.create(
-                user=request.user,
-                title='Upcoming Bill',
-                message=f"You have {upcoming_bills.count()} bill(s) due this week",
-                notification_type='reminder'
-            )
-        
-        # Check for overspending
-        monthly_budget = 2000  # Default, could come from user settings
-        current_month_expenses = Transaction.objects.filter(
-            user=request.user,
-            type='expense',
-            date__month=timezone.now().month
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        if current_month_expenses > monthly_budget * 0.8 and not Notification.objects.filter(
-            user=request.user,
-            title__icontains='Overspending Alert',
-            is_read=False
-        ).exists():
-            Notification.objects.create(
-                user=request.user,
-                title='Overspending Alert',
-                message=f"You've spent {current_month_expenses/monthly_budget*100:.0f}% of your monthly budget",
-                notification_type='warning'
-            )
-        
-        # Get notifications after potential creations
+        # Totals, savings goal and recent transactions from the summary cache.
+        # Read-only: notifications are written by the rule engine task.
+        summary = get_summary(request.user)
         notifications = Notification.objects.filter(
             user=request.user,
             is_read=False
-        ).order_by('-created_at')[:5]
-        
-        data = {
-            'income': income,
-            'expenses': expenses,
-            'savings_goal': SavingsGoalSerializer(savings_goal).data,
-            'recent_transactions': TransactionSerializer(recent_transactions, many=True).data,
-            'notifications': NotificationSerializer(notifications, many=True).data,
-        }
+        ).order_by('-created_at')[:DASHBOARD_NOTIFICATIONS]
         
+        data = dashboard_payload(summary, NotificationSerializer(notifications, many=True).data)
         return Response(data)
 
+class BootstrapView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        # What Dashboard.js loads on mount, in one response. The ETag is
+        # computed before the payload, so an unchanged dashboard costs the
+        # auth query, one notification aggregate and a cache read.
+        today = timezone.localdate()
+        user_data = UserSerializer(request.user).data
+        marker = notification_marker(request.user)
+        etag = quote_etag(bootstrap_etag(request.user, user_data, marker, today, request.query_params.dict()))
+        
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(build_bootstrap(request, user_data, marker, today))
+        response['ETag'] = etag
+        # Browsers must revalidate, and only for this user
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
 class UserView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -162,9 +186,20 @@ class TransactionView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        transactions = Transaction.objects.filter(user=request.user)
-        serializer = TransactionSerializer(transactions, many=True)
-        return Response(serializer.data)
+        transactions, params = filter_transactions(
+            Transaction.objects.filter(user=request.user),
+            request.query_params
+        )
+        
+        # Sparse fieldsets: only load and serialize the requested columns
+        fields = params.get('fields')
+        if fields:
+            transactions = transactions.only(*set(fields) | {'id', 'date'})
+        
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(transactions, request, view=self)
+        serializer = TransactionSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
     
     def post(self, request):
         # Ensure date is set if not provided
@@ -173,7 +208,9 @@ class TransactionView(APIView):
         
         serializer = TransactionSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            # Rollups are updated by signals inside the same DB transaction
+            with db_transaction.atomic():
+                serializer.save(user=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -182,7 +219,8 @@ class TransactionView(APIView):
             transaction = Transaction.objects.get(pk=pk, user=request.user)
             serializer = TransactionSerializer(transaction, data=request.data)
             if serializer.is_valid():
-                serializer.save()
+                with db_transaction.atomic():
+                    serializer.save()
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Transaction.DoesNotExist:
@@ -191,11 +229,63 @@ class TransactionView(APIView):
     def delete(self, request, pk):
         try:
             transaction = Transaction.objects.get(pk=pk, user=request.user)
-            transaction.delete()
+            with db_transaction.atomic():
+                transaction.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Transaction.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
         
+class TransactionExportView(FileDownloadMixin, APIView):
+    """
+    Download the user's transactions as CSV or NDJSON (`output`), with the
+    listing filters and optional `compress=gzip`. The file is streamed
+    straight from a database iterator.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        transactions, params = filter_transactions(
+            Transaction.objects.filter(user=request.user),
+            request.query_params,
+            serializer_class=TransactionExportSerializer
+        )
+        chunks, content_type, extension = export_transactions(
+            transactions,
+            export_format=params['output'],
+            fields=params.get('fields'),
+            compress=params.get('compress') == 'gzip'
+        )
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        filename = f"transactions-{timezone.localdate():%Y%m%d}.{extension}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class TransactionImportView(APIView):
+    """
+    Bulk import of a bank export uploaded as multipart field 'file'.
+    The type comes from 'file_type' (csv/ofx) or the file extension.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'File required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        file_type = request.data.get('file_type')
+        if not file_type:
+            extension = os.path.splitext(upload.name)[1].lower()
+            file_type = 'ofx' if extension in ('.ofx', '.qfx') else 'csv'
+        
+        try:
+            result = import_file(request.user, upload, file_type.lower())
+        except ImportFormatError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_status = status.HTTP_201_CREATED if result.imported else status.HTTP_400_BAD_REQUEST
+        return Response(result.as_dict(), status=response_status)
+
 class TransactionCategoriesView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -216,57 +306,56 @@ class MonthlyTransactionsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        # Get monthly income and expenses for the last 6 months
-        today = timezone.now()
-        months = []
-        
-        for i in range(6):
-            month = today - timedelta(days=30*i)
-            month_start = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-            
-            income = Transaction.objects.filter(
-                user=request.user,
-                type='income',
-                date__gte=month_start,
-                date__lte=month_end
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-            
-            expenses = Transaction.objects.filter(
-                user=request.user,
-                type='expense',
-                date__gte=month_start,
-                date__lte=month_end
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-            
-            months.append({
-                'month': month_start.strftime('%b %Y'),
-                'income': float(income),
-                'expenses': float(expenses)
-            })
-        
-        return Response(months[::-1])  # Reverse to show oldest first
+        # Monthly income and expenses for the last 6 months, oldest first
+        return Response(get_summary(request.user)['monthly'])
 
 class NotificationView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data)
+        # Newest first, a keyset page at a time; ?unread=true for unread only
+        notifications = Notification.objects.filter(user=request.user)
+        if request.query_params.get('unread') in ('1', 'true'):
+            notifications = notifications.filter(is_read=False)
+        paginator = KeysetPagination(ordering_field='created_at')
+        page = paginator.paginate_queryset(notifications, request, view=self)
+        serializer = NotificationSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
     def patch(self, request, pk):
-        notification = Notification.objects.get(pk=pk, user=request.user)
-        notification.is_read = True
-        notification.save()
+        # One UPDATE; matches already-read rows too, so 0 means not found
+        if not Notification.objects.filter(pk=pk, user=request.user).update(is_read=True):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        invalidate_unread_counts([request.user.id])
         return Response({'status': 'marked as read'})
 
+class NotificationMarkReadView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        # {"ids": [1, 2]} or {"all": true}; a single UPDATE either way
+        serializer = NotificationMarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = None if serializer.validated_data['all'] else serializer.validated_data['ids']
+        marked = mark_read(request.user, ids=ids)
+        return Response({'marked_read': marked, 'unread_count': unread_count(request.user)})
+
+class NotificationUnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        return Response({'unread_count': unread_count(request.user)})
+
 class BudgetView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        budgets = Budget.objects.filter(user=request.user)
-        serializer = BudgetSerializer(budgets, many=True, context={'request': request})
+        budgets = list(Budget.objects.filter(user=request.user))
+        context = {
+            'request': request,
+            'budget_status': budget_statuses(request.user, budgets),
+        }
+        serializer = BudgetSerializer(budgets, many=True, context=context)
         return Response(serializer.data)
     
     def post(self, request):
@@ -276,153 +365,48 @@ class BudgetView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class ReportView(APIView):
+class ReportView(FileDownloadMixin, APIView):
+    """
+    PDF report for `type` (monthly/yearly/all) and optional `period`.
+    Reports are rendered by a Celery task and cached per data version;
+    until one is ready the response is 202 with a URL to poll.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        report_type = request.query_params.get('type', 'monthly')
-        
-        # Create PDF report
-        buffer = BytesIO()
-        p = canvas.Canvas(buffer)
-        
-        # Add content to PDF
-        p.drawString(100, 800, f"BudgetBuddy Financial Report - {report_type.capitalize()}")
-        p.drawString(100, 780, f"Generated for: {request.user.username}")
-        p.drawString(100, 760, f"Date: {datetime.now().strftime('%Y-%m-%d')}")
-        
-        # Add transaction summary
-        transactions = Transaction.objects.filter(user=request.user)
-        if report_type == 'monthly':
-            transactions = transactions.filter(date__month=timezone.now().month)
-        elif report_type == 'yearly':
-            transactions = transactions.filter(date__year=timezone.now().year)
+        params = ReportRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        report_type = params.validated_data['type']
+        period = params.validated_data['period']
         
-        income = transactions.filter(type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-        expenses = transactions.filter(type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        p.drawString(100, 730, "Financial Summary:")
-        p.drawString(120, 710, f"Income: ${income:.2f}")
-        p.drawString(120, 690, f"Expenses: ${expenses:.2f}")
-        p.drawString(120, 670, f"Savings: ${income - expenses:.2f}")
-        
-        # Add top expense categories
-        p.drawString(100, 640, "Top Expense Categories:")
-        categories = transactions.filter(type='expense').values('category').annotate(
-            total=Sum('amount'),
-            count=Count('id')
-        ).order_by('-total')[:5]
-        
-        y = 620
-        for cat in categories:
-            p.drawString(120, y, f"{cat['category']}: ${cat['total']:.2f} ({cat['count']} transactions)")
-            y -= 20
-        
-        p.showPage()
-        p.save()
+        pdf = reports.get_report(request.user, report_type, period)
+        if pdf is None:
+            poll_url = request.build_absolute_uri(
+                f"{reverse('reports')}?{urlencode({'type': report_type, 'period': period})}"
+            )
+            return Response(
+                {'status': 'pending', 'poll_url': poll_url},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Retry-After': '2'}
+            )
         
-        buffer.seek(0)
-        return Response(buffer, content_type='application/pdf')
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="budget_report_{report_type}_{period}.pdf"'
+        return response
 
 class ChatbotView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        message = request.data.get('message', '').lower()
-        user = request.user
+        message = request.data.get('message', '')
         
         try:
-            # Get user's financial data
-            transactions = Transaction.objects.filter(user=user)
-            income = transactions.filter(type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-            expenses = transactions.filter(type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-            savings = income - expenses
-            
-            # Get recent transactions
-            recent_transactions = transactions.order_by('-date')[:3]
-            
-            # Get expense categories
-            expense_categories = transactions.filter(type='expense').values('category').annotate(
-                total=Sum('amount')
-            ).order_by('-total')
-            
-            # Get savings goal if exists
-            try:
-                savings_goal = SavingsGoal.objects.get(user=user)
-                savings_progress = (savings_goal.current_amount / savings_goal.target_amount) * 100
-            except SavingsGoal.DoesNotExist:
-                savings_goal = None
-            
-            # Process the message
-            if any(greeting in message for greeting in ['hi', 'hello', 'hey']):
-                response = "Hello! I'm your BudgetBuddy assistant. How can I help you today?"
-            
-            elif 'balance' in message or 'saving' in message:
-                response = f"Your current financial summary:\n"
-                response += f"- Income: ${income:.2f}\n"
-                response += f"- Expenses: ${expenses:.2f}\n"
-                response += f"- Savings: ${savings:.2f}\n"
-                if savings_goal:
-                    response += f"\nSavings Goal Progress: {savings_progress:.1f}% (${savings_goal.current_amount:.2f} of ${savings_goal.target_amount:.2f})"
-            
-            elif 'expense' in message or 'spend' in message:
-                if 'category' in message or 'categories' in message:
-                    response = "Your top expense categories:\n"
-                    for cat in expense_categories[:3]:
-                        response += f"- {cat['category'].title()}: ${cat['total']:.2f}\n"
-                else:
-                    response = f"Your total expenses are ${expenses:.2f}. "
-                    if expense_categories:
-                        top_cat = expense_categories[0]
-                        response += f"Your highest spending is on {top_cat['category']} (${top_cat['total']:.2f})."
-            
-            elif 'recent' in message or 'last' in message or 'latest' in message:
-                if recent_transactions:
-                    response = "Your recent transactions:\n"
-                    for t in recent_transactions:
-                        response += f"- {t.date.strftime('%b %d')}: {t.description} (${t.amount:.2f}, {t.category})\n"
-                else:
-                    response = "You don't have any recent transactions."
-            
-            elif 'budget' in message:
-                budgets = Budget.objects.filter(user=user)
-                if budgets.exists():
-                    response = "Your current budgets:\n"
-                    for budget in budgets:
-                        spent = transactions.filter(
-                            type='expense',
-                            category=budget.category,
-                            date__month=timezone.now().month
-                        ).aggregate(Sum('amount'))['amount__sum'] or 0
-                        remaining = budget.limit - spent
-                        response += f"- {budget.category.title()}: ${spent:.2f} of ${budget.limit:.2f} (${remaining:.2f} remaining)\n"
-                else:
-                    response = "You haven't set up any budgets yet. You can create budgets in the Overview section."
-            
-            elif 'help' in message:
-                response = "I can help you with:\n"
-                response += "- Your current balance and savings\n"
-                response += "- Expense categories and spending patterns\n"
-                response += "- Recent transactions\n"
-                response += "- Budget progress\n"
-                response += "Try asking questions like:\n"
-                response += "'What's my current balance?'\n"
-                response += "'Where am I spending the most?'\n"
-                response += "'Show me my recent transactions'\n"
-                response += "'How are my budgets doing?'"
-            
-            else:
-                response = "I'm not sure I understand. Try asking about:\n"
-                response += "- Your balance or savings\n"
-                response += "- Your expenses or spending\n"
-                response += "- Recent transactions\n"
-                response += "- Budget progress\n"
-                response += "Or type 'help' for more options."
-                
+            # Resolve the intent first, then fetch only the data it needs
+            _, response = chatbot.reply(request.user, message)
             return Response({'response': response})
             
-        except Exception as e:
-            print(f"Chatbot error: {str(e)}")
+        except Exception:
+            logger.exception("Chatbot reply failed")
             return Response({'response': "Sorry, I'm having trouble accessing your data right now. Please try again later."})
 
 class UserRegistrationView(APIView):
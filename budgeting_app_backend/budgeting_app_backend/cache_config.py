@@ -0,0 +1,66 @@
+"""
+CACHES configuration from a URL, the way dj_database_url handles DATABASES.
+
+    locmem://[name]                   per-process memory (one process only)
+    file:///var/tmp/budgetbuddy       files on a disk every worker can see
+    redis://host:6379/0, rediss://... Redis (needs the redis package)
+    dummy://                          caches nothing
+
+Query parameters set backend options, e.g.
+redis://cache:6379/1?max_entries=5000&key_prefix=bb&timeout=600
+"""
+
+from urllib.parse import parse_qs, unquote, urlsplit
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    # Django's file backend, with a set_many() that culls once per batch
+    'file': 'api.cache_backends.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+# Each process gets its own copy; never shared between gunicorn workers
+PROCESS_LOCAL = {'django.core.cache.backends.locmem.LocMemCache'}
+OPTION_PARAMS = {'max_entries': 'MAX_ENTRIES', 'cull_frequency': 'CULL_FREQUENCY'}
+
+
+def _timeout(value):
+    return None if value.lower() == 'none' else int(value)
+
+
+def parse_cache_url(url):
+    """Return a CACHES entry for `url`; raises ValueError for unknown schemes"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unsupported cache URL scheme: {scheme or url!r}")
+
+    config = {'BACKEND': BACKENDS[scheme]}
+    if scheme == 'locmem':
+        config['LOCATION'] = parts.netloc or parts.path.strip('/') or 'default'
+    elif scheme == 'file':
+        config['LOCATION'] = unquote(parts.path)
+    elif scheme in ('redis', 'rediss'):
+        config['LOCATION'] = parts._replace(query='').geturl()
+
+    options = {}
+    for name, values in parse_qs(parts.query).items():
+        value = values[-1]
+        if name == 'timeout':
+            config['TIMEOUT'] = _timeout(value)
+        elif name == 'key_prefix':
+            config['KEY_PREFIX'] = value
+        elif name in OPTION_PARAMS:
+            options[OPTION_PARAMS[name]] = int(value)
+        else:
+            # Passed through to the client, e.g. redis' socket_timeout
+            options[name] = value
+    if options:
+        config['OPTIONS'] = options
+    return config
+
+
+def process_local(config):
+    """Whether a CACHES entry keeps its data inside each process"""
+    return config['BACKEND'] in PROCESS_LOCAL
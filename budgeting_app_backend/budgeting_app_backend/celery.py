@@ -0,0 +1,17 @@
+"""
+Celery application for budgeting_app_backend.
+
+Tasks are declared with @shared_task in the apps' tasks.py modules and
+discovered here. Without CELERY_BROKER_URL they run eagerly in-process
+(see settings), so development and tests need no broker.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'budgeting_app_backend.settings')
+
+app = Celery('budgeting_app_backend')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
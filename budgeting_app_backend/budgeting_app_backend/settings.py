@@ -5,10 +5,12 @@ Generated by 'django-admin startproject' using Django 5.1.6.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 import dj_database_url
 from dotenv import load_dotenv
+from .cache_config import parse_cache_url
 
 # Load environment variables
 load_dotenv()
@@ -192,6 +194,104 @@ LOGGING = {
 # Custom settings
 FRONTEND_URL = os.environ.get('FRONTEND_URL', 'https://budgetbuddy-frontend-nyw4.onrender.com')
 
+# Transaction classifier (loaded lazily by api.ml.registry)
+ML_MODEL_PATH = os.environ.get('ML_MODEL_PATH', str(BASE_DIR / 'api/ml/models/transaction_classifier_v1.joblib'))
+ML_MODEL_MMAP_MODE = os.environ.get('ML_MODEL_MMAP_MODE', 'r') or None
+ML_MODEL_RELOAD_INTERVAL = int(os.environ.get('ML_MODEL_RELOAD_INTERVAL', 30))
+# Text featurization used by retraining: dense, svd, sparse or hashing
+ML_FEATURE_MODE = os.environ.get('ML_FEATURE_MODE', 'dense')
+ML_SVD_COMPONENTS = int(os.environ.get('ML_SVD_COMPONENTS', 64))
+# Training data is pulled from the database in chunks of this many rows; set
+# ML_TRAINING_SNAPSHOT_PATH to keep a Parquet copy that retraining can reuse
+ML_TRAINING_CHUNK_SIZE = int(os.environ.get('ML_TRAINING_CHUNK_SIZE', 20000))
+ML_TRAINING_SNAPSHOT_PATH = os.environ.get('ML_TRAINING_SNAPSHOT_PATH') or None
+# Scheduled retraining: 'incremental' (new rows only) or 'full' (refit everything)
+ML_RETRAIN_MODE = os.environ.get('ML_RETRAIN_MODE', 'incremental')
+# Incremental runs re-check this many ids below the last one consumed, for
+# rows whose insert committed after a run had already read higher ids
+ML_INCREMENTAL_ID_MARGIN = int(os.environ.get('ML_INCREMENTAL_ID_MARGIN', 10000))
+ML_PREDICTION_CACHE_ALIAS = os.environ.get('ML_PREDICTION_CACHE_ALIAS', 'default')
+
+# Celery: without a broker, tasks run synchronously in the calling process
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', '')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or None
+CELERY_TASK_ALWAYS_EAGER = not CELERY_BROKER_URL
+CELERY_TASK_EAGER_PROPAGATES = True
+# Run `celery -A budgeting_app_backend beat` next to the workers for these
+NOTIFICATION_RULES_INTERVAL = int(os.environ.get('NOTIFICATION_RULES_INTERVAL', 60 * 60))
+CELERY_BEAT_SCHEDULE = {
+    'evaluate-notification-rules': {
+        'task': 'api.tasks.evaluate_notification_rules_task',
+        'schedule': NOTIFICATION_RULES_INTERVAL,
+    },
+    'prune-read-notifications': {
+        'task': 'api.tasks.prune_notifications_task',
+        'schedule': 60 * 60 * 24,
+    },
+}
+# Read notifications older than this are deleted, in batches, by the task above
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_PRUNE_BATCH_SIZE = int(os.environ.get('NOTIFICATION_PRUNE_BATCH_SIZE', 1000))
+
+# Server-sent events (/api/async/events/, ASGI only). memory:// reaches the
+# streams of the process that made the write; with several workers, or
+# Celery writing notifications, use redis://host:6379/0 instead
+EVENT_LAYER_URL = os.environ.get('EVENT_LAYER_URL', 'memory://')
+EVENT_STREAM_QUEUE_SIZE = int(os.environ.get('EVENT_STREAM_QUEUE_SIZE', 100))
+EVENT_STREAM_HEARTBEAT = int(os.environ.get('EVENT_STREAM_HEARTBEAT', 15))
+EVENT_STREAM_RETRY_MS = int(os.environ.get('EVENT_STREAM_RETRY_MS', 3000))
+# EventSource cannot send headers, so a stream is opened with a single-use
+# ticket from /api/async/events/ticket/; must be shared by every worker
+EVENT_TICKET_CACHE_ALIAS = os.environ.get('EVENT_TICKET_CACHE_ALIAS', 'default')
+
+# Per-user data version: bumped on every write to a user's transactions,
+# budgets or savings goal; cached summaries and reports are keyed by it
+DATA_VERSION_CACHE_ALIAS = os.environ.get('DATA_VERSION_CACHE_ALIAS', 'default')
+SUMMARY_CACHE_ALIAS = os.environ.get('SUMMARY_CACHE_ALIAS', 'default')
+# Unread notification counts; must be shared by every worker that writes them
+NOTIFICATION_CACHE_ALIAS = os.environ.get('NOTIFICATION_CACHE_ALIAS', 'default')
+
+# PDF reports are rendered by a Celery task and cached per data version. With
+# a real broker REPORT_CACHE_ALIAS must point at a cache the workers share.
+REPORT_CACHE_ALIAS = os.environ.get('REPORT_CACHE_ALIAS', 'default')
+REPORT_RENDER_TIMEOUT = int(os.environ.get('REPORT_RENDER_TIMEOUT', 300))
+# Transactions listed in a report's appendix; the totals always cover every row
+REPORT_APPENDIX_MAX_ROWS = int(os.environ.get('REPORT_APPENDIX_MAX_ROWS', 10000))
+
+# Caches. CACHE_URL picks the shared backend (see cache_config.py):
+# redis://... in production, file:///path for several workers on one host
+# (the default, under the temp directory), locmem:// for a single process
+# only; gunicorn.conf.py refuses to start several workers on it. 'default'
+# puts a small in-process LRU in front of it for namespaces whose keys are
+# versioned.
+CACHE_URL = os.environ.get('CACHE_URL', (Path(tempfile.gettempdir()) / 'budgetbuddy-cache').as_uri())
+CACHE_LOCAL_TIMEOUT = int(os.environ.get('CACHE_LOCAL_TIMEOUT', 60))
+CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', 1000))
+CACHES = {
+    'shared': parse_cache_url(CACHE_URL),
+    'default': {
+        'BACKEND': 'api.cache_backends.TwoTierCache',
+        'LOCATION': 'default-local',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_NAMESPACES': ['catpred', 'summary'],
+            'LOCAL_TIMEOUT': CACHE_LOCAL_TIMEOUT,
+            'LOCAL_MAX_ENTRIES': CACHE_LOCAL_MAX_ENTRIES,
+        },
+    },
+}
+# Lifetime in seconds of each key namespace; CACHE_TTL_<NAMESPACE> overrides
+CACHE_TTLS = {
+    namespace: int(os.environ.get(f'CACHE_TTL_{namespace.upper()}', default))
+    for namespace, default in {
+        'catpred': 60 * 60 * 24,         # classifier predictions
+        'summary': 60 * 60 * 24,         # dashboard / chatbot summaries
+        'report': 60 * 60 * 24 * 7,      # rendered PDF reports
+        'unread': 60 * 60,               # unread notification counts
+        'streamticket': 30,              # single-use event stream tickets
+    }.items()
+}
+
 # Email Configuration (for password reset)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
@@ -0,0 +1,22 @@
+# gunicorn.conf.py
+# Import the app and load the classifier in the master process so every
+# forked worker shares the model's memory instead of loading its own copy.
+preload_app = True
+
+
+def on_starting(server):
+    # Data versions, cached summaries, unread counts and report markers must
+    # be seen by every worker, or each one serves its own stale copy
+    from django.conf import settings
+    from budgeting_app_backend.cache_config import process_local
+
+    if server.cfg.workers > 1 and process_local(settings.CACHES['shared']):
+        raise SystemExit(
+            f"CACHE_URL={settings.CACHE_URL} keeps a cache per process; set it to a "
+            f"file:// or redis:// URL every one of the {server.cfg.workers} workers can reach"
+        )
+
+
+def when_ready(server):
+    from api.ml.registry import get_registry
+    get_registry().preload()
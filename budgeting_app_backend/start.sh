@@ -4,8 +4,19 @@ set -o errexit
 # Run migrations
 python manage.py migrate
 
-# Start Gunicorn
+# Start Gunicorn. SERVER_MODE=asgi serves the ASGI application with uvicorn
+# workers, which the async views under /api/async/ need to run concurrently.
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    exec gunicorn budgeting_app_backend.asgi:application \
+        --worker-class uvicorn.workers.UvicornWorker \
+        --config gunicorn.conf.py \
+        --bind 0.0.0.0:$PORT \
+        --workers 4 \
+        --timeout 120
+fi
+
 exec gunicorn budgeting_app_backend.wsgi:application \
+    --config gunicorn.conf.py \
     --bind 0.0.0.0:$PORT \
     --workers 4 \
     --timeout 120
\ No newline at end of file